@@ -34,6 +34,10 @@ class Command(BaseCommand):
         parser.add_argument('--python-lib-filename',
                             default=DEFAULT_PYTHON_LIB_FILENAME,
                             help='Filename of the course code library (if it exists)')
+        parser.add_argument('--static-workers',
+                            type=int,
+                            default=1,
+                            help='Number of threads uploading static content concurrently')
 
     def handle(self, *args, **options):
         data_dir = options['data_directory']
@@ -66,6 +70,7 @@ class Command(BaseCommand):
             do_import_static=do_import_static, do_import_python_lib=do_import_python_lib,
             create_if_not_present=True,
             python_lib_filename=python_lib_filename,
+            static_content_workers=options['static_workers'],
         )
 
         for course in course_items:
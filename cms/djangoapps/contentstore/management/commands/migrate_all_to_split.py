@@ -0,0 +1,115 @@
+"""
+Django management command to migrate many courses from the old Mongo modulestore
+to the split-Mongo modulestore, optionally several at a time.
+"""
+from __future__ import print_function
+
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from six import text_type
+
+from contentstore.management.commands.utils import user_from_str
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import create_modulestore_instance, modulestore
+from xmodule.modulestore.split_migrator import SplitMigrator
+
+
+class Command(BaseCommand):
+    """
+    Migrate courses from old-Mongo to split-Mongo with the migrator's bulk mode, keeping their course ids,
+    and list the courses which failed to migrate.
+    """
+
+    help = (
+        "Migrate the given old-Mongo courses, or all of them, to split-Mongo, "
+        "optionally using a pool of workers with a modulestore each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('email')
+        parser.add_argument('course_keys', nargs='*', help='Courses to migrate. Defaults to all old-Mongo courses.')
+        parser.add_argument('--workers', type=int, default=1, help='Number of courses to migrate at a time.')
+
+    def handle(self, *args, **options):
+        try:
+            user = user_from_str(options['email'])
+        except User.DoesNotExist:
+            raise CommandError("No user found identified by {}".format(options['email']))
+
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        source_store = modulestore()
+        mongo_store = source_store._get_modulestore_by_type(ModuleStoreEnum.Type.mongo)  # pylint: disable=protected-access
+        split_store = source_store._get_modulestore_by_type(ModuleStoreEnum.Type.split)  # pylint: disable=protected-access
+
+        try:
+            course_keys = [CourseKey.from_string(course_key) for course_key in options['course_keys']]
+        except InvalidKeyError:
+            raise CommandError("Invalid location string")
+        if not course_keys:
+            course_keys = [summary.id for summary in mongo_store.get_course_summaries()]
+
+        if options['workers'] == 1:
+            migrator = SplitMigrator(source_modulestore=source_store, split_modulestore=split_store)
+            errors = [self._migrate(migrator, course_key, user) for course_key in course_keys]
+        else:
+            # The modulestores and the migrator aren't thread-safe, so each worker gets its own.
+            workers = threading.local()
+
+            def migrate(course_key):
+                """
+                Migrate a course with the migrator of the current worker.
+                """
+                if not hasattr(workers, 'migrator'):
+                    worker_store = self._create_modulestore()
+                    workers.migrator = SplitMigrator(
+                        source_modulestore=worker_store,
+                        split_modulestore=worker_store._get_modulestore_by_type(ModuleStoreEnum.Type.split),  # pylint: disable=protected-access
+                    )
+                return self._migrate(workers.migrator, course_key, user)
+
+            executor = ThreadPoolExecutor(max_workers=options['workers'])
+            try:
+                errors = list(executor.map(migrate, course_keys))
+            finally:
+                executor.shutdown()
+
+        failed_courses = [
+            (course_key, err) for course_key, err in zip(course_keys, errors) if err is not None
+        ]
+        print("=" * 80)
+        print("Total number of courses to migrate: {0}".format(len(course_keys)))
+        print("Total number of courses which failed to migrate: {0}".format(len(failed_courses)))
+        for course_key, err in failed_courses:
+            print(u"{0}: {1!r}".format(text_type(course_key), err))
+        print("=" * 80)
+
+    @staticmethod
+    def _migrate(migrator, course_key, user):
+        """
+        Migrate a course, returning the error which made it fail, if any.
+        """
+        try:
+            migrator.migrate_mongo_course(course_key, user.id, bulk=True)
+        except Exception as err:  # pylint: disable=broad-except
+            return err
+
+    @staticmethod
+    def _create_modulestore():
+        """
+        Return a new modulestore configured like the default one.
+        """
+        return create_modulestore_instance(
+            settings.MODULESTORE['default']['ENGINE'],
+            contentstore(),
+            settings.MODULESTORE['default'].get('DOC_STORE_CONFIG', {}),
+            settings.MODULESTORE['default'].get('OPTIONS', {})
+        )
@@ -0,0 +1,79 @@
+"""
+Unittests for migrating many courses to split mongo
+"""
+from django.core.management import CommandError, call_command
+from mock import patch
+
+from contentstore.management.commands.migrate_all_to_split import Command
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+from xmodule.modulestore.django import modulestore
+
+
+# pylint: disable=protected-access
+class TestMigrateAllToSplit(ModuleStoreTestCase):
+    """
+    Unit tests for migrating several courses from old mongo to split mongo
+    """
+
+    def setUp(self):
+        super(TestMigrateAllToSplit, self).setUp()
+        self.courses = [CourseFactory(default_store=ModuleStoreEnum.Type.mongo) for __ in range(3)]
+        self.split_store = modulestore()._get_modulestore_by_type(ModuleStoreEnum.Type.split)
+
+    def assert_migrated(self, course):
+        """
+        Assert that `course` has been migrated to split, keeping its course id.
+        """
+        new_key = self.split_store.make_course_key(course.id.org, course.id.course, course.id.run)
+        self.assertTrue(self.split_store.has_course(new_key), "Could not find course")
+
+    def test_migrate_given_courses(self):
+        call_command(
+            "migrate_all_to_split",
+            str(self.user.email),
+            str(self.courses[0].id),
+            str(self.courses[1].id),
+            workers=2,
+        )
+        self.assert_migrated(self.courses[0])
+        self.assert_migrated(self.courses[1])
+        new_key = self.split_store.make_course_key(
+            self.courses[2].id.org, self.courses[2].id.course, self.courses[2].id.run
+        )
+        self.assertFalse(self.split_store.has_course(new_key))
+
+    def test_migrate_all_courses(self):
+        call_command("migrate_all_to_split", str(self.user.id))
+        for course in self.courses:
+            self.assert_migrated(course)
+
+    def test_workers_use_their_own_modulestore(self):
+        create_modulestore = Command._create_modulestore
+        worker_stores = []
+
+        def create_worker_store():
+            """
+            Create a modulestore for a worker, keeping track of it.
+            """
+            worker_stores.append(create_modulestore())
+            return worker_stores[-1]
+
+        with patch.object(Command, '_create_modulestore', side_effect=create_worker_store):
+            call_command("migrate_all_to_split", str(self.user.id), workers=3)
+        for course in self.courses:
+            self.assert_migrated(course)
+        self.assertIn(len(worker_stores), range(1, 4))
+        self.assertNotIn(modulestore(), worker_stores)
+
+    def test_single_worker_uses_default_modulestore(self):
+        with patch.object(Command, '_create_modulestore') as mock_create:
+            call_command("migrate_all_to_split", str(self.user.id))
+        for course in self.courses:
+            self.assert_migrated(course)
+        self.assertFalse(mock_create.called)
+
+    def test_invalid_workers(self):
+        with self.assertRaisesRegexp(CommandError, "--workers must be at least 1"):
+            call_command("migrate_all_to_split", str(self.user.id), workers=0)
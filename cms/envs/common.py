@@ -582,6 +582,16 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 ############################ Modulestore Configuration ################################
 MODULESTORE_BRANCH = 'draft-preferred'
 
+# Maximum total size, in bytes, of the pickled course structures kept in each
+# process on top of the 'course_structure_cache' backend. 0 disables it.
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 64 * 1024 * 1024
+
+# Local directory in which contentserver keeps the course assets too large for the
+# 'course_assets' cache, and the maximum total size, in bytes, of the files in it.
+# None disables it.
+CONTENTSERVER_DISK_CACHE_DIR = None
+CONTENTSERVER_DISK_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
 MODULESTORE = {
     'default': {
         'ENGINE': 'xmodule.modulestore.mixed.MixedModuleStore',
@@ -697,6 +707,9 @@ MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
 
 COURSE_IMPORT_EXPORT_STORAGE = 'django.core.files.storage.FileSystemStorage'
 
+# Number of threads uploading a course's static files concurrently during import
+COURSE_IMPORT_STATIC_CONTENT_WORKERS = 4
+
 ##### EMBARGO #####
 EMBARGO_SITE_REDIRECT_URL = None
 
@@ -179,6 +179,9 @@ CACHES = {
     },
 }
 
+# Structures cached in-process would outlive the per-test cache resets
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 0
+
 ################################# CELERY ######################################
 
 CELERY_ALWAYS_EAGER = True
@@ -7,6 +7,8 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import numbers
 import operator
+import threading
+from collections import OrderedDict
 
 import numpy
 from pyparsing import (
@@ -17,6 +19,7 @@ from pyparsing import (
     Literal,
     MatchFirst,
     Optional,
+    ParserElement,
     ParseResults,
     Suppress,
     Word,
@@ -76,10 +79,22 @@ DEFAULT_VARIABLES = {
     'pi': numpy.pi,
 }
 
+# Default functions which also work elementwise on numpy arrays.
+VECTORIZABLE_FUNCTIONS = frozenset(
+    function for name, function in DEFAULT_FUNCTIONS.iteritems()
+    if name not in ('fact', 'factorial', 'arccot')
+)
+
 SUFFIXES = {
     '%': 0.01,
 }
 
+# Values in a parse result; anything else in it is a token like '(' or '^'.
+NUMERIC_TYPES = (numbers.Number, numpy.ndarray)
+
+# Maximum number of parsed expressions kept by `compile_expression`.
+COMPILED_EXPRESSION_CACHE_SIZE = 1024
+
 
 class UndefinedVariable(Exception):
     """
@@ -137,7 +152,7 @@ def eval_atom(parse_result):
     In the case of parenthesis, ignore them.
     """
     # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    result = next(k for k in parse_result if isinstance(k, NUMERIC_TYPES))
     return result
 
 
@@ -151,7 +166,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if isinstance(k, NUMERIC_TYPES)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -177,6 +192,18 @@ def eval_parallel(parse_result):
     return 1. / sum(reciprocals)
 
 
+def eval_parallel_arrays(parse_result):
+    """
+    Like `eval_parallel`, for inputs which may be numpy arrays.
+
+    Zero inputs make the division fail, so evaluate them with `eval_parallel`.
+    """
+    values = [k for k in parse_result if isinstance(k, NUMERIC_TYPES)]
+    if len(values) == 1:
+        return values[0]
+    return 1. / sum(1. / value for value in values)
+
+
 def eval_sum(parse_result):
     """
     Add the inputs, keeping in mind their sign.
@@ -231,36 +258,53 @@ def add_defaults(variables, functions, case_sensitive):
     return (all_variables, all_functions)
 
 
-def evaluator(variables, functions, math_expr, case_sensitive=False):
+_compiled_expressions = OrderedDict()
+_compiled_expressions_lock = threading.Lock()
+
+
+def compile_expression(math_expr, case_sensitive=False):
     """
-    Evaluate an expression; that is, take a string of math and return a float.
+    Return a parsed `ParseAugmenter` for the expression, ready to be evaluated
+    with `reduce_tree` any number of times.
 
-    -Variables are passed as a dictionary from string to value. They must be
-     python numbers.
-    -Unary functions are passed as a dictionary from string to function.
+    The most recently used parses are kept, so an expression which is checked
+    again (for another sample, learner or rescore) is only parsed once.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    key = (math_expr, case_sensitive)
+    with _compiled_expressions_lock:
+        math_interpreter = _compiled_expressions.pop(key, None)
+        if math_interpreter is not None:
+            _compiled_expressions[key] = math_interpreter
+            return math_interpreter
 
-    # Parse the tree.
-    check_parens(math_expr)
     math_interpreter = ParseAugmenter(math_expr, case_sensitive)
     math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+    with _compiled_expressions_lock:
+        _compiled_expressions[key] = math_interpreter
+        while len(_compiled_expressions) > COMPILED_EXPRESSION_CACHE_SIZE:
+            _compiled_expressions.popitem(last=False)
+    return math_interpreter
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
 
-    # Create a recursion to evaluate the tree.
+def clear_compiled_expressions():
+    """
+    Forget all the expressions parsed by `compile_expression`.
+    """
+    with _compiled_expressions_lock:
+        _compiled_expressions.clear()
+
+
+def get_evaluate_actions(all_variables, all_functions, case_sensitive):
+    """
+    Return the `reduce_tree` actions evaluating a tree with the given variables and functions.
+    """
     if case_sensitive:
         casify = lambda x: x
     else:
         casify = lambda x: x.lower()  # Lowercase for case insens.
 
-    evaluate_actions = {
+    return {
         'number': eval_number,
         'variable': lambda x: all_variables[casify(x[0])],
         'function': lambda x: all_functions[casify(x[0])](x[1]),
@@ -271,7 +315,178 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         'sum': eval_sum
     }
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+
+def evaluator(variables, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression; that is, take a string of math and return a float.
+
+    -Variables are passed as a dictionary from string to value. They must be
+     python numbers.
+    -Unary functions are passed as a dictionary from string to function.
+    """
+    # No need to go further.
+    if math_expr.strip() == "":
+        return float('nan')
+
+    # Parse the tree.
+    check_parens(math_expr)
+    math_interpreter = compile_expression(math_expr, case_sensitive)
+
+    # Get our variables together.
+    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+
+    # ...and check them
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    # Evaluate the tree.
+    return math_interpreter.reduce_tree(get_evaluate_actions(all_variables, all_functions, case_sensitive))
+
+
+def evaluate_samples(samples, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression at each of a list of samples, which are dictionaries
+    of variables as for `evaluator`, and return the list of results.
+
+    When the samples have the same variables and the expression only uses
+    functions which work on arrays, all the samples are evaluated in one pass
+    over numpy arrays. Otherwise, or if that pass hits any error or floating
+    point exception, each sample goes through `evaluator`, which gives the
+    exact same results and errors as evaluating them one at a time.
+    """
+    if math_expr.strip() == "":
+        return [float('nan')] * len(samples)
+
+    results = None
+    if samples:
+        try:
+            results = _evaluate_vectorized(samples, functions, math_expr, case_sensitive)
+        except Exception:  # pylint: disable=broad-except
+            results = None
+    if results is None:
+        results = [evaluator(sample, functions, math_expr, case_sensitive) for sample in samples]
+    return results
+
+
+def _evaluate_vectorized(samples, functions, math_expr, case_sensitive):
+    """
+    Evaluate the expression at all the samples at once, or return None if it can't be.
+    """
+    names = set(samples[0])
+    if any(set(sample) != names for sample in samples):
+        return None
+    variables = {name: numpy.array([sample[name] for sample in samples]) for name in names}
+
+    math_interpreter = compile_expression(math_expr, case_sensitive)
+    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+    math_interpreter.check_variables(all_variables, all_functions)
+
+    casify = (lambda x: x) if case_sensitive else (lambda x: x.lower())
+    if any(all_functions[casify(name)] not in VECTORIZABLE_FUNCTIONS for name in math_interpreter.functions_used):
+        return None
+
+    evaluate_actions = get_evaluate_actions(all_variables, all_functions, case_sensitive)
+    evaluate_actions['parallel'] = eval_parallel_arrays
+    # Anything the scalar evaluation would do differently, like dividing by zero, must raise.
+    with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+        result = numpy.asarray(math_interpreter.reduce_tree(evaluate_actions))
+
+    if result.ndim == 0:
+        # The expression doesn't depend on the variables.
+        return [result[()]] * len(samples)
+    if result.shape != (len(samples),):
+        return None
+    return list(result)
+
+
+def build_grammar():
+    """
+    Build the pyparsing grammar of algebraic expressions.
+
+    The grammar has no parse actions, so that it can be shared by all parses,
+    including concurrent ones, and memoized with packrat parsing.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with a letter
+    # and may contain numbers and underscores afterward.
+    inner_varname = Combine(Word(alphas, alphanums + "_") + ZeroOrMore("'"))
+    # Alternative variable name in tensor format
+    # Tensor name must start with a letter, continue with alphanums
+    # Indices may be alphanumeric
+    # e.g., U_{ijk}^{123}
+    upper_indices = Literal("^{") + Word(alphanums) + Literal("}")
+    lower_indices = Literal("_{") + Word(alphanums) + Literal("}")
+    tensor_lower = Combine(Word(alphas, alphanums) + lower_indices + ZeroOrMore("'"))
+    tensor_mixed = Combine(Word(alphas, alphanums) + Optional(lower_indices) + upper_indices + ZeroOrMore("'"))
+    # Test for mixed tensor first, then lower tensor alone, then generic variable name
+    varname = Group(tensor_mixed | tensor_lower | inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+# The grammar backtracks a lot between its alternatives (e.g. `function` and
+# `varname` both start with a name), which packrat parsing memoizes.
+ParserElement.enablePackrat()
+MATH_GRAMMAR = build_grammar()
+
+
+def find_names_used(tree):
+    """
+    Return the sets of the variable names and the function names used in a parse tree.
+    """
+    variables_used = set()
+    functions_used = set()
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        node_name = node.getName()
+        if node_name == 'variable':
+            variables_used.add(node[0])
+        elif node_name == 'function':
+            functions_used.add(node[0])
+        nodes.extend(child for child in node if isinstance(child, ParseResults))
+    return variables_used, functions_used
 
 
 def check_parens(formula):
@@ -318,23 +533,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -342,71 +540,14 @@ class ParseAugmenter(object):
         Store a `pyparsing.ParseResult` in `self.tree` with proper groupings to
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
+        Also store the names of the variables and functions it uses.
 
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
-        )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with a letter
-        # and may contain numbers and underscores afterward.
-        inner_varname = Combine(Word(alphas, alphanums + "_") + ZeroOrMore("'"))
-        # Alternative variable name in tensor format
-        # Tensor name must start with a letter, continue with alphanums
-        # Indices may be alphanumeric
-        # e.g., U_{ijk}^{123}
-        upper_indices = Literal("^{") + Word(alphanums) + Literal("}")
-        lower_indices = Literal("_{") + Word(alphanums) + Literal("}")
-        tensor_lower = Combine(Word(alphas, alphanums) + lower_indices + ZeroOrMore("'"))
-        tensor_mixed = Combine(Word(alphas, alphanums) + Optional(lower_indices) + upper_indices + ZeroOrMore("'"))
-        # Test for mixed tensor first, then lower tensor alone, then generic variable name
-        varname = Group(tensor_mixed | tensor_lower | inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        self.tree = MATH_GRAMMAR.parseString(self.math_expr)[0]
+        self.variables_used, self.functions_used = find_names_used(self.tree)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
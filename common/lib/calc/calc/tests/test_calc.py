@@ -554,3 +554,61 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({}, {}, "(1+2")
         with self.assertRaisesRegexp(calc.UnmatchedParenthesis, 'no matching opening parenthesis'):
             calc.evaluator({}, {}, "(1+2))")
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Run tests for calc.evaluate_samples and calc.compile_expression
+    """
+    samples = [{'x': 0.5, 'y': 2.0}, {'x': 1.5, 'y': -1.0}, {'x': 3.0, 'y': 0.25}]
+
+    def assert_same_as_evaluator(self, math_expr, samples=None, functions=None):
+        """
+        Check that evaluate_samples gives what evaluator gives for each sample.
+        """
+        samples = self.samples if samples is None else samples
+        functions = functions or {}
+        expected = [calc.evaluator(sample, functions, math_expr) for sample in samples]
+        results = calc.evaluate_samples(samples, functions, math_expr)
+        self.assertEqual(len(results), len(expected))
+        for result, value in zip(results, expected):
+            self.assertAlmostEqual(complex(result), complex(value))
+
+    def test_vectorized(self):
+        for math_expr in ("x^2 + 3*y - 1", "sin(x)*cos(y)/sqrt(x)", "x || 3", "2^3", "x*50%", "sqrt(y)", "-x^y"):
+            self.assert_same_as_evaluator(math_expr)
+
+    def test_falls_back_to_evaluator(self):
+        # Factorial doesn't work on arrays
+        self.assert_same_as_evaluator("fact(x*2)", samples=[{'x': 1.0}, {'x': 2.0}])
+        # Parallel resistors with a zero input give NaN
+        results = calc.evaluate_samples([{'x': 0.0}, {'x': 2.0}], {}, "x || 2")
+        self.assertTrue(numpy.isnan(results[0]))
+        self.assertEqual(results[1], 1.0)
+        # Custom functions
+        self.assert_same_as_evaluator("f(x)", functions={'f': lambda value: value + 1})
+
+    def test_errors(self):
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(self.samples, {}, "x/(y-y)")
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'z'):
+            calc.evaluate_samples(self.samples, {}, "x+z")
+        with self.assertRaises(calc.UnmatchedParenthesis):
+            calc.evaluate_samples(self.samples, {}, "(x")
+
+    def test_empty_expression(self):
+        results = calc.evaluate_samples(self.samples, {}, " ")
+        self.assertEqual(len(results), len(self.samples))
+        self.assertTrue(all(numpy.isnan(result) for result in results))
+
+    def test_compiled_once(self):
+        math_expr = "x*y + 17"
+        compiled = calc.compile_expression(math_expr)
+        self.assertIs(calc.compile_expression(math_expr), compiled)
+        self.assertIsNot(calc.compile_expression(math_expr, case_sensitive=True), compiled)
+        self.assertEqual(calc.evaluator({'x': 2, 'y': 3}, {}, math_expr), 23)
+
+    def test_names_used(self):
+        compiled = calc.compile_expression("f(x) + g(U_{ij}^{k}) * y'")
+        self.assertEqual(compiled.variables_used, {'x', 'U_{ij}^{k}', "y'"})
+        self.assertEqual(compiled.functions_used, {'f', 'g'})
@@ -0,0 +1,120 @@
+"""
+Performance tests for parsing and evaluating student expressions with calc.
+"""
+import random
+import unittest
+
+import numpy
+
+import calc
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# Answers of the kind students type into numerical and formula problems.
+NUMERICAL_ANSWERS = [
+    "42",
+    "3.14159",
+    "-0.5",
+    "6.02e23",
+    "1.6E-19",
+    "2.5e3",
+    "12%",
+    "sqrt(2)/2",
+    "2*pi",
+    "(1+2)*3^2",
+    "1/(1/3+1/6)",
+    "3 || 6",
+    "e^(-1)",
+    "10^-3",
+    "sin(pi/6) + cos(pi/3)",
+    "ln(2)/0.693",
+]
+FORMULA_ANSWERS = [
+    "x^2 + 2*x + 1",
+    "(x+1)^2",
+    "m*g*h",
+    "1/2*m*v^2",
+    "sqrt(x^2 + y^2)",
+    "sin(x)^2 + cos(x)^2",
+    "exp(-t/tau)",
+    "A*cos(omega*t + phi)",
+    "(R1*R2)/(R1+R2)",
+    "R1 || R2",
+    "log10(x)*2",
+    "x*(y - z)/(x + y + z)",
+]
+FORMULA_VARIABLES = ['x', 'y', 'z', 't', 'tau', 'm', 'g', 'h', 'v', 'A', 'omega', 'phi', 'R1', 'R2']
+
+# Times each expression is checked, as when many learners submit the same answer.
+REPEATS = 200
+# Samples per formula check, as in the `samples` attribute of formula problems.
+NUM_SAMPLES = 20
+
+
+@unittest.skip
+class CalcTimings(unittest.TestCase):
+    """
+    This class exists to time the parsing and evaluation of realistic
+    student answers, with and without the parse cache.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def setUp(self):
+        super(CalcTimings, self).setUp()
+        if CodeBlockTimer is None:
+            raise unittest.SkipTest("CodeBlockTimer undefined.")
+        # Keep numpy's warnings about values outside a function's domain out of the output.
+        errstate = numpy.errstate(all='ignore')
+        errstate.__enter__()
+        self.addCleanup(errstate.__exit__, None, None, None)
+        rand = random.Random(0)
+        self.samples = [
+            {name: rand.uniform(1, 2) for name in FORMULA_VARIABLES}
+            for __ in range(NUM_SAMPLES)
+        ]
+
+    def test_numerical_timings(self):
+        """
+        Generate timings for checking numerical answers.
+        """
+        with CodeBlockTimer("Calc:numerical:{}".format(len(NUMERICAL_ANSWERS) * REPEATS)):
+            with CodeBlockTimer("uncached"):
+                for __ in range(REPEATS):
+                    calc.clear_compiled_expressions()
+                    for answer in NUMERICAL_ANSWERS:
+                        calc.evaluator({}, {}, answer)
+
+            with CodeBlockTimer("cached"):
+                for __ in range(REPEATS):
+                    for answer in NUMERICAL_ANSWERS:
+                        calc.evaluator({}, {}, answer)
+
+    def test_formula_timings(self):
+        """
+        Generate timings for checking formula answers at several samples.
+        """
+        with CodeBlockTimer("Calc:formula:{}x{}".format(len(FORMULA_ANSWERS) * REPEATS, NUM_SAMPLES)):
+            with CodeBlockTimer("uncached:per_sample"):
+                for __ in range(REPEATS):
+                    for answer in FORMULA_ANSWERS:
+                        for sample in self.samples:
+                            calc.clear_compiled_expressions()
+                            calc.evaluator(sample, {}, answer, case_sensitive=True)
+
+            with CodeBlockTimer("cached:per_sample"):
+                for __ in range(REPEATS):
+                    for answer in FORMULA_ANSWERS:
+                        for sample in self.samples:
+                            calc.evaluator(sample, {}, answer, case_sensitive=True)
+
+            with CodeBlockTimer("cached:evaluate_samples"):
+                for __ in range(REPEATS):
+                    for answer in FORMULA_ANSWERS:
+                        calc.evaluate_samples(self.samples, {}, answer, case_sensitive=True)
@@ -13,12 +13,14 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+import hashlib
 import logging
 import os.path
 import re
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+from threading import Lock
 from xml.sax.saxutils import unescape
 
 from lxml import etree
@@ -29,7 +31,7 @@ import capa.inputtypes as inputtypes
 import capa.responsetypes as responsetypes
 import capa.xqueue_interface as xqueue_interface
 from capa.correctmap import CorrectMap
-from capa.safe_exec import safe_exec
+from capa.safe_exec import safe_exec, safe_exec_batch
 from capa.util import contextualize_text, convert_files_to_filenames
 from openedx.core.djangolib.markup import HTML
 from xmodule.stringify import stringify_children
@@ -71,6 +73,66 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+
+class ProblemTemplateCache(object):
+    """
+    Per-process LRU cache of problem templates: the parsed XML tree of a problem
+    after its IDs are assigned and its accessibility data extracted, which is all
+    the work done on a problem before its seed comes into play.
+
+    Templates are keyed on the problem's id and a hash of its XML, so an entry
+    never needs to be invalidated. Every caller gets its own copy of a template.
+    """
+    MAX_ENTRIES = 1000
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(problem_id, problem_text):
+        """
+        Returns the cache key of the problem `problem_id` defined by `problem_text`.
+        """
+        if isinstance(problem_text, unicode):
+            problem_text = problem_text.encode('utf-8')
+        return problem_id, hashlib.sha1(problem_text).hexdigest()
+
+    def get(self, problem_id, problem_text):
+        """
+        Returns a copy of the (tree, problem_data) template stored for the problem, or None.
+        """
+        key = self._key(problem_id, problem_text)
+        with self._lock:
+            template = self._entries.pop(key, None)
+            if template is None:
+                return None
+            self._entries[key] = template
+        return deepcopy(template)
+
+    def set(self, problem_id, problem_text, tree, problem_data):
+        """
+        Stores a copy of the template of the problem, evicting the least recently used
+        templates beyond :attr:`MAX_ENTRIES`.
+        """
+        key = self._key(problem_id, problem_text)
+        template = deepcopy((tree, problem_data))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = template
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all the templates from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+PROBLEM_TEMPLATE_CACHE = ProblemTemplateCache()
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -178,13 +240,27 @@ class LoncapaProblem(object):
         problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
         self.problem_text = problem_text
 
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        # The seed-independent work on the problem's XML is shared by all learners.
+        template = PROBLEM_TEMPLATE_CACHE.get(self.problem_id, problem_text)
+        if template is not None:
+            self.tree, self.problem_data = template
+        else:
+            # parse problem XML file into an element tree
+            self.tree = etree.XML(problem_text)
+
+            self.make_xml_compatible(self.tree)
 
-        self.make_xml_compatible(self.tree)
+            # Included files can change independently of the problem, so such problems aren't cached.
+            cacheable = self.tree.find('.//include') is None
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+            # handle any <include file="foo"> tags
+            self._process_includes()
+
+            # Assign ID's to the responses and their inputs, and extract the a11y data.
+            self.problem_data = self._assign_response_ids(self.tree)
+
+            if cacheable:
+                PROBLEM_TEMPLATE_CACHE.set(self.problem_id, problem_text, self.tree, self.problem_data)
 
         # construct script processor context (eg for customresponse problems)
         if minimal_init:
@@ -192,11 +268,10 @@ class LoncapaProblem(object):
         else:
             self.context = self._extract_context(self.tree)
 
-        # Pre-parse the XML tree: modifies it to add ID's and perform some in-place
-        # transformations.  This also creates the dict (self.responders) of Response
-        # instances for each question in the problem. The dict has keys = xml subtree of
-        # Response, values = Response instance
-        self.problem_data = self._preprocess_problem(self.tree, minimal_init)
+        # Pre-parse the XML tree: performs some in-place transformations, and creates
+        # the dict (self.responders) of Response instances for each question in the problem.
+        # The dict has keys = xml subtree of Response, values = Response instance
+        self._preprocess_problem(self.tree, minimal_init)
 
         if not minimal_init:
             if not self.student_answers:  # True when student_answers is an empty dict
@@ -841,6 +916,37 @@ class LoncapaProblem(object):
         context = {}
         context['seed'] = self.seed
         context['anonymous_student_id'] = self.capa_system.anonymous_student_id
+        all_code, python_path, extra_files = self._extract_script(tree)
+
+        if all_code:
+            try:
+                safe_exec(
+                    all_code,
+                    context,
+                    random_seed=self.seed,
+                    python_path=python_path,
+                    extra_files=extra_files,
+                    cache=self.capa_system.cache,
+                    slug=self.problem_id,
+                    unsafely=self.capa_system.can_execute_unsafe_code(),
+                )
+            except Exception as err:
+                log.exception("Error while execing script code: " + all_code)
+                msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
+                raise responsetypes.LoncapaProblemError(msg)
+
+        # Store code source in context, along with the Python path needed to run it correctly.
+        context['script_code'] = all_code
+        context['python_path'] = python_path
+        context['extra_files'] = extra_files or None
+        return context
+
+    def _extract_script(self, tree):
+        """
+        Collect the Python code of the <script> tags of the problem.
+
+        Returns the code, and the Python path and extra files it needs to run.
+        """
         all_code = ''
 
         python_path = []
@@ -871,27 +977,31 @@ class LoncapaProblem(object):
                 extra_files.append(("python_lib.zip", zip_lib))
                 python_path.append("python_lib.zip")
 
-            try:
-                safe_exec(
-                    all_code,
-                    context,
-                    random_seed=self.seed,
-                    python_path=python_path,
-                    extra_files=extra_files,
-                    cache=self.capa_system.cache,
-                    slug=self.problem_id,
-                    unsafely=self.capa_system.can_execute_unsafe_code(),
-                )
-            except Exception as err:
-                log.exception("Error while execing script code: " + all_code)
-                msg = "Error while executing script code: %s" % str(err).replace('<', '&lt;')
-                raise responsetypes.LoncapaProblemError(msg)
+        return all_code, python_path, extra_files
 
-        # Store code source in context, along with the Python path needed to run it correctly.
-        context['script_code'] = all_code
-        context['python_path'] = python_path
-        context['extra_files'] = extra_files or None
-        return context
+    def prime_script_cache(self, learners):
+        """
+        Run the problem's scripts for other learners, given as a list of
+        (seed, anonymous_student_id) pairs, in as few sandboxes as possible.
+
+        The results go in the cache of the LoncapaSystem, where constructing
+        the problem for each of those learners will find them.
+        """
+        if not self.capa_system.cache or not learners:
+            return
+        all_code, python_path, extra_files = self._extract_script(self.tree)
+        if not all_code:
+            return
+        safe_exec_batch(
+            all_code,
+            [{'seed': seed, 'anonymous_student_id': anonymous_student_id} for seed, anonymous_student_id in learners],
+            [seed for seed, __ in learners],
+            python_path=python_path,
+            extra_files=extra_files,
+            cache=self.capa_system.cache,
+            slug=self.problem_id,
+            unsafely=self.capa_system.can_execute_unsafe_code(),
+        )
 
     def _extract_html(self, problemtree):  # private
         """
@@ -1009,32 +1119,24 @@ class LoncapaProblem(object):
 
         return tree
 
-    def _preprocess_problem(self, tree, minimal_init):  # private
+    def _assign_response_ids(self, tree):  # private
         """
         Assign IDs to all the responses
         Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
-        In-place transformation
+        In-place transformation, which depends only on the problem's XML and id
 
-        Also create capa Response instances for each responsetype and save as self.responders
-
-        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        Returns the a11y data of the responses' inputs, keyed by input id
         """
         response_id = 1
         problem_data = {}
-        self.responders = {}
-        for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
+        for response in self._find_responses(tree):
             responsetype_id = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
             response.set('id', responsetype_id)
             response_id += 1
 
             answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
-            inputfields = tree.xpath(
-                "|".join(['//' + response.tag + '[@id=$id]//' + x for x in input_tags]),
-                id=responsetype_id
-            )
+            inputfields = self._find_inputfields(tree, response)
 
             # assign one answer_id for each input type
             for entry in inputfields:
@@ -1045,6 +1147,39 @@ class LoncapaProblem(object):
 
             self.response_a11y_data(response, inputfields, responsetype_id, problem_data)
 
+        return problem_data
+
+    @staticmethod
+    def _find_responses(tree):
+        """
+        Returns the responsetype elements of the tree, in document order.
+        """
+        return tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags()))
+
+    @staticmethod
+    def _find_inputfields(tree, response):
+        """
+        Returns the input elements of the responsetype element `response`, in document order.
+        """
+        input_tags = inputtypes.registry.registered_tags()
+        return tree.xpath(
+            "|".join(['//' + response.tag + '[@id=$id]//' + x for x in input_tags]),
+            id=response.get('id')
+        )
+
+    def _preprocess_problem(self, tree, minimal_init):  # private
+        """
+        Annoted correctness and value
+        In-place transformation of a tree whose IDs were assigned by _assign_response_ids
+
+        Also create capa Response instances for each responsetype and save as self.responders
+
+        Obtain all responder answers and save as self.responder_answers dict (key = response)
+        """
+        self.responders = {}
+        for response in self._find_responses(tree):
+            inputfields = self._find_inputfields(tree, response)
+
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
             responder = responsetype_cls(
@@ -1073,8 +1208,6 @@ class LoncapaProblem(object):
                 solution.attrib['id'] = "%s_solution_%i" % (self.problem_id, solution_id)
                 solution_id += 1
 
-        return problem_data
-
     def response_a11y_data(self, response, inputfields, responsetype_id, problem_data):
         """
         Construct data to be used for a11y.
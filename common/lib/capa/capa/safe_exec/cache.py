@@ -0,0 +1,163 @@
+"""
+A cache for the results of safe_exec, which counts how well it is working.
+"""
+import json
+import zlib
+from collections import OrderedDict, defaultdict
+from threading import Lock
+
+
+class SafeExecStats(object):
+    """
+    Counters of safe_exec cache hits and misses, and of the number and duration
+    of the runs in the sandbox, for each slug passed to safe_exec (for capa,
+    the id of the problem or of the response running the code).
+
+    The counters are kept in memory for the life of the process.
+    """
+    COUNTERS = ('hits', 'misses', 'executions', 'execution_seconds', 'uncacheable')
+
+    def __init__(self):
+        self._counters = defaultdict(lambda: dict.fromkeys(self.COUNTERS, 0))
+        self._lock = Lock()
+
+    def _add(self, slug, counter, amount=1):
+        with self._lock:
+            self._counters[slug][counter] += amount
+
+    def record_lookup(self, slug, hit):
+        """
+        Count a cache lookup for `slug`, which found a result if `hit`.
+        """
+        self._add(slug, 'hits' if hit else 'misses')
+
+    def record_execution(self, slug, seconds, count=1):
+        """
+        Count `count` runs of code for `slug` in the sandbox, which took `seconds` in all.
+        """
+        with self._lock:
+            counters = self._counters[slug]
+            counters['executions'] += count
+            counters['execution_seconds'] += seconds
+
+    def record_uncacheable(self, slug):
+        """
+        Count a result for `slug` which was too large to cache.
+        """
+        self._add(slug, 'uncacheable')
+
+    def get(self, slug):
+        """
+        Returns a dict of the counters for `slug`.
+        """
+        with self._lock:
+            return dict(self._counters.get(slug) or dict.fromkeys(self.COUNTERS, 0))
+
+    def totals(self):
+        """
+        Returns a dict of the counters summed over all slugs, with the `hit_rate` of the cache.
+        """
+        totals = dict.fromkeys(self.COUNTERS, 0)
+        with self._lock:
+            for counters in self._counters.values():
+                for name, value in counters.items():
+                    totals[name] += value
+        lookups = totals['hits'] + totals['misses']
+        totals['hit_rate'] = float(totals['hits']) / lookups if lookups else None
+        return totals
+
+    def most_expensive(self, count=10):
+        """
+        Returns a list of (slug, counters) pairs for the `count` slugs which spent
+        the most time in the sandbox, most expensive first.
+        """
+        with self._lock:
+            items = [(slug, dict(counters)) for slug, counters in self._counters.items()]
+        items.sort(key=lambda item: item[1]['execution_seconds'], reverse=True)
+        return items[:count]
+
+    def reset(self):
+        """
+        Sets all the counters back to zero.
+        """
+        with self._lock:
+            self._counters.clear()
+
+
+class SafeExecCache(object):
+    """
+    The cache to pass to safe_exec, storing its results in a shared `backend`
+    (any object with .get(key) and .set(key, value) methods, like a Django
+    cache) and counting its hits and misses in `stats`. `backend` may also be
+    a function returning the backend to use, which is called on every access,
+    for backends which can't be shared between threads.
+
+    Results are stored as compressed JSON. Results whose compressed size is
+    over `max_value_bytes` are not stored, so that a few large ones can't push
+    many others out of the backend. If `local_max_bytes` is set, results are
+    also kept in a per-process LRU of at most that many compressed bytes, in
+    front of the backend.
+    """
+    def __init__(self, backend, max_value_bytes=1000 * 1000, local_max_bytes=0, stats=None):
+        self._backend = backend
+        self.max_value_bytes = max_value_bytes
+        self.local_max_bytes = local_max_bytes
+        self.stats = stats if stats is not None else SafeExecStats()
+        self._local = OrderedDict()
+        self._local_size = 0
+        self._lock = Lock()
+
+    @property
+    def backend(self):
+        """
+        The backend to store results in.
+        """
+        return self._backend() if callable(self._backend) else self._backend
+
+    def get(self, key):
+        """
+        Returns the result cached for `key`, or None.
+        """
+        with self._lock:
+            data = self._local.pop(key, None)
+            if data is not None:
+                self._local[key] = data
+        if data is None:
+            data = self.backend.get(key)
+            if data is None:
+                return None
+            self._set_local(key, data)
+        try:
+            return json.loads(zlib.decompress(data))
+        except (zlib.error, TypeError, ValueError):
+            # Not something this class stored, e.g. a result cached uncompressed
+            # in a backend which used to be passed to safe_exec directly.
+            return None
+
+    def set(self, key, value, slug=None):
+        """
+        Caches the result `value` for `key`, unless it is too large.
+        """
+        data = zlib.compress(json.dumps(value))
+        if len(data) > self.max_value_bytes:
+            self.stats.record_uncacheable(slug)
+            return
+        self.backend.set(key, data)
+        self._set_local(key, data)
+
+    def _set_local(self, key, data):
+        """
+        Keeps `data` in the per-process LRU, evicting the least recently used
+        entries to stay within `local_max_bytes`.
+        """
+        if len(data) > self.local_max_bytes:
+            return
+        with self._lock:
+            previous = self._local.pop(key, None)
+            if previous is not None:
+                self._local_size -= len(previous)
+            self._local[key] = data
+            self._local_size += len(data)
+            while self._local_size > self.local_max_bytes:
+                __, evicted = self._local.popitem(last=False)
+                self._local_size -= len(evicted)
@@ -1,12 +1,17 @@
 """Capa's specialized use of codejail.safe_exec."""
 
+from codejail import jail_code
 from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .cache import SafeExecCache
 from six import text_type
 
 import hashlib
+import json
+import os.path
+import time
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -49,6 +54,67 @@ for name, modname in ASSUMED_IMPORTS:
 
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
+# Runs a list of [code, globals] jobs read from stdin in one sandboxed process,
+# writing a line of JSON with [traceback or None, cleaned globals] after each.
+# Modules the code replaces in sys.modules (as CODE_PROLOG does with random) are
+# put back between jobs; modules it imports stay loaded for the next ones.
+BATCH_RUNNER = """\
+import random
+import sys
+import traceback
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+class DevNull(object):
+    def write(self, *args, **kwargs):
+        pass
+
+    def flush(self, *args, **kwargs):
+        pass
+sys.stdout = DevNull()
+
+ok_types = (
+    type(None), int, long, float, str, unicode, list, tuple, dict
+)
+bad_keys = ("__builtins__",)
+def jsonable(v):
+    if not isinstance(v, ok_types):
+        return False
+    try:
+        json.dumps(v)
+    except Exception:
+        return False
+    return True
+
+jobs = json.load(sys.stdin)
+%s
+modules = dict(sys.modules)
+for code, g_dict in jobs:
+    try:
+        exec code in g_dict
+    except BaseException:
+        result = [traceback.format_exc(), None]
+    else:
+        result = [None, dict(
+            (k, v) for k, v in g_dict.iteritems() if jsonable(v) and k not in bad_keys
+        )]
+    # Forget the modules the job imported, so that the next job imports them
+    # again after seeding random, as it would in a process of its own.
+    for name in sys.modules.keys():
+        if name not in modules:
+            del sys.modules[name]
+    for name, module in modules.items():
+        if sys.modules.get(name) is not module:
+            sys.modules[name] = module
+    sys.__stdout__.write(json.dumps(result) + "\\n")
+    sys.__stdout__.flush()
+"""
+
+# Number of jobs safe_exec_batch runs in one sandboxed process.
+BATCH_SIZE = 100
+
 
 def update_hash(hasher, obj):
     """
@@ -73,6 +139,44 @@ def update_hash(hasher, obj):
         hasher.update(repr(obj))
 
 
+def _cache_key(code, globals_dict, random_seed):
+    """
+    Return the key of the cached result of running `code` with `globals_dict` and `random_seed`.
+    """
+    md5er = hashlib.md5()
+    md5er.update(repr(code))
+    update_hash(md5er, json_safe(globals_dict))
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+def _cache_get(cache, key, slug):
+    """
+    Return the result cached for `key`, counting the lookup for `slug` if `cache` keeps stats.
+    """
+    cached = cache.get(key)
+    if isinstance(cache, SafeExecCache):
+        cache.stats.record_lookup(slug, cached is not None)
+    return cached
+
+
+def _cache_set(cache, key, value, slug):
+    """
+    Cache the result `value` for `key`, run for `slug`.
+    """
+    if isinstance(cache, SafeExecCache):
+        cache.set(key, value, slug=slug)
+    else:
+        cache.set(key, value)
+
+
+def _record_execution(cache, slug, start, count=1):
+    """
+    Count `count` runs in the sandbox for `slug` since `start`, if `cache` keeps stats.
+    """
+    if isinstance(cache, SafeExecCache):
+        cache.stats.record_execution(slug, time.time() - start, count)
+
+
 def safe_exec(
     code,
     globals_dict,
@@ -101,7 +205,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    and the random seed.  If it is a `SafeExecCache`, the lookup and the time spent
+    running the code are counted in its stats, under `slug`.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -111,12 +216,8 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        key = _cache_key(code, globals_dict, random_seed)
+        cached = _cache_get(cache, key, slug)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -136,6 +237,7 @@ def safe_exec(
         exec_fn = codejail_safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
+    start = time.time()
     try:
         exec_fn(
             code_prolog + LAZY_IMPORTS + code, globals_dict,
@@ -145,13 +247,144 @@ def safe_exec(
         emsg = text_type(e)
     else:
         emsg = None
+    _record_execution(cache, slug, start)
 
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
     if cache:
         cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
+        _cache_set(cache, key, (emsg, cleaned_results), slug)
 
     # If an exception happened, raise it now.
     if emsg:
         raise e
+
+
+def safe_exec_batch(
+    code,
+    globals_dicts,
+    random_seeds,
+    python_path=None,
+    extra_files=None,
+    cache=None,
+    slug=None,
+    unsafely=False,
+):
+    """
+    Execute the same python code safely for each of a list of globals dicts.
+
+    This is the same as calling `safe_exec` with each of `globals_dicts` and the
+    matching seed from `random_seeds`, and the same other arguments, except that
+    the runs which aren't cached are done up to `BATCH_SIZE` at a time in one
+    sandboxed process, rather than one process each. Results are cached under the
+    same keys as `safe_exec` uses.
+
+    Each globals dict is updated with the changes the code made to it. Returns
+    a list with, for each globals dict, the SafeExecException its run raised,
+    or None.
+    """
+    errors = [None] * len(globals_dicts)
+    if unsafely or not jail_code.is_configured("python"):
+        # There's no process to share, so run them one at a time.
+        for index, (globals_dict, random_seed) in enumerate(zip(globals_dicts, random_seeds)):
+            try:
+                safe_exec(
+                    code, globals_dict, random_seed=random_seed, python_path=python_path,
+                    extra_files=extra_files, cache=cache, slug=slug, unsafely=unsafely,
+                )
+            except SafeExecException as err:
+                errors[index] = err
+        return errors
+
+    keys = [None] * len(globals_dicts)
+    pending = []
+    for index, (globals_dict, random_seed) in enumerate(zip(globals_dicts, random_seeds)):
+        if cache:
+            keys[index] = _cache_key(code, globals_dict, random_seed)
+            cached = _cache_get(cache, keys[index], slug)
+            if cached is not None:
+                emsg, cleaned_results = cached
+                globals_dict.update(cleaned_results)
+                if emsg:
+                    errors[index] = SafeExecException(emsg)
+                continue
+        pending.append(index)
+
+    while pending:
+        batch = pending[:BATCH_SIZE]
+        jobs = [
+            (CODE_PROLOG % random_seeds[index] + LAZY_IMPORTS + code, json_safe(globals_dicts[index]))
+            for index in batch
+        ]
+        start = time.time()
+        results = _run_jobs_in_jail(jobs, python_path, extra_files, slug)
+        if not results:
+            # The sandbox died before finishing the first job, e.g. because it hit a resource
+            # limit, so run that one on its own to get the error it would get on its own.
+            results = [_run_job_alone(code, globals_dicts[batch[0]], random_seeds[batch[0]], python_path,
+                                      extra_files, slug)]
+        _record_execution(cache, slug, start, len(results))
+
+        for index, (emsg, cleaned_results) in zip(batch, results):
+            globals_dict = globals_dicts[index]
+            if emsg:
+                errors[index] = SafeExecException(emsg)
+            else:
+                globals_dict.update(cleaned_results)
+            if cache:
+                _cache_set(cache, keys[index], (emsg, json_safe(globals_dict)), slug)
+        pending = pending[len(results):]
+
+    return errors
+
+
+def _run_jobs_in_jail(jobs, python_path, extra_files, slug):
+    """
+    Run the (code, globals) jobs in one sandboxed process with BATCH_RUNNER.
+
+    Returns a list of (exception message or None, cleaned globals) pairs, for the
+    jobs which ran before the process exited.
+    """
+    files = []
+    extra_names = set(name for name, __ in extra_files or ())
+    path_code = []
+    for pydir in python_path or ():
+        pybase = os.path.basename(pydir)
+        path_code.append("sys.path.append(%r)" % pybase)
+        if pybase not in extra_names:
+            files.append(pydir)
+
+    res = jail_code.jail_code(
+        "python", code=BATCH_RUNNER % "\n".join(path_code), stdin=json.dumps(jobs),
+        files=files, extra_files=extra_files, slug=slug,
+    )
+
+    results = []
+    for line in res.stdout.splitlines(True):
+        if not line.endswith("\n"):
+            # The process died while writing this line.
+            break
+        trace, cleaned_results = json.loads(line)
+        if trace is not None:
+            # Match the message of a sandbox which died of the exception.
+            trace = (
+                "Couldn't execute jailed code: stdout: {stdout!r}, "
+                "stderr: {stderr!r} with status code: {status}"
+            ).format(stdout=b"", stderr=trace.encode("utf-8"), status=1)
+        results.append((trace, cleaned_results))
+    return results
+
+
+def _run_job_alone(code, globals_dict, random_seed, python_path, extra_files, slug):
+    """
+    Run the code in its own sandbox, returning (exception message or None, cleaned globals).
+    """
+    globals_dict = dict(globals_dict)
+    try:
+        codejail_safe_exec(
+            CODE_PROLOG % random_seed + LAZY_IMPORTS + code, globals_dict,
+            python_path=python_path, extra_files=extra_files, slug=slug,
+        )
+    except SafeExecException as err:
+        return text_type(err), None
+    return None, json_safe(globals_dict)
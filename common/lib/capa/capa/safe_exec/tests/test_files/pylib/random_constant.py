@@ -0,0 +1,3 @@
+import random
+
+THE_RANDOM = random.randint(0, 999)
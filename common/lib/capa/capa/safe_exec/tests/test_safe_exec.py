@@ -10,9 +10,10 @@ import unittest
 import pytest
 from six import text_type
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import SafeExecCache, safe_exec, safe_exec_batch, update_hash
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
+from mock import Mock, patch
 
 
 class TestSafeExec(unittest.TestCase):
@@ -178,6 +179,158 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecBatch(unittest.TestCase):
+    """Test running the same code for several globals dicts with safe_exec_batch."""
+
+    code = "rnum = random.randint(0, 999)\nb = a * 2\n"
+
+    def test_same_as_safe_exec(self):
+        globals_dicts = [{'a': 1}, {'a': 2}, {'a': 3}]
+        errors = safe_exec_batch(self.code, globals_dicts, [17, 18, 19])
+        self.assertEqual(errors, [None, None, None])
+
+        for globals_dict, seed in zip(globals_dicts, [17, 18, 19]):
+            g = {'a': globals_dict['a']}
+            safe_exec(self.code, g, random_seed=seed)
+            self.assertEqual(globals_dict, g)
+
+    def test_python_lib_using_random(self):
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        code = "import random_constant\nr = random_constant.THE_RANDOM\n"
+        globals_dicts = [{}, {}, {}]
+        errors = safe_exec_batch(code, globals_dicts, [17, 18, 17], python_path=[pylib])
+        self.assertEqual(errors, [None, None, None])
+
+        # Each job imports the module afresh, after its own seed.
+        for globals_dict, seed in zip(globals_dicts, [17, 18, 17]):
+            g = {}
+            safe_exec(code, g, random_seed=seed, python_path=[pylib])
+            self.assertEqual(globals_dict, g)
+        self.assertNotEqual(globals_dicts[0]['r'], globals_dicts[1]['r'])
+
+    def test_errors(self):
+        globals_dicts = [{'a': 1}, {'a': 0}]
+        errors = safe_exec_batch("b = 1/a", globals_dicts, [1, 1])
+        self.assertIsNone(errors[0])
+        self.assertEqual(globals_dicts[0]['b'], 1)
+        self.assertIsInstance(errors[1], SafeExecException)
+        self.assertIn("ZeroDivisionError", text_type(errors[1]))
+        self.assertNotIn('b', globals_dicts[1])
+
+    def test_shares_safe_exec_cache(self):
+        cache = {}
+        safe_exec(self.code, {'a': 1}, random_seed=17, cache=DictCache(cache))
+        cache[cache.keys()[0]] = (None, {'a': 1, 'b': 'cached'})
+
+        globals_dicts = [{'a': 1}, {'a': 2}]
+        safe_exec_batch(self.code, globals_dicts, [17, 17], cache=DictCache(cache))
+        self.assertEqual(globals_dicts[0]['b'], 'cached')
+        self.assertEqual(globals_dicts[1]['b'], 4)
+        self.assertEqual(len(cache), 2)
+
+        # The result for the second dict is what safe_exec finds in the cache.
+        cache[[key for key, value in cache.items() if value[1]['a'] == 2][0]] = (None, {'a': 2, 'b': 'cached'})
+        g = {'a': 2}
+        safe_exec(self.code, g, random_seed=17, cache=DictCache(cache))
+        self.assertEqual(g['b'], 'cached')
+
+    @patch('capa.safe_exec.safe_exec.codejail_safe_exec')
+    @patch('capa.safe_exec.safe_exec.jail_code')
+    def test_sandbox_dies_mid_batch(self, mock_jail_code, mock_codejail_safe_exec):
+        mock_jail_code.is_configured.return_value = True
+        mock_jail_code.jail_code.side_effect = [
+            # Killed after one job, while writing the result of the second.
+            Mock(stdout='[null, {"a": 1, "b": 2}]\n[null, {"a"', stderr='', status=-9),
+            # Killed before the end of the first job.
+            Mock(stdout='', stderr='', status=-9),
+            Mock(stdout='[null, {"a": 3, "b": 6}]\n', stderr='', status=0),
+        ]
+        mock_codejail_safe_exec.side_effect = SafeExecException("Couldn't execute jailed code")
+
+        globals_dicts = [{'a': 1}, {'a': 2}, {'a': 3}]
+        errors = safe_exec_batch("b = a * 2", globals_dicts, [1, 1, 1])
+
+        self.assertEqual(mock_jail_code.jail_code.call_count, 3)
+        self.assertEqual(mock_codejail_safe_exec.call_count, 1)
+        self.assertEqual(globals_dicts, [{'a': 1, 'b': 2}, {'a': 2}, {'a': 3, 'b': 6}])
+        self.assertEqual([error is None for error in errors], [True, False, True])
+
+
+class TestSafeExecCacheStats(unittest.TestCase):
+    """Test SafeExecCache, and the stats safe_exec keeps in it."""
+
+    def test_hits_misses_and_executions(self):
+        cache = SafeExecCache(DictCache({}))
+        for __ in range(3):
+            g = {}
+            safe_exec("a = int(math.pi)", g, cache=cache, slug="problem_1")
+            self.assertEqual(g['a'], 3)
+        with self.assertRaises(SafeExecException):
+            safe_exec("1/0", {}, cache=cache, slug="problem_2")
+
+        stats = cache.stats.get("problem_1")
+        self.assertEqual((stats['hits'], stats['misses'], stats['executions']), (2, 1, 1))
+        self.assertGreater(stats['execution_seconds'], 0)
+        totals = cache.stats.totals()
+        self.assertEqual((totals['hits'], totals['misses'], totals['executions']), (2, 2, 2))
+        self.assertEqual(totals['hit_rate'], 0.5)
+        self.assertEqual(len(cache.stats.most_expensive(1)), 1)
+
+        # Errors are cached too.
+        with self.assertRaises(SafeExecException):
+            safe_exec("1/0", {}, cache=cache, slug="problem_2")
+        self.assertEqual(cache.stats.get("problem_2")['hits'], 1)
+
+    def test_batch_stats(self):
+        cache = SafeExecCache(DictCache({}))
+        safe_exec_batch("b = a * 2", [{'a': 1}, {'a': 2}], [1, 1], cache=cache, slug="problem_1")
+        safe_exec_batch("b = a * 2", [{'a': 1}, {'a': 3}], [1, 1], cache=cache, slug="problem_1")
+        stats = cache.stats.get("problem_1")
+        self.assertEqual((stats['hits'], stats['misses'], stats['executions']), (1, 3, 3))
+
+    def test_values_are_compressed(self):
+        backing = {}
+        cache = SafeExecCache(DictCache(backing))
+        cache.set("key", (None, {'a': "x" * 10000}))
+        self.assertLess(len(backing["key"]), 1000)
+        self.assertEqual(cache.get("key"), [None, {'a': "x" * 10000}])
+
+        # Values stored by something else count as misses.
+        backing["other"] = (None, {'a': 1})
+        self.assertIsNone(cache.get("other"))
+
+    def test_large_values_are_not_cached(self):
+        backing = {}
+        cache = SafeExecCache(DictCache(backing), max_value_bytes=100)
+        value = (None, {'a': text_type(random.Random(0).getrandbits(8000))})
+        cache.set("key", value, slug="problem_1")
+        self.assertEqual(backing, {})
+        self.assertEqual(cache.stats.get("problem_1")['uncacheable'], 1)
+
+    def test_local_lru_is_bounded_by_size(self):
+        backing = {}
+        cache = SafeExecCache(DictCache(backing), local_max_bytes=60)
+        for key in ("a", "b", "c"):
+            cache.set(key, (None, {key: 1}))
+        self.assertLessEqual(cache._local_size, 60)  # pylint: disable=protected-access
+        self.assertNotIn("a", cache._local)  # pylint: disable=protected-access
+        self.assertIn("c", cache._local)  # pylint: disable=protected-access
+
+        # Results evicted locally are still found in the backend.
+        self.assertEqual(cache.get("a"), [None, {'a': 1}])
+
+    def test_backend_function(self):
+        backends = [DictCache({}), DictCache({})]
+        current = []
+        cache = SafeExecCache(lambda: backends[current[0]])
+        current.append(0)
+        cache.set("a", (None, {'a': 1}))
+        current[0] = 1
+        self.assertIsNone(cache.get("a"))
+        current[0] = 0
+        self.assertEqual(cache.get("a"), [None, {'a': 1}])
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -4,10 +4,12 @@ Test capa problem.
 import ddt
 import textwrap
 from lxml import etree
-from mock import patch
+from mock import Mock, patch
+from StringIO import StringIO
 import unittest
 
-from capa.tests.helpers import new_loncapa_problem
+from capa.capa_problem import PROBLEM_TEMPLATE_CACHE, LoncapaProblem
+from capa.tests.helpers import new_loncapa_problem, test_capa_system
 from openedx.core.djangolib.markup import HTML
 
 
@@ -708,3 +710,96 @@ class CAPAProblemReportHelpersTest(unittest.TestCase):
             """
         )
         self.assertEquals(problem.find_answer_text('1_2_1', 'hide'), 'hide')
+
+
+class ProblemTemplateCacheTest(unittest.TestCase):
+    """ Tests that learners share the seed-independent work on a problem's XML """
+
+    xml = """
+    <problem>
+        <multiplechoiceresponse>
+            <label>Which is a fruit?</label>
+            <choicegroup type="MultipleChoice" shuffle="true">
+                <choice correct="false">Carrot</choice>
+                <choice correct="true">Apple</choice>
+                <choice correct="false">Leek</choice>
+                <choice correct="false">Potato</choice>
+            </choicegroup>
+        </multiplechoiceresponse>
+    </problem>
+    """
+
+    def setUp(self):
+        super(ProblemTemplateCacheTest, self).setUp()
+        PROBLEM_TEMPLATE_CACHE.clear()
+        self.addCleanup(PROBLEM_TEMPLATE_CACHE.clear)
+
+    def test_template_shared_between_seeds(self):
+        uncached = new_loncapa_problem(self.xml, seed=1)
+        with patch.object(LoncapaProblem, 'make_xml_compatible') as mock_make_xml_compatible:
+            cached = new_loncapa_problem(self.xml, seed=1)
+            other_seed = new_loncapa_problem(self.xml, seed=2)
+        self.assertEqual(mock_make_xml_compatible.call_count, 0)
+
+        self.assertEqual(cached.problem_data, uncached.problem_data)
+        self.assertEqual(etree.tostring(cached.tree), etree.tostring(uncached.tree))
+        self.assertEqual(len(cached.tree.xpath('//label')), 0)
+        # Every problem gets its own copy of the tree to transform.
+        self.assertIsNot(cached.tree, other_seed.tree)
+        self.assertEqual(other_seed.seed, 2)
+
+    def test_template_keyed_on_problem_id(self):
+        new_loncapa_problem(self.xml, problem_id='1')
+        problem = new_loncapa_problem(self.xml, problem_id='2')
+        self.assertEqual(problem.tree.xpath('//choicegroup')[0].get('id'), '2_2_1')
+        self.assertIn('2_2_1', problem.problem_data)
+
+    def test_includes_not_cached(self):
+        xml = '<problem><include file="included.xml"/></problem>'
+        capa_system = test_capa_system()
+        capa_system.filestore = Mock()
+        capa_system.filestore.open.side_effect = lambda filename: StringIO(textwrap.dedent(self.xml).strip())
+        for __ in range(2):
+            problem = new_loncapa_problem(xml, capa_system=capa_system)
+            self.assertIn('1_2_1', problem.problem_data)
+        # The included file is read each time.
+        self.assertEqual(capa_system.filestore.open.call_count, 2)
+
+
+class PrimeScriptCacheTest(unittest.TestCase):
+    """ Tests that problem scripts can be run ahead of time for several learners """
+
+    xml = """
+    <problem>
+        <script type="loncapa/python">
+x = random.randint(0, 1000)
+who = anonymous_student_id
+        </script>
+        <customresponse cfn="check" expect="$x">
+            <textline/>
+        </customresponse>
+        <script type="loncapa/python">
+def check(expect, ans):
+    return expect == ans
+        </script>
+    </problem>
+    """
+
+    def test_prime_script_cache(self):
+        cache = {}
+        capa_system = test_capa_system()
+        capa_system.cache = Mock()
+        capa_system.cache.get.side_effect = cache.get
+        capa_system.cache.set.side_effect = cache.__setitem__
+
+        problem = new_loncapa_problem(self.xml, capa_system=capa_system, seed=1)
+        self.assertEqual(len(cache), 1)
+        problem.prime_script_cache([(2, 'student'), (3, 'other student')])
+        self.assertEqual(len(cache), 3)
+
+        set_count = capa_system.cache.set.call_count
+        primed = new_loncapa_problem(self.xml, capa_system=capa_system, seed=2)
+        # The script's results for the learner came from the cache.
+        self.assertEqual(capa_system.cache.set.call_count, set_count)
+        self.assertEqual(primed.context['who'], 'student')
+        self.assertIn('x', primed.context)
@@ -373,6 +373,14 @@ class ContentStore(object):
         '''
         raise NotImplementedError
 
+    def export_all_for_course_to_fs(self, course_key, output_fs, output_directory, assets_policy_file):
+        """
+        Export all of this course's assets to `output_directory`, and all of the assets'
+        attributes to the policy file `assets_policy_file`, both paths within the
+        pyfilesystem `output_fs`.
+        """
+        raise NotImplementedError
+
     def delete_all_course_assets(self, course_key):
         """
         Delete all of the assets which use this course_key as an identifier
@@ -152,24 +152,6 @@ class MongoContentStore(ContentStore):
             else:
                 return None
 
-    def export(self, location, output_directory):
-        content = self.find(location)
-
-        filename = content.name
-        if content.import_path is not None:
-            output_directory = output_directory + '/' + os.path.dirname(content.import_path)
-
-        if not os.path.exists(output_directory):
-            os.makedirs(output_directory)
-
-        # Escape invalid char from filename.
-        export_name = escape_invalid_characters(name=filename, invalid_char_list=['/', '\\'])
-
-        disk_fs = OSFS(output_directory)
-
-        with disk_fs.open(export_name, 'wb') as asset_file:
-            asset_file.write(content.data)
-
     def export_all_for_course(self, course_key, output_directory, assets_policy_file):
         """
         Export all of this course's assets to the output_directory. Export all of the assets'
@@ -181,6 +163,46 @@ class MongoContentStore(ContentStore):
             assets_policy_file: the filename for the policy file which should be in the same
                 directory as the other policy files.
         """
+        self.export_all_for_course_to_fs(
+            course_key, OSFS(u'/'), os.path.abspath(output_directory), os.path.abspath(assets_policy_file)
+        )
+
+    def export_to_fs(self, location, output_fs, output_directory):
+        """
+        Stream the asset at `location` into `output_directory` of the filesystem
+        `output_fs`, without reading the whole asset into memory.
+        """
+        content_id, __ = self.asset_db_key(location)
+        # Only opening the asset is retried: once some of it has been written,
+        # output_fs may not be able to take it again (e.g. a TarStreamFS).
+        with self._open_gridfs_file(content_id) as fp:
+            import_path = getattr(fp, 'import_path', None)
+            if import_path is not None:
+                output_directory = output_directory + '/' + os.path.dirname(import_path)
+            output_fs.makedirs(output_directory, recreate=True)
+
+            # Escape invalid char from filename.
+            export_name = escape_invalid_characters(name=fp.displayname, invalid_char_list=['/', '\\'])
+            output_fs.upload(output_directory + '/' + export_name, fp)
+
+    @autoretry_read()
+    def _open_gridfs_file(self, content_id):
+        """
+        Open the GridFS file `content_id` for reading.
+        """
+        try:
+            return self.fs.get(content_id)
+        except NoFile:
+            raise NotFoundError(content_id)
+
+    def export_all_for_course_to_fs(self, course_key, output_fs, output_directory, assets_policy_file):
+        """
+        Export all of this course's assets to `output_directory` and the assets'
+        attributes to `assets_policy_file`, both paths within the filesystem `output_fs`.
+
+        Assets are streamed from GridFS to the filesystem in chunks, so this is
+        suitable for writing to archives.
+        """
         policy = {}
         assets, __ = self.get_all_content_for_course(course_key)
 
@@ -193,13 +215,14 @@ class MongoContentStore(ContentStore):
             #
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
-            self.export(asset['asset_key'], output_directory)
+            self.export_to_fs(asset['asset_key'], output_fs, output_directory)
             for attr, value in asset.iteritems():
                 if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
                     policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
 
-        with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f, sort_keys=True, indent=4)
+        output_fs.makedirs(os.path.dirname(assets_policy_file), recreate=True)
+        with output_fs.open(assets_policy_file, 'wb') as f:
+            f.write(json.dumps(policy, sort_keys=True, indent=4))
 
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
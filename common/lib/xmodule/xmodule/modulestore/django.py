@@ -236,8 +236,9 @@ def create_modulestore_instance(
     """
     This will return a new instance of a modulestore given an engine and options
     """
-    # Import is placed here to avoid model import at project startup.
+    # Imports are placed here to avoid model import at project startup.
     import xblock.reference.plugins
+    from xmodule.modulestore.mongo import MongoModuleStore
 
     class_ = load_function(engine)
 
@@ -259,6 +260,14 @@ def create_modulestore_instance(
     if issubclass(class_, MixedModuleStore):
         _options['create_modulestore_instance'] = create_modulestore_instance
 
+    if issubclass(class_, MongoModuleStore):
+        # Sharing published block documents between requests is opt-in, by
+        # configuring this cache.
+        try:
+            _options['published_block_cache'] = caches['mongo_published_block_cache']
+        except InvalidCacheBackendError:
+            pass
+
     if issubclass(class_, BranchSettingMixin):
         _options['branch_setting_func'] = _get_modulestore_branch_setting
 
@@ -494,6 +494,7 @@ class MongoBulkOpsMixin(BulkOperationsMixin):
         dirty = False
         if bulk_ops_record.dirty:
             self.refresh_cached_metadata_inheritance_tree(structure_key)
+            self._invalidate_published_block_cache(structure_key)
             dirty = True
             bulk_ops_record.dirty = False  # brand spanking clean now
         return dirty
@@ -528,6 +529,67 @@ class ParentLocationCache(dict):
             del self[key]
 
 
+class PublishedBlockCache(object):
+    """
+    Wrapper around a django cache object that shares the documents of
+    published blocks between requests and processes.
+
+    Each course has a revision, made from the edit_info timestamp of its
+    latest write, and its documents are cached under that revision. Writing
+    to a course gives it a new revision, so the documents cached under the
+    old one are never read again and simply expire.
+    """
+    REVISION_KEY_PREFIX = 'published_block_revision'
+    DOCUMENT_KEY_PREFIX = 'published_block'
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def _revision_key(self, course_key):
+        """
+        Return the cache key of the current revision of `course_key`.
+        """
+        # Document ids don't include the run, so neither does the revision key.
+        return u'{}.{}/{}'.format(self.REVISION_KEY_PREFIX, course_key.org, course_key.course)
+
+    def get_revision(self, course_key):
+        """
+        Return the current revision of `course_key`, starting a new one if none is cached.
+        """
+        revision = self.cache.get(self._revision_key(course_key))
+        if revision is None:
+            revision = self.invalidate(course_key)
+        return revision
+
+    def invalidate(self, course_key, edited_on=None):
+        """
+        Start a new revision of `course_key`, as of the edit_info timestamp
+        `edited_on`, and return it.
+        """
+        # The nonce keeps writes that share a timestamp from sharing a revision.
+        revision = u'{}.{}'.format((edited_on or datetime.now(UTC)).isoformat(), uuid4().hex)
+        self.cache.set(self._revision_key(course_key), revision, None)
+        return revision
+
+    def make_key(self, revision, son):
+        """
+        Return the cache key of the document with the id `son` in the given course revision.
+        """
+        return u'{}.{}.{tag}://{org}/{course}/{category}/{name}'.format(self.DOCUMENT_KEY_PREFIX, revision, **son)
+
+    def get_many(self, keys):
+        """
+        Return a map of key to document for the keys found in cache.
+        """
+        return self.cache.get_many(keys)
+
+    def set_many(self, documents):
+        """
+        Write the given map of key to document to cache.
+        """
+        self.cache.set_many(documents)
+
+
 class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, MongoBulkOpsMixin):
     """
     A Mongodb backed ModuleStore
@@ -547,9 +609,12 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                  user_service=None,
                  signal_handler=None,
                  retry_wait_time=0.1,
+                 published_block_cache=None,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param published_block_cache: an optional django cache in which to share the documents of
+            published blocks between requests. See :class:`PublishedBlockCache`.
         """
 
         super(MongoModuleStore, self).__init__(contentstore=contentstore, **kwargs)
@@ -594,6 +659,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
 
         self._course_run_cache = {}
         self.signal_handler = signal_handler
+        self.published_block_cache = None
+        if published_block_cache is not None:
+            self.published_block_cache = PublishedBlockCache(published_block_cache)
 
     def close_connections(self):
         """
@@ -821,6 +889,27 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
+    def _get_published_block_revision(self, course_key):
+        """
+        Return the revision of `course_key` under which to read and write its
+        cached published block documents, or None if the cache mustn't be used.
+        """
+        if self.published_block_cache is None:
+            return None
+        # Writes made during a bulk operation only invalidate the cache when
+        # the operation ends, so don't use it until then.
+        if self._is_in_bulk_operation(course_key) and self._get_bulk_ops_record(course_key).dirty:
+            return None
+        return self.published_block_cache.get_revision(course_key)
+
+    def _invalidate_published_block_cache(self, course_key, edited_on=None):
+        """
+        Make the cached published block documents of `course_key` unreachable
+        after a write to the course, unless a bulk operation will do it when it ends.
+        """
+        if self.published_block_cache is not None and not self._is_in_bulk_operation(course_key):
+            self.published_block_cache.invalidate(course_key, edited_on)
+
     def _clean_item_data(self, item):
         """
         Renames the '_id' field in item to 'location'
@@ -834,12 +923,22 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         Generate a pymongo in query for finding the items and return the payloads
         """
         # first get non-draft in a round-trip
-        query = {
-            '_id': {'$in': [
-                UsageKey.from_string(item).map_into_course(course_key).to_deprecated_son() for item in items
-            ]}
-        }
-        return list(self.collection.find(query))
+        sons = [UsageKey.from_string(item).map_into_course(course_key).to_deprecated_son() for item in items]
+        revision = self._get_published_block_revision(course_key)
+        if revision is None:
+            return list(self.collection.find({'_id': {'$in': sons}}))
+
+        keys = [self.published_block_cache.make_key(revision, son) for son in sons]
+        cached = self.published_block_cache.get_many(keys)
+        missing = [son for key, son in zip(keys, sons) if key not in cached]
+        found = cached.values()
+        if missing:
+            fetched = list(self.collection.find({'_id': {'$in': missing}}))
+            self.published_block_cache.set_many({
+                self.published_block_cache.make_key(revision, item['_id']): item for item in fetched
+            })
+            found.extend(fetched)
+        return found
 
     def _cache_children(self, course_key, items, depth=0):
         """
@@ -1083,11 +1182,21 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         ItemNotFoundError.
         '''
         assert isinstance(location, UsageKey)
-        item = self.collection.find_one(
-            {'_id': location.to_deprecated_son()}
-        )
+        son = location.to_deprecated_son()
+        revision = None
+        if son['revision'] == MongoRevisionKey.published:
+            revision = self._get_published_block_revision(location.course_key)
+        if revision is not None:
+            key = self.published_block_cache.make_key(revision, son)
+            item = self.published_block_cache.get_many([key]).get(key)
+            if item is not None:
+                return item
+
+        item = self.collection.find_one({'_id': son})
         if item is None:
             raise ItemNotFoundError(location)
+        if revision is not None:
+            self.published_block_cache.set_many({key: item})
         return item
 
     def make_course_key(self, org, course, run):
@@ -1493,6 +1602,8 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         )
         if result['n'] == 0:
             raise ItemNotFoundError(location)
+        edited_on = update.get('edit_info', {}).get('edited_on') or update.get('edit_info.subtree_edited_on')
+        self._invalidate_published_block_cache(location.course_key, edited_on)
 
     def _update_ancestors(self, location, update):
         """
@@ -1627,6 +1738,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                         multi=False,
                         upsert=True,
                     )
+                    self._invalidate_published_block_cache(location.course_key)
                 elif ancestor_loc.block_type == 'course':
                     # once we reach the top location of the tree and if the location is not an orphan then the
                     # parent is not an orphan either
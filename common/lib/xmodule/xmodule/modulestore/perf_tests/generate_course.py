@@ -0,0 +1,106 @@
+"""
+Generates synthetic courses of a configurable size, shape and block mix
+for the modulestore performance tests.
+"""
+import itertools
+import random
+from collections import defaultdict, namedtuple
+
+
+# The number of children of each container block, by level of the course.
+CourseShape = namedtuple('CourseShape', ['chapters', 'sequentials', 'verticals', 'leaves'])
+
+# Shapes of courses to time, by name.
+COURSE_SHAPES = {
+    'small': CourseShape(chapters=4, sequentials=3, verticals=3, leaves=3),
+    'wide': CourseShape(chapters=20, sequentials=8, verticals=2, leaves=3),
+    'deep_verticals': CourseShape(chapters=5, sequentials=4, verticals=2, leaves=30),
+    'large': CourseShape(chapters=20, sequentials=6, verticals=5, leaves=8),
+}
+
+# Relative weights of the leaf block types in a course.
+DEFAULT_BLOCK_MIX = (
+    ('html', 50),
+    ('problem', 30),
+    ('video', 15),
+    ('discussion', 5),
+)
+
+# Fields given to each leaf block, by block type.
+LEAF_FIELDS = {
+    'html': lambda index: {'data': u'<p>Synthetic html block {}</p>'.format(index) * 20},
+    'problem': lambda index: {
+        'data': u'<problem><p>Synthetic problem {}</p><stringresponse answer="{}">'
+                u'<textline/></stringresponse></problem>'.format(index, index),
+        'weight': 1,
+    },
+    'video': lambda index: {'youtube_id_1_0': u'3_yD_cEKoCk', 'html5_sources': []},
+    'discussion': lambda index: {'discussion_category': u'Week {}'.format(index % 10)},
+}
+
+
+def count_blocks(shape):
+    """
+    Return the number of blocks, course root included, of a course of the given shape.
+    """
+    sequentials = shape.chapters * shape.sequentials
+    verticals = sequentials * shape.verticals
+    return 1 + shape.chapters + sequentials + verticals + verticals * shape.leaves
+
+
+def leaf_types(count, block_mix=DEFAULT_BLOCK_MIX, seed=0):
+    """
+    Return a reproducible list of `count` leaf block types, drawn from
+    `block_mix` according to the weights.
+    """
+    rand = random.Random(seed)
+    population = [block_type for block_type, weight in block_mix for __ in xrange(weight)]
+    return [rand.choice(population) for __ in xrange(count)]
+
+
+def generate_course(store, user_id, course_key, shape, block_mix=DEFAULT_BLOCK_MIX, seed=0):
+    """
+    Create a course of the given shape in `store`, filling its verticals
+    with leaf blocks drawn from `block_mix`.
+
+    Returns a map of block type to the usage keys of the blocks created.
+    """
+    types = iter(leaf_types(count_blocks(shape), block_mix, seed))
+    indexes = itertools.count()
+    blocks = defaultdict(list)
+
+    with store.bulk_operations(course_key):
+        course = store.create_course(
+            course_key.org, course_key.course, course_key.run, user_id,
+            fields={'display_name': u'Synthetic course {}'.format(course_key.run)},
+        )
+        blocks['course'].append(course.location)
+
+        def create_children(parent_location, block_type, count, fields_factory):
+            """
+            Create `count` children of type `block_type` under `parent_location`.
+            """
+            children = []
+            for __ in xrange(count):
+                index = next(indexes)
+                child_type = block_type or next(types)
+                fields = {'display_name': u'{} {}'.format(child_type, index)}
+                fields.update(fields_factory(child_type, index))
+                child = store.create_child(
+                    user_id, parent_location, child_type,
+                    block_id=u'{}_{}'.format(child_type, index), fields=fields,
+                )
+                blocks[child_type].append(child.location)
+                children.append(child.location)
+            return children
+
+        no_fields = lambda block_type, index: {}
+        for chapter in create_children(course.location, 'chapter', shape.chapters, no_fields):
+            for sequential in create_children(chapter, 'sequential', shape.sequentials, no_fields):
+                for vertical in create_children(sequential, 'vertical', shape.verticals, no_fields):
+                    create_children(
+                        vertical, None, shape.leaves,
+                        lambda block_type, index: LEAF_FIELDS[block_type](index),
+                    )
+
+    return dict(blocks)
@@ -0,0 +1,92 @@
+"""
+Performance tests for reading course-shaped content from the modulestore.
+"""
+import itertools
+import random
+import unittest
+
+import ddt
+import pytest
+
+from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.perf_tests.generate_course import COURSE_SHAPES, count_blocks, generate_course
+from xmodule.modulestore.tests.utils import (
+    MIXED_MODULESTORE_SETUPS,
+    SHORT_NAME_MAP,
+)
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+# Number of leaf blocks fetched one at a time per test run.
+LEAF_SAMPLE_SIZE = 50
+
+# Leaf block types queried with get_items.
+ITEM_CATEGORIES = ('problem', 'html', 'vertical')
+
+USER_ID = ModuleStoreEnum.UserID.test
+
+
+@ddt.ddt
+@unittest.skip
+class ModulestoreReadTimings(unittest.TestCase):
+    """
+    This class exists to time the modulestore operations that are run at
+    scale against synthetic courses of different sizes and shapes, in the
+    split and old mongo modulestores.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*itertools.product(
+        MIXED_MODULESTORE_SETUPS,
+        sorted(COURSE_SHAPES),
+    ))
+    @ddt.unpack
+    def test_generate_read_timings(self, store_builder, shape_name):
+        """
+        Generate timings for reading a course of the given shape from the given modulestore.
+        """
+        if CodeBlockTimer is None:
+            pytest.skip("CodeBlockTimer undefined.")
+
+        shape = COURSE_SHAPES[shape_name]
+        desc = "ModulestoreReads:{}:{}:{}".format(SHORT_NAME_MAP[store_builder], shape_name, count_blocks(shape))
+
+        with CodeBlockTimer(desc):
+            with store_builder.build() as (__, store):
+                course_key = store.make_course_key('perf', 'course', shape_name)
+
+                with CodeBlockTimer("generate_course"):
+                    blocks = generate_course(store, USER_ID, course_key, shape)
+
+                with CodeBlockTimer("publish"):
+                    store.publish(blocks['course'][0], USER_ID)
+
+                with store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+                    with CodeBlockTimer("get_course:depth=None"):
+                        store.get_course(course_key, depth=None)
+
+                    for category in ITEM_CATEGORIES:
+                        with CodeBlockTimer("get_items:{}".format(category)):
+                            store.get_items(course_key, qualifiers={'category': category})
+
+                    leaves = [
+                        location
+                        for block_type, locations in sorted(blocks.iteritems())
+                        if block_type not in ('course', 'chapter', 'sequential', 'vertical')
+                        for location in locations
+                    ]
+                    sample = random.Random(0).sample(leaves, min(LEAF_SAMPLE_SIZE, len(leaves)))
+                    with CodeBlockTimer("get_item:leaves"):
+                        for location in sample:
+                            store.get_item(location)
+
+                    with CodeBlockTimer("block_structure:create_from_modulestore"):
+                        BlockStructureFactory.create_from_modulestore(blocks['course'][0], store)
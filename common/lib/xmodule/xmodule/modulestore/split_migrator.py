@@ -4,17 +4,25 @@ Code for migrating from other modulestores to the split_mongo modulestore.
 Exists at the top level of modulestore b/c it needs to know about and access each modulestore.
 
 In general, it's strategy is to treat the other modulestores as read-only and to never directly
-manipulate storage but use existing api's.
+manipulate storage but use existing api's. The exception is the bulk migration path, which builds the
+new course's split structures in memory rather than adding its blocks one at a time.
 '''
+import copy
+import datetime
 import logging
 
-from xblock.fields import Reference, ReferenceList, ReferenceValueDict
+from bson.objectid import ObjectId
+from pytz import UTC
+from xblock.fields import Reference, ReferenceList, ReferenceValueDict, Scope
 from xmodule.modulestore import ModuleStoreEnum
 from opaque_keys.edx.locator import CourseLocator
-from xmodule.modulestore.exceptions import ItemNotFoundError
+from xmodule.modulestore.exceptions import DuplicateCourseError, ItemNotFoundError
+from xmodule.modulestore.split_mongo import BlockKey
 
 log = logging.getLogger(__name__)
 
+# pylint: disable=protected-access
+
 
 class SplitMigrator(object):
     """
@@ -27,7 +35,8 @@ class SplitMigrator(object):
         self.source_modulestore = source_modulestore
 
     def migrate_mongo_course(
-            self, source_course_key, user_id, new_org=None, new_course=None, new_run=None, fields=None, **kwargs
+            self, source_course_key, user_id, new_org=None, new_course=None, new_run=None, fields=None, bulk=False,
+            **kwargs
     ):
         """
         Create a new course in split_mongo representing the published and draft versions of the course from the
@@ -39,6 +48,9 @@ class SplitMigrator(object):
         :param user_id: the user whose action is causing this migration
         :param new_org, new_course, new_run: (optional) identifiers for the new course. Defaults to
             the source_course_key's values.
+        :param bulk: if True, build the new course's published and draft structures in memory and
+            write each of them once, rather than adding the blocks one at a time. See
+            _migrate_mongo_course_in_bulk.
         """
         # the only difference in data between the old and split_mongo xblocks are the locations;
         # so, any field which holds a location must change to a Locator; otherwise, the persistence
@@ -58,6 +70,11 @@ class SplitMigrator(object):
             new_run = source_course_key.run
 
         new_course_key = CourseLocator(new_org, new_course, new_run, branch=ModuleStoreEnum.BranchName.published)
+        if bulk:
+            return self._migrate_mongo_course_in_bulk(
+                original_course, source_course_key, new_course_key, user_id, fields, **kwargs
+            )
+
         with self.split_modulestore.bulk_operations(new_course_key):
             new_fields = self._get_fields_translate_references(original_course, new_course_key, None)
             if fields:
@@ -83,6 +100,166 @@ class SplitMigrator(object):
 
         return new_course.id
 
+    def _migrate_mongo_course_in_bulk(
+            self, original_course, source_course_key, new_course_key, user_id, fields=None, **kwargs
+    ):
+        """
+        Create the new course in split_mongo by building its published and draft structures in
+        memory, then writing each structure, their definitions and the course's index entry
+        in a single bulk operation. Returns the new CourseLocator.
+        """
+        split_store = self.split_modulestore
+        index_entry = split_store.get_course_index(new_course_key, ignore_case=True)
+        if index_entry is not None:
+            raise DuplicateCourseError(new_course_key, index_entry)
+
+        root_key = BlockKey('course', split_store.DEFAULT_ROOT_COURSE_BLOCK_ID)
+        with split_store.bulk_operations(new_course_key):
+            published_structure = split_store._new_structure(user_id, None)
+            published_structure['root'] = root_key
+
+            root_fields = self._get_fields_translate_references(original_course, new_course_key, root_key.id)
+            if fields:
+                root_fields.update(fields)
+            self._add_block_to_structure(published_structure, root_key, root_fields, new_course_key, user_id)
+
+            # iterate over published course elements. Wildcarding rather than descending b/c some elements are
+            # orphaned (e.g., course about pages, conditionals)
+            for module in self.source_modulestore.get_items(
+                source_course_key, revision=ModuleStoreEnum.RevisionOption.published_only, **kwargs
+            ):
+                if module.location != original_course.location:
+                    self._add_block_to_structure(
+                        published_structure,
+                        BlockKey.from_usage_key(module.location),
+                        self._get_fields_translate_references(module, new_course_key, root_key.id),
+                        new_course_key,
+                        user_id,
+                    )
+
+            # clean up orphans in published version: in old mongo, parents pointed to the union of their published
+            # and draft children which meant some pointers were to non-existent locations in 'direct'
+            for block in published_structure['blocks'].itervalues():
+                if 'children' in block.fields:
+                    block.fields['children'] = [
+                        child for child in block.fields['children'] if child in published_structure['blocks']
+                    ]
+            split_store.update_structure(new_course_key, published_structure)
+
+            draft_structure = self._build_draft_structure(
+                published_structure, source_course_key, new_course_key, root_key, user_id, **kwargs
+            )
+            split_store.update_structure(new_course_key, draft_structure)
+
+            index_entry = {
+                '_id': ObjectId(),
+                'org': new_course_key.org,
+                'course': new_course_key.course,
+                'run': new_course_key.run,
+                'edited_by': user_id,
+                'edited_on': datetime.datetime.now(UTC),
+                'versions': {
+                    ModuleStoreEnum.BranchName.published: published_structure['_id'],
+                    ModuleStoreEnum.BranchName.draft: draft_structure['_id'],
+                },
+                'schema_version': split_store.SCHEMA_VERSION,
+                'search_targets': {},
+            }
+            split_store._update_search_targets(index_entry, root_fields)
+            split_store.insert_course_index(new_course_key, index_entry)
+
+        return new_course_key
+
+    def _build_draft_structure(self, published_structure, source_course_key, new_course_key, root_key, user_id,
+                               **kwargs):
+        """
+        Return the draft structure of the new course: the published structure with the source course's drafts
+        applied to it, or the published structure itself if the source course has no drafts.
+        """
+        draft_modules = self.source_modulestore.get_items(
+            source_course_key, revision=ModuleStoreEnum.RevisionOption.draft_only, **kwargs
+        )
+        if not draft_modules:
+            return published_structure
+
+        draft_course_key = new_course_key.for_branch(ModuleStoreEnum.BranchName.draft)
+        draft_structure = copy.deepcopy(published_structure)
+        draft_structure['_id'] = ObjectId()
+        draft_structure['previous_version'] = published_structure['_id']
+
+        # drafts which don't exist in published are attached to their parents once all the drafts are in place,
+        # so that children are never attached before their parents
+        awaiting_adoption = {}
+        for module in draft_modules:
+            block_key = BlockKey.from_usage_key(module.location)
+            published_block = draft_structure['blocks'].get(block_key)
+            block = self._add_block_to_structure(
+                draft_structure,
+                block_key,
+                self._get_fields_translate_references(module, draft_course_key, root_key.id),
+                draft_course_key,
+                user_id,
+            )
+            if published_block is not None:
+                # was in 'direct' so draft is a new version
+                block.edit_info.previous_version = published_block.edit_info.update_version
+            else:
+                awaiting_adoption[module.location] = block_key
+
+        for draft_location, block_key in awaiting_adoption.iteritems():
+            parent_loc = self.source_modulestore.get_parent_location(
+                draft_location, revision=ModuleStoreEnum.RevisionOption.draft_preferred, **kwargs
+            )
+            if parent_loc is None:
+                log.warn(u'No parent found in source course for %s', draft_location)
+                continue
+            parent_key = BlockKey(
+                parent_loc.block_type,
+                parent_loc.block_id if parent_loc.block_type != 'course' else root_key.id
+            )
+            new_parent = draft_structure['blocks'].get(parent_key)
+            if new_parent is None:
+                log.warn(u'Parent %s of %s was not migrated', parent_loc, draft_location)
+                continue
+            children = new_parent.fields.setdefault('children', [])
+            # the parent's draft may already list this child
+            if any(child.id == block_key.id for child in children):
+                continue
+            # find index for module: new_parent may be missing quite a few of old_parent's children
+            old_parent = self.source_modulestore.get_item(parent_loc, **kwargs)
+            new_parent_cursor = 0
+            for old_child_loc in old_parent.children:
+                if old_child_loc.block_id == draft_location.block_id:
+                    break  # moved cursor enough, insert it here
+                # sibling may move cursor
+                for idx in range(new_parent_cursor, len(children)):
+                    if children[idx].id == old_child_loc.block_id:
+                        new_parent_cursor = idx + 1
+                        break  # skipped sibs enough, pick back up scan
+            children.insert(new_parent_cursor, block_key)
+            self.split_modulestore.version_block(new_parent, user_id, draft_structure['_id'])
+
+        return draft_structure
+
+    def _add_block_to_structure(self, structure, block_key, fields, course_key, user_id):
+        """
+        Add a new block with the given fields, and a new definition holding its content fields,
+        to the in-memory structure, replacing any existing block with the same key. Returns the block.
+        """
+        split_store = self.split_modulestore
+        partitioned_fields = split_store.partition_fields_by_scope(block_key.type, fields)
+        definition_locator = split_store.create_definition_from_data(
+            course_key, partitioned_fields.get(Scope.content, {}), block_key.type, user_id
+        )
+        block_fields = partitioned_fields.get(Scope.settings, {})
+        if Scope.children in partitioned_fields:
+            block_fields.update(partitioned_fields[Scope.children])
+        block = split_store._new_block(
+            user_id, block_key.type, block_fields, definition_locator.definition_id, structure['_id']
+        )
+        split_store._update_block_in_structure(structure, block_key, block)
+        return block
+
     def _copy_published_modules_to_course(self, new_course, old_course_loc, source_course_key, user_id, **kwargs):
         """
         Copy all of the modules from the 'direct' version of the course to the new split course.
@@ -1,7 +1,117 @@
+from collections import OrderedDict
+import itertools
 from opaque_keys.edx.locator import DefinitionLocator
 import copy
 
 
+class DefinitionBatch(object):
+    """
+    Collects the definitions that DefinitionLazyLoaders of a runtime will
+    need, so that the first loader to be fetched loads the pending ones
+    together with a single get_definitions call rather than one query each.
+
+    The definitions loaded along with the fetched one are first those of
+    the blocks in the same group, typically its siblings, then the other
+    pending definitions in the order they were registered.
+
+    A loaded definition is only kept until all the loaders registered for it
+    have fetched it. No more than MAX_DEFINITIONS_HELD definitions are held:
+    the least recently used ones are dropped, and loaded again if fetched.
+    """
+    # The most definitions loaded by a single query
+    MAX_BATCH_SIZE = 100
+    # The most definitions held before being fetched
+    MAX_DEFINITIONS_HELD = 500
+
+    def __init__(self, modulestore):
+        self.modulestore = modulestore
+        # course_key -> ordered map of the definition ids not loaded yet to their group
+        self._pending = {}
+        # (course_key, group) -> ordered set of the group's definition ids not loaded yet
+        self._pending_groups = {}
+        # (course_key, definition_id) -> number of loaders that haven't fetched it yet
+        self._references = {}
+        # (course_key, definition_id) -> definition loaded but not fetched by all its loaders yet,
+        # from the least to the most recently used
+        self._loaded = OrderedDict()
+
+    def register(self, course_key, definition_id, group=None):
+        """
+        Note that the definition `definition_id` will likely be needed in the
+        context of `course_key`, along with the other definitions of `group`.
+        """
+        key = (course_key, definition_id)
+        self._references[key] = self._references.get(key, 0) + 1
+        if key not in self._loaded and definition_id not in self._pending.get(course_key, {}):
+            self._pending.setdefault(course_key, OrderedDict())[definition_id] = group
+            if group is not None:
+                self._pending_groups.setdefault((course_key, group), OrderedDict())[definition_id] = True
+
+    def get_definition(self, course_key, definition_id):
+        """
+        Return the definition `definition_id`, first loading it with some of
+        the other pending definitions of `course_key`.
+        """
+        key = (course_key, definition_id)
+        if key not in self._loaded:
+            self._load(course_key, definition_id)
+
+        definition = self._loaded.pop(key)
+        # The definition is no longer needed once all its loaders have fetched it.
+        references = self._references.pop(key, 0) - 1
+        if references > 0:
+            self._references[key] = references
+            self._loaded[key] = definition
+        return definition
+
+    def _load(self, course_key, definition_id):
+        """
+        Load the definition `definition_id` with as many of the other pending
+        definitions of `course_key` as fit in the batch, preferring those of
+        its group.
+        """
+        group = self._pop_pending(course_key, definition_id)
+        batch_ids = [definition_id]
+        candidates = itertools.chain(
+            self._pending_groups.get((course_key, group), ()) if group is not None else (),
+            self._pending.get(course_key, ()),
+        )
+        for pending_id in candidates:
+            if len(batch_ids) >= self.MAX_BATCH_SIZE:
+                break
+            if pending_id not in batch_ids:
+                batch_ids.append(pending_id)
+        for pending_id in batch_ids[1:]:
+            self._pop_pending(course_key, pending_id)
+
+        for definition in self.modulestore.get_definitions(course_key, batch_ids):
+            self._loaded[(course_key, definition['_id'])] = definition
+        if (course_key, definition_id) not in self._loaded:
+            # e.g. an id given as a string, which only get_definition converts
+            self._loaded[(course_key, definition_id)] = self.modulestore.get_definition(course_key, definition_id)
+        # The batch was just loaded, so it's the least recently used definitions that are dropped.
+        while len(self._loaded) > max(self.MAX_DEFINITIONS_HELD, len(batch_ids)):
+            self._loaded.popitem(last=False)
+
+    def _pop_pending(self, course_key, definition_id):
+        """
+        Remove `definition_id` from the pending definitions of `course_key`,
+        and return its group.
+        """
+        pending = self._pending.get(course_key, {})
+        if definition_id not in pending:
+            return None
+        group = pending.pop(definition_id)
+        if not pending:
+            del self._pending[course_key]
+        if group is not None:
+            siblings = self._pending_groups[(course_key, group)]
+            del siblings[definition_id]
+            if not siblings:
+                del self._pending_groups[(course_key, group)]
+        return group
+
+
 class DefinitionLazyLoader(object):
     """
     A placeholder to put into an xblock in place of its definition which
@@ -9,16 +119,23 @@ class DefinitionLazyLoader(object):
     object doesn't force access during init but waits until client wants the
     definition. Only works if the modulestore is a split mongo store.
     """
-    def __init__(self, modulestore, course_key, block_type, definition_id, field_converter):
+    def __init__(self, modulestore, course_key, block_type, definition_id, field_converter, batch=None,
+                 group=None):
         """
         Simple placeholder for yet-to-be-fetched data
         :param modulestore: the pymongo db connection with the definitions
         :param definition_locator: the id of the record in the above to fetch
+        :param batch: an optional DefinitionBatch to load the definition along with its siblings'
+        :param group: the group of definitions of the batch this one is preferably loaded with,
+            e.g. the parent of the block
         """
         self.modulestore = modulestore
         self.course_key = course_key
         self.definition_locator = DefinitionLocator(block_type, definition_id)
         self.field_converter = field_converter
+        self.batch = batch
+        if batch is not None:
+            batch.register(course_key, definition_id, group)
 
     def fetch(self):
         """
@@ -28,5 +145,8 @@ class DefinitionLazyLoader(object):
         # get_definition may return a cached value perhaps from another course or code path
         # so, we copy the result here so that updates don't cross-pollinate nor change the cached
         # value in such a way that we can't tell that the definition's been updated.
-        definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
+        if self.batch is not None:
+            definition = self.batch.get_definition(self.course_key, self.definition_locator.definition_id)
+        else:
+            definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
         return copy.deepcopy(definition)
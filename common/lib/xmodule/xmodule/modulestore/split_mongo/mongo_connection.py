@@ -3,18 +3,22 @@ Segregation of pymongo functions from the data modeling mechanisms for split mod
 """
 import datetime
 import cPickle as pickle
+import hashlib
 import math
 import zlib
 import pymongo
 import pytz
 import re
+from collections import defaultdict, OrderedDict
 from contextlib import contextmanager
+from threading import Lock
 from time import time
 
 # Import this just to export it
-from pymongo.errors import DuplicateKeyError  # pylint: disable=unused-import
+from pymongo.errors import BulkWriteError, DuplicateKeyError  # pylint: disable=unused-import
 
 try:
+    from django.conf import settings
     from django.core.cache import caches, InvalidCacheBackendError
     DJANGO_AVAILABLE = True
 except ImportError:
@@ -140,6 +144,9 @@ class QueryTimer(object):
 
 TIMER = QueryTimer(__name__, 0.01)
 
+# The error code of mongo's duplicate key errors
+DUPLICATE_KEY_ERROR_CODE = 11000
+
 
 def structure_from_mongo(structure, course_context=None):
     """
@@ -203,14 +210,90 @@ def structure_to_mongo(structure, course_context=None):
         return new_structure
 
 
+class LocalStructureCache(object):
+    """
+    Per-process LRU cache of pickled course structures, keyed by the
+    structures' version guids and bounded by the total size of the pickled
+    data.
+
+    Persisted structures are immutable, so an entry never needs to be
+    invalidated. Entries are kept pickled so that every caller gets its
+    own copy of the structure to work with.
+    """
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    @property
+    def max_bytes(self):
+        """
+        The maximum total size of the cached data, as configured by the
+        COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES setting. 0 disables the cache.
+        """
+        if not DJANGO_AVAILABLE:
+            return 0
+        return getattr(settings, 'COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES', 0)
+
+    def get(self, key):
+        """
+        Returns the pickled structure stored for `key`, or None.
+        """
+        with self._lock:
+            pickled_data = self._entries.pop(key, None)
+            if pickled_data is not None:
+                self._entries[key] = pickled_data
+            return pickled_data
+
+    def set(self, key, pickled_data):
+        """
+        Stores the pickled structure for `key`, evicting the least recently
+        used entries to stay within :attr:`max_bytes`.
+        """
+        max_bytes = self.max_bytes
+        if len(pickled_data) > max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = pickled_data
+            self._size += len(pickled_data)
+            while self._size > max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        """
+        Removes all the structures from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+LOCAL_STRUCTURE_CACHE = LocalStructureCache()
+
+
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
+    Structures are looked up in the per-process LOCAL_STRUCTURE_CACHE
+    first. Compressed structures larger than CHUNK_SIZE are split across
+    several cache entries, so that they fit under the item size limit of
+    backends like memcached; the entry under the structure's own key is
+    then a (CHUNKED_MARKER, chunk count) manifest.
+
     If the 'course_structure_cache' doesn't exist, then don't do anything for
-    for set and get.
+    set and get.
     """
+    # memcached refuses items over 1MB by default, key and overhead included
+    CHUNK_SIZE = 1000 * 1000
+    CHUNKED_MARKER = 'chunked'
+
     def __init__(self):
         self.cache = None
         if DJANGO_AVAILABLE:
@@ -219,13 +302,56 @@ class CourseStructureCache(object):
             except InvalidCacheBackendError:
                 pass
 
+    @staticmethod
+    def _chunk_key(key, index):
+        """Return the cache key of the `index`th chunk of the structure `key`."""
+        return u'{}.chunk.{}'.format(key, index)
+
+    def _get_compressed(self, key, tagger):
+        """Read the compressed, pickled struct data from the shared cache, joining chunks."""
+        cached = self.cache.get(key)
+        if not isinstance(cached, tuple):
+            return cached
+
+        _, chunk_count = cached
+        tagger.measure('chunks', chunk_count)
+        chunk_keys = [self._chunk_key(key, index) for index in range(chunk_count)]
+        chunks = self.cache.get_many(chunk_keys)
+        if len(chunks) != chunk_count:
+            # Some chunks were evicted, so the structure has to be reloaded
+            tagger.tag(missing_chunks=chunk_count - len(chunks))
+            return None
+        return ''.join(chunks[chunk_key] for chunk_key in chunk_keys)
+
+    def _set_compressed(self, key, compressed_pickled_data, tagger):
+        """Write the compressed, pickled struct data to the shared cache, in chunks if needed."""
+        # Stuctures are immutable, so we set a timeout of "never"
+        if len(compressed_pickled_data) <= self.CHUNK_SIZE:
+            self.cache.set(key, compressed_pickled_data, None)
+            return
+
+        chunks = {
+            self._chunk_key(key, index): compressed_pickled_data[offset:offset + self.CHUNK_SIZE]
+            for index, offset in enumerate(range(0, len(compressed_pickled_data), self.CHUNK_SIZE))
+        }
+        tagger.measure('chunks', len(chunks))
+        self.cache.set_many(chunks, None)
+        # The manifest is written last, so readers never see it without its chunks
+        self.cache.set(key, (self.CHUNKED_MARKER, len(chunks)), None)
+
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
+            pickled_data = LOCAL_STRUCTURE_CACHE.get(key)
+            if pickled_data is not None:
+                tagger.tag(from_cache='local')
+                tagger.measure('uncompressed_size', len(pickled_data))
+                return pickle.loads(pickled_data)
+
+            compressed_pickled_data = self._get_compressed(key, tagger)
             tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
             if compressed_pickled_data is None:
@@ -237,6 +363,7 @@ class CourseStructureCache(object):
 
             pickled_data = zlib.decompress(compressed_pickled_data)
             tagger.measure('uncompressed_size', len(pickled_data))
+            LOCAL_STRUCTURE_CACHE.set(key, pickled_data)
 
             return pickle.loads(pickled_data)
 
@@ -248,13 +375,111 @@ class CourseStructureCache(object):
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
             pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
             tagger.measure('uncompressed_size', len(pickled_data))
+            LOCAL_STRUCTURE_CACHE.set(key, pickled_data)
 
             # 1 = Fastest (slightly larger results)
             compressed_pickled_data = zlib.compress(pickled_data, 1)
             tagger.measure('compressed_size', len(compressed_pickled_data))
 
-            # Stuctures are immutable, so we set a timeout of "never"
-            self.cache.set(key, compressed_pickled_data, None)
+            self._set_compressed(key, compressed_pickled_data, tagger)
+
+
+class CourseSummaryCache(object):
+    """
+    Wrapper around django cache object to cache course summary records.
+
+    A course summary record holds a small set of the root block's fields
+    for a single structure version, so that listing pages don't have to
+    fetch and decode whole structures. Records share the
+    'course_structure_cache' backend with :class:`CourseStructureCache`,
+    under their own keys.
+
+    If the 'course_structure_cache' doesn't exist, then don't do anything for
+    set and get.
+    """
+    KEY_PREFIX = 'course_summary'
+
+    def __init__(self):
+        self.cache = None
+        if DJANGO_AVAILABLE:
+            try:
+                self.cache = get_cache('course_structure_cache')
+            except InvalidCacheBackendError:
+                pass
+
+    def make_key(self, version_guid, block_type, fields):
+        """
+        Return the cache key of the summary of the `block_type` root of the
+        structure `version_guid`, restricted to `fields`.
+        """
+        fields_hash = hashlib.sha1(u','.join(sorted(fields)).encode('utf-8')).hexdigest()
+        return u'{}.{}.{}.{}'.format(self.KEY_PREFIX, block_type, fields_hash, version_guid)
+
+    def get_many(self, keys, course_context=None):
+        """Return a map of key to summary record for the keys found in cache."""
+        if self.cache is None:
+            return {}
+
+        with TIMER.timer("CourseSummaryCache.get_many", course_context) as tagger:
+            records = self.cache.get_many(keys)
+            tagger.measure('requested', len(keys))
+            tagger.measure('found', len(records))
+            return records
+
+    def set_many(self, records, course_context=None):
+        """Write the given map of key to summary record to cache."""
+        if self.cache is None:
+            return
+
+        with TIMER.timer("CourseSummaryCache.set_many", course_context) as tagger:
+            tagger.measure('records', len(records))
+            # Structures are immutable, so we set a timeout of "never"
+            self.cache.set_many(records, None)
+
+
+class BlockTypeIndexCache(object):
+    """
+    Per-process LRU cache of indexes of the blocks in course structures
+    by block type, keyed by the structures' version guids.
+
+    Persisted structures are immutable, so an index built for a version
+    guid never needs to be invalidated.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._indexes = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, structure):
+        """
+        Returns the index of the given structure's blocks, as a map of
+        block type to the list of BlockKeys of that type, building and
+        caching it if needed.
+        """
+        version_guid = structure['_id']
+        with self._lock:
+            index = self._indexes.pop(version_guid, None)
+            if index is not None:
+                self._indexes[version_guid] = index
+                return index
+
+        index = defaultdict(list)
+        for block_key in structure['blocks']:
+            index[block_key.type].append(block_key)
+        index = dict(index)
+
+        with self._lock:
+            self._indexes[version_guid] = index
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        """
+        Removes all the indexes from the cache.
+        """
+        with self._lock:
+            self._indexes.clear()
 
 
 class MongoConnection(object):
@@ -340,25 +565,57 @@ class MongoConnection(object):
             return docs
 
     @autoretry_read()
-    def find_courselike_blocks_by_id(self, ids, block_type, course_context=None):
+    def find_courselike_summaries_by_id(self, ids, block_type, fields, course_context=None):
         """
-        Find all structures that specified in `ids`. Among the blocks only return block whose type is `block_type`.
+        Return summary records of the structures specified in ``ids``.
+
+        Only the first block of type `block_type` of each structure is
+        projected out of Mongo, and only the given `fields` of that block are
+        kept. Records are cached per structure version in the
+        :class:`CourseSummaryCache`.
+
+        Each record is a dict with the structure's '_id' and a 'fields' map,
+        which is None if the structure has no block of type `block_type`.
 
         Arguments:
             ids (list): A list of structure ids
-            block_type: type of block to return
+            block_type: type of the root block to summarize
+            fields (list): names of the root block fields to keep
         """
-        with TIMER.timer("find_courselike_blocks_by_id", course_context) as tagger:
+        with TIMER.timer("find_courselike_summaries_by_id", course_context) as tagger:
             tagger.measure("requested_ids", len(ids))
-            docs = [
-                structure_from_mongo(structure, course_context)
-                for structure in self.structures.find(
-                    {'_id': {'$in': ids}},
-                    {'blocks': {'$elemMatch': {'block_type': block_type}}, 'root': 1}
-                )
-            ]
-            tagger.measure("structures", len(docs))
-            return docs
+            cache = CourseSummaryCache()
+            keys = {structure_id: cache.make_key(structure_id, block_type, fields) for structure_id in ids}
+            cached = cache.get_many(keys.values(), course_context)
+
+            summaries = []
+            missing_ids = []
+            for structure_id in ids:
+                record = cached.get(keys[structure_id])
+                if record is None:
+                    missing_ids.append(structure_id)
+                else:
+                    summaries.append(record)
+            tagger.measure("cached", len(summaries))
+
+            if missing_ids:
+                fetched = {}
+                projection = {'blocks': {'$elemMatch': {'block_type': block_type}}}
+                for structure in self.structures.find({'_id': {'$in': missing_ids}}, projection):
+                    record = {'_id': structure['_id'], 'fields': None}
+                    if structure.get('blocks'):
+                        block_fields = structure['blocks'][0].get('fields', {})
+                        record['fields'] = {
+                            field: block_fields[field]
+                            for field in fields
+                            if field in block_fields
+                        }
+                    fetched[keys[structure['_id']]] = record
+                    summaries.append(record)
+                cache.set_many(fetched, course_context)
+
+            tagger.measure("structures", len(summaries))
+            return summaries
 
     @autoretry_read()
     def find_structures_derived_from(self, ids, course_context=None):
@@ -556,6 +813,23 @@ class MongoConnection(object):
             tagger.tag(block_type=definition['block_type'])
             self.definitions.insert(definition)
 
+    def insert_definitions(self, definitions, course_context=None):
+        """
+        Create all the given definitions in the db with a single unordered
+        bulk insert, skipping those that already exist.
+        """
+        with TIMER.timer("insert_definitions", course_context) as tagger:
+            tagger.measure('definitions', len(definitions))
+            try:
+                self.definitions.insert_many(definitions, ordered=False)
+            except BulkWriteError as err:
+                # The store is append only, so definitions that are already
+                # in the db are the same as the ones being inserted.
+                errors = err.details.get('writeErrors', [])
+                if any(error['code'] != DUPLICATE_KEY_ERROR_CODE for error in errors):
+                    raise
+                log.debug("Attempted to insert %d duplicate definitions", len(errors))
+
     def ensure_indexes(self):
         """
         Ensure that all appropriate indexes are created that are needed by this modulestore, or raise
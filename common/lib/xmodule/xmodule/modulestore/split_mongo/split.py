@@ -77,7 +77,7 @@ from opaque_keys.edx.locator import (
 )
 from ccx_keys.locator import CCXLocator, CCXBlockUsageLocator
 from xmodule.modulestore.exceptions import InsufficientSpecificationError, VersionConflictError, DuplicateItemError, \
-    DuplicateCourseError, MultipleCourseBlocksFound
+    DuplicateCourseError
 from xmodule.modulestore import (
     inheritance, ModuleStoreWriteBase, ModuleStoreEnum,
     BulkOpsRecord, BulkOperationsMixin, SortedAssetList, BlockData
@@ -86,7 +86,7 @@ from xmodule.modulestore import (
 from ..exceptions import ItemNotFoundError
 from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.partitions.partitions_service import PartitionService
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
+from xmodule.modulestore.split_mongo.mongo_connection import BlockTypeIndexCache, MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
@@ -118,6 +118,9 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# Indexes by block type of the blocks of recently queried structures
+BLOCK_TYPE_INDEX_CACHE = BlockTypeIndexCache(max_entries=100)
+
 
 new_contract('BlockUsageLocator', BlockUsageLocator)
 new_contract('BlockKey', BlockKey)
@@ -258,16 +261,16 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
                 # append only, so if it's already been written, we can just keep going.
                 log.debug("Attempted to insert duplicate structure %s", _id)
 
-        for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db:
+        new_definitions = [
+            bulk_write_record.definitions[_id]
+            for _id in bulk_write_record.definitions.viewkeys() - bulk_write_record.definitions_in_db
+        ]
+        if new_definitions:
             dirty = True
-
-            try:
-                self.db_connection.insert_definition(bulk_write_record.definitions[_id], bulk_write_record.course_key)
-            except DuplicateKeyError:
-                # We may not have looked up this definition inside this bulk operation, and thus
-                # didn't realize that it was already in the database. That's OK, the store is
-                # append only, so if it's already been written, we can just keep going.
-                log.debug("Attempted to insert duplicate definition %s", _id)
+            # Definitions are inserted with a single bulk write; any that are already in the
+            # database (because we didn't look them up inside this bulk operation) are skipped,
+            # which is OK since the store is append only.
+            self.db_connection.insert_definitions(new_definitions, bulk_write_record.course_key)
 
         if bulk_write_record.index is not None and bulk_write_record.index != bulk_write_record.initial_index:
             dirty = True
@@ -582,15 +585,17 @@ class SplitBulkWriteMixin(BulkOperationsMixin):
 
         return course_indexes
 
-    def find_courselike_blocks_by_id(self, ids, block_type):
+    def find_courselike_summaries_by_id(self, ids, block_type, fields):
         """
-        Find all structures that specified in `ids`. Return blocks matching with block_type.
+        Return summary records of the structures specified in `ids`, holding
+        `fields` of the first block of type `block_type` of each structure.
         Arguments:
             ids (list): A list of structure ids
-            block_type: type of block to return
+            block_type: type of block to summarize
+            fields (list): names of the block fields to return
         """
         ids = set(ids)
-        return self.db_connection.find_courselike_blocks_by_id(list(ids), block_type)
+        return self.db_connection.find_courselike_summaries_by_id(list(ids), block_type, fields)
 
     def find_structures_by_id(self, ids):
         """
@@ -915,9 +920,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         # add it in the envelope for the structure.
         return CourseEnvelope(course_key.replace(version_guid=version_guid), entry)
 
-    def _get_courselike_blocks_for_branch(self, branch, **kwargs):
+    def _get_courselike_summaries_for_branch(self, branch, fields, **kwargs):
         """
-        Internal generator for fetching lists of courselike without loading them.
+        Internal generator for fetching the root block `fields` of lists of
+        courselike without loading their structures.
         """
         version_guids, id_version_map = self.collect_ids_from_matching_indexes(branch, **kwargs)
 
@@ -927,9 +933,11 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         block_type = SplitMongoModuleStore.DEFAULT_ROOT_LIBRARY_BLOCK_TYPE \
             if branch == 'library' else SplitMongoModuleStore.DEFAULT_ROOT_COURSE_BLOCK_TYPE
 
-        for entry in self.find_courselike_blocks_by_id(version_guids, block_type):
-            for course_index in id_version_map[entry['_id']]:
-                yield entry, course_index
+        for summary in self.find_courselike_summaries_by_id(version_guids, block_type, fields):
+            if summary['fields'] is None:
+                raise ItemNotFoundError(summary['_id'])
+            for course_index in id_version_map[summary['_id']]:
+                yield summary['fields'], course_index
 
     def _get_structures_for_branch(self, branch, **kwargs):
         """
@@ -1033,32 +1041,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         :param branch: the branch for which to return courses.
         """
-        def extract_course_summary(course):
-            """
-            Extract course information from the course block for split.
-            """
-            return {
-                field: course.fields[field]
-                for field in CourseSummary.course_info_fields
-                if field in course.fields
-            }
-
         courses_summaries = []
-        for entry, structure_info in self._get_courselike_blocks_for_branch(branch, **kwargs):
+        summaries = self._get_courselike_summaries_for_branch(branch, CourseSummary.course_info_fields, **kwargs)
+        for course_summary, structure_info in summaries:
             course_locator = self._create_course_locator(structure_info, branch=None)
-            course_block = [
-                block_data
-                for block_key, block_data in entry['blocks'].items()
-                if block_key.type == "course"
-            ]
-            if not course_block:
-                raise ItemNotFoundError
-
-            if len(course_block) > 1:
-                raise MultipleCourseBlocksFound(
-                    "Expected 1 course block to be found in the course, but found {0}".format(len(course_block))
-                )
-            course_summary = extract_course_summary(course_block[0])
             courses_summaries.append(
                 CourseSummary(course_locator, **course_summary)
             )
@@ -1073,29 +1059,12 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         """
         branch = 'library'
         libraries_summaries = []
-        for entry, structure_info in self._get_courselike_blocks_for_branch(branch, **kwargs):
+        for library_summary, structure_info in self._get_courselike_summaries_for_branch(
+                branch, ['display_name'], **kwargs
+        ):
             library_locator = self._create_library_locator(structure_info, branch=None)
-            library_block = [
-                block_data
-                for block_key, block_data in entry['blocks'].items()
-                if block_key.type == "library"
-            ]
-            if not library_block:
-                raise ItemNotFoundError
-
-            if len(library_block) > 1:
-                raise MultipleLibraryBlocksFound(
-                    "Expected 1 library block, but found {0}".format(len(library_block))
-                )
-
-            library_block_fields = library_block[0].fields
-            display_name = ''
-
-            if 'display_name' in library_block_fields:
-                display_name = library_block_fields['display_name']
-
             libraries_summaries.append(
-                LibrarySummary(library_locator, display_name)
+                LibrarySummary(library_locator, library_summary.get('display_name', ''))
             )
 
         return libraries_summaries
@@ -1312,7 +1281,16 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             path_cache = {}
             parents_cache = self.build_block_key_to_parents_mapping(course.structure)
 
-        for block_id, value in course.structure['blocks'].iteritems():
+        blocks = course.structure['blocks']
+        indexed_block_ids = self._block_ids_of_types(course, qualifiers.get('block_type'))
+        if indexed_block_ids is not None:
+            # All the candidate blocks are of the requested types, so there's no need to check that again.
+            qualifiers.pop('block_type')
+            candidates = ((block_id, blocks[block_id]) for block_id in indexed_block_ids)
+        else:
+            candidates = blocks.iteritems()
+
+        for block_id, value in candidates:
             if _block_matches_all(value):
                 if not include_orphans:
                     if (  # pylint: disable=bad-continuation
@@ -1328,6 +1306,34 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         else:
             return []
 
+    def _block_ids_of_types(self, course, block_type_criteria):
+        """
+        Returns the ids of the blocks in the given course's structure whose
+        type matches the given ``block_type`` qualifier of get_items, using
+        the structure's block type index.
+
+        Returns None if the criteria can't be answered by the index, or the
+        structure may still be modified by the current bulk operation.
+        """
+        if isinstance(block_type_criteria, six.string_types):
+            block_types = [block_type_criteria]
+        elif (  # pylint: disable=bad-continuation
+            isinstance(block_type_criteria, dict) and block_type_criteria.keys() == ['$in'] and
+            all(isinstance(block_type, six.string_types) for block_type in block_type_criteria['$in'])
+        ):
+            block_types = set(block_type_criteria['$in'])
+        else:
+            return None
+
+        structure = course.structure
+        bulk_write_record = self._get_bulk_ops_record(course.course_key)
+        if bulk_write_record.active and structure['_id'] not in bulk_write_record.structures_in_db:
+            # Structures created during a bulk operation are updated in place until it ends.
+            return None
+
+        index = BLOCK_TYPE_INDEX_CACHE.get(structure)
+        return [block_id for block_type in block_types for block_id in index.get(block_type, [])]
+
     def build_block_key_to_parents_mapping(self, structure):
         """
         Given a structure, builds block_key to parents mapping for all block keys in structure
@@ -0,0 +1,186 @@
+"""
+A write-only filesystem that streams everything written to it into a tar archive.
+"""
+import io
+import tarfile
+import time
+
+from fs import errors
+from fs.base import FS
+from fs.info import Info
+from fs.mode import Mode
+from fs.path import basename, dirname, iteratepath, join, relpath
+
+
+class _TarEntryFile(io.BytesIO):
+    """
+    An in-memory file which is added to the archive when it is closed.
+    """
+    def __init__(self, tar_fs, path):
+        super(_TarEntryFile, self).__init__()
+        self._tar_fs = tar_fs
+        self._path = path
+
+    def close(self):
+        if not self.closed:
+            size = len(self.getvalue())
+            self.seek(0)
+            self._tar_fs._add_file(self._path, self, size)  # pylint: disable=protected-access
+        super(_TarEntryFile, self).close()
+
+
+class TarStreamFS(FS):
+    """
+    A write-only filesystem which writes the files and directories created
+    in it straight into a tar archive opened in streaming mode over `fileobj`,
+    so that an export never needs a scratch directory.
+
+    Small files are buffered in memory until they are closed. Large files
+    should be written with :meth:`upload`, which streams them into the
+    archive from a readable file object without buffering.
+    """
+    _meta = {
+        'case_insensitive': False,
+        'invalid_path_chars': '\0',
+        'network': False,
+        'read_only': False,
+        'thread_safe': True,
+        'unicode_paths': True,
+        'virtual': False,
+    }
+
+    def __init__(self, fileobj, compression='gz'):
+        super(TarStreamFS, self).__init__()
+        self._tar = tarfile.open(fileobj=fileobj, mode='w|' + compression)
+        self._directories = {u'/'}
+        self._files = set()
+
+    def __repr__(self):
+        return 'TarStreamFS({!r})'.format(self._tar.fileobj)
+
+    def _new_tarinfo(self, path, entry_type, mode, size=0):
+        """
+        Return the TarInfo of a new archive entry at `path`.
+        """
+        tarinfo = tarfile.TarInfo(relpath(path).encode('utf-8'))
+        tarinfo.type = entry_type
+        tarinfo.mode = mode
+        tarinfo.size = size
+        tarinfo.mtime = time.time()
+        return tarinfo
+
+    def _check_parent(self, path):
+        """
+        Raise ResourceNotFound unless the parent directory of `path` exists.
+        """
+        if dirname(path) not in self._directories:
+            raise errors.ResourceNotFound(path)
+
+    def _add_file(self, path, fileobj, size):
+        """
+        Add the `size` bytes read from `fileobj` to the archive as the file `path`.
+        """
+        with self._lock:
+            self._tar.addfile(self._new_tarinfo(path, tarfile.REGTYPE, 0o644, size), fileobj)
+            self._files.add(path)
+
+    def getinfo(self, path, namespaces=None):
+        self.check()
+        _path = self.validatepath(path)
+        with self._lock:
+            if _path in self._directories:
+                is_dir = True
+            elif _path in self._files:
+                is_dir = False
+            else:
+                raise errors.ResourceNotFound(path)
+        return Info({'basic': {'name': basename(_path), 'is_dir': is_dir}})
+
+    def listdir(self, path):
+        self.check()
+        _path = self.validatepath(path)
+        with self._lock:
+            if _path not in self._directories:
+                raise errors.ResourceNotFound(path)
+            return sorted(
+                basename(entry)
+                for entry in self._directories | self._files
+                if entry != _path and dirname(entry) == _path
+            )
+
+    def makedir(self, path, permissions=None, recreate=False):
+        self.check()
+        _path = self.validatepath(path)
+        with self._lock:
+            if _path in self._directories:
+                if not recreate:
+                    raise errors.DirectoryExists(path)
+            elif _path in self._files:
+                raise errors.DirectoryExists(path)
+            else:
+                self._check_parent(_path)
+                self._tar.addfile(self._new_tarinfo(_path, tarfile.DIRTYPE, 0o755))
+                self._directories.add(_path)
+        return self.opendir(path)
+
+    def openbin(self, path, mode='r', buffering=-1, **options):
+        self.check()
+        _path = self.validatepath(path)
+        _mode = Mode(mode)
+        _mode.validate_bin()
+        if _mode.reading:
+            raise errors.ResourceReadOnly(path)
+        with self._lock:
+            if _path in self._directories:
+                raise errors.FileExpected(path)
+            self._check_parent(_path)
+        return _TarEntryFile(self, _path)
+
+    def upload(self, path, file, chunk_size=None, **options):
+        """
+        Stream the contents of the binary file object `file` into the
+        archive as `path`, without reading it all into memory.
+
+        The size of the entry is taken from the `length` attribute of `file`
+        when it has one (as GridFS files do), or else found by seeking.
+        """
+        self.check()
+        _path = self.validatepath(path)
+        with self._lock:
+            self._check_parent(_path)
+        start = file.tell()
+        size = getattr(file, 'length', None)
+        if size is None:
+            file.seek(0, io.SEEK_END)
+            size = file.tell()
+            file.seek(start)
+        self._add_file(_path, file, size - start)
+
+    def makedirs(self, path, permissions=None, recreate=False):
+        self.check()
+        _path = self.validatepath(path)
+        with self._lock:
+            current = u'/'
+            for part in iteratepath(_path):
+                current = join(current, part)
+                if current not in self._directories:
+                    self.makedir(current, permissions=permissions)
+                elif current == _path and not recreate:
+                    raise errors.DirectoryExists(path)
+        return self.opendir(path)
+
+    def remove(self, path):
+        raise errors.ResourceReadOnly(path)
+
+    def removedir(self, path):
+        raise errors.ResourceReadOnly(path)
+
+    def setinfo(self, path, info):
+        self.check()
+        self.getinfo(path)
+
+    def close(self):
+        if not self.isclosed():
+            with self._lock:
+                self._tar.close()
+        super(TarStreamFS, self).close()
@@ -14,6 +14,7 @@ and then for each combination of modulestores, performing the sequence:
 
 import itertools
 import os
+import tarfile
 from path import Path as path
 from shutil import rmtree
 from tempfile import mkdtemp
@@ -25,6 +26,7 @@ from openedx.core.lib.tests import attr
 from xmodule.tests import CourseComparisonTest
 from xmodule.modulestore.xml_importer import import_course_from_xml
 from xmodule.modulestore.xml_exporter import export_course_to_xml
+from xmodule.modulestore.tar_stream_fs import TarStreamFS
 from xmodule.modulestore.tests.utils import mock_tab_from_json
 from xmodule.partitions.tests.test_partitions import PartitionTestCase
 from xmodule.modulestore.tests.utils import (
@@ -206,3 +208,76 @@ class CrossStoreXMLRoundtrip(CourseComparisonTest, PartitionTestCase):
                         dest_course = dest_store.get_course(dest_course_key, depth=None, lazy=False)
 
                         self.assertEqual(dest_course.url_name, 'course')
+
+    @patch('xmodule.video_module.video_module.edxval_api', None)
+    @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
+    def test_export_to_tar_stream(self, _mock_tab_from_json):
+        # Construct the contentstore for storing the first import
+        with MongoContentstoreBuilder().build() as source_content:
+            # Construct the modulestore for storing the first import (using the previously created contentstore)
+            with SPLIT_MODULESTORE_SETUP.build(contentstore=source_content) as source_store:
+                # Construct the contentstore for storing the second import
+                with MongoContentstoreBuilder().build() as dest_content:
+                    # Construct the modulestore for storing the second import (using the second contentstore)
+                    with SPLIT_MODULESTORE_SETUP.build(contentstore=dest_content) as dest_store:
+                        source_course_key = source_store.make_course_key('a', 'source', 'course')
+                        dest_course_key = dest_store.make_course_key('a', 'dest', 'course')
+
+                        import_course_from_xml(
+                            source_store,
+                            'test_user',
+                            TEST_DATA_DIR,
+                            source_dirs=['toy'],
+                            static_content_store=source_content,
+                            target_id=source_course_key,
+                            raise_on_failure=True,
+                            create_if_not_present=True,
+                        )
+
+                        tarball_path = os.path.join(self.export_dir, 'exported_source_course.tar.gz')
+                        with open(tarball_path, 'wb') as tarball:
+                            with TarStreamFS(tarball) as tar_fs:
+                                export_course_to_xml(
+                                    source_store,
+                                    source_content,
+                                    source_course_key,
+                                    None,
+                                    EXPORTED_COURSE_DIR_NAME,
+                                    root_fs=tar_fs,
+                                )
+                        with tarfile.open(tarball_path) as tarball:
+                            tarball.extractall(self.export_dir)
+
+                        import_course_from_xml(
+                            dest_store,
+                            'test_user',
+                            self.export_dir,
+                            source_dirs=[EXPORTED_COURSE_DIR_NAME],
+                            static_content_store=dest_content,
+                            target_id=dest_course_key,
+                            raise_on_failure=True,
+                            create_if_not_present=True,
+                        )
+
+                        self.exclude_field(None, 'wiki_slug')
+                        self.exclude_field(None, 'xml_attributes')
+                        self.exclude_field(None, 'parent')
+                        self.exclude_field(None, 'discussion_id')
+                        self.ignore_asset_key('_id')
+                        self.ignore_asset_key('uploadDate')
+                        self.ignore_asset_key('content_son')
+                        self.ignore_asset_key('thumbnail_location')
+
+                        self.assertCoursesEqual(
+                            source_store,
+                            source_course_key,
+                            dest_store,
+                            dest_course_key,
+                        )
+
+                        self.assertAssetsEqual(
+                            source_content,
+                            source_course_key,
+                            dest_content,
+                            dest_course_key,
+                        )
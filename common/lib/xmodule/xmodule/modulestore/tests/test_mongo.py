@@ -4,6 +4,7 @@ Unit tests for the Mongo modulestore
 # pylint: disable=protected-access
 # pylint: disable=no-name-in-module
 # pylint: disable=bad-continuation
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import TestCase
 # pylint: enable=E0611
 from path import Path as path
@@ -37,7 +38,8 @@ from xmodule.exceptions import NotFoundError
 from xmodule.x_module import XModuleMixin
 from xmodule.modulestore.mongo.base import as_draft
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
-from xmodule.modulestore.tests.utils import LocationMixin, mock_tab_from_json
+from xmodule.modulestore.tests.factories import check_mongo_calls
+from xmodule.modulestore.tests.utils import LocationMixin, MemoryCache, mock_tab_from_json
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import InheritanceMixin
@@ -753,6 +755,62 @@ class TestMongoModuleStoreWithNoAssetCollection(TestMongoModuleStore):
         self.assertRaises(ItemNotFoundError, lambda: self.draft_store.get_all_asset_metadata(course_key, 'asset')[:1])
 
 
+class TestPublishedBlockCache(TestMongoModuleStoreBase):
+    """
+    Tests for sharing published block documents through a PublishedBlockCache.
+    """
+    shard = 2
+
+    def setUp(self):
+        super(TestPublishedBlockCache, self).setUp()
+        self.store = DraftModuleStore(
+            self.content_store,
+            {'host': HOST, 'db': DB, 'port': PORT, 'collection': COLLECTION},
+            FS_ROOT, RENDER_TEMPLATE,
+            default_class=DEFAULT_CLASS,
+            branch_setting_func=lambda: ModuleStoreEnum.Branch.published_only,
+            xblock_mixins=(EditInfoMixin, InheritanceMixin, LocationMixin, XModuleMixin),
+            metadata_inheritance_cache_subsystem=MemoryCache(),
+            published_block_cache=LocMemCache(uuid4().hex, {}),
+        )
+        self.course_key = CourseKey.from_string('edX/toy/2012_Fall')
+        self.location = self.course_key.make_usage_key('html', 'toyhtml')
+
+    def test_get_item_from_cache(self):
+        self.store.get_item(self.location)
+        with check_mongo_calls(0):
+            self.assertEqual(self.store.get_item(self.location).location, self.location)
+
+    def test_get_children_from_cache(self):
+        course_location = self.course_key.make_usage_key('course', self.course_key.run)
+        self.store.get_item(course_location, depth=1)
+        revision = self.store.published_block_cache.get_revision(self.course_key)
+        course = self.store.get_item(course_location)
+        keys = [
+            self.store.published_block_cache.make_key(revision, child.to_deprecated_son())
+            for child in course.children
+        ]
+        self.assertEqual(len(self.store.published_block_cache.get_many(keys)), len(keys))
+
+    def test_write_invalidates_cache(self):
+        self.store.get_item(self.location)
+        revision = self.store.published_block_cache.get_revision(self.course_key)
+
+        self.store._update_single_item(self.location, {'metadata.display_name': u'Cached html'})
+
+        self.assertNotEqual(self.store.published_block_cache.get_revision(self.course_key), revision)
+        self.assertEqual(self.store.get_item(self.location).display_name, u'Cached html')
+
+    def test_no_invalidation_until_bulk_operation_ends(self):
+        revision = self.store.published_block_cache.get_revision(self.course_key)
+        with self.store.bulk_operations(self.course_key):
+            self.store._update_single_item(self.location, {'metadata.display_name': u'Bulk html'})
+            self.assertEqual(self.store.published_block_cache.get_revision(self.course_key), revision)
+            # Reads bypass the cache once the bulk operation has written to the course.
+            self.assertEqual(self.store.get_item(self.location).display_name, u'Bulk html')
+        self.assertNotEqual(self.store.published_block_cache.get_revision(self.course_key), revision)
+
+
 class TestMongoKeyValueStore(TestCase):
     """
     Tests for MongoKeyValueStore.
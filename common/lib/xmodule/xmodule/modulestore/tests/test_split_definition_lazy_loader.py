@@ -0,0 +1,125 @@
+""" Test the batching of split_mongo/DefinitionLazyLoader """
+import unittest
+
+from bson.objectid import ObjectId
+from mock import Mock
+
+from xmodule.modulestore.split_mongo.definition_lazy_loader import DefinitionBatch, DefinitionLazyLoader
+
+
+class TestDefinitionBatch(unittest.TestCase):
+    """ Test that lazily loaded definitions are fetched together """
+    shard = 2
+
+    def setUp(self):
+        super(TestDefinitionBatch, self).setUp()
+        self.modulestore = Mock()
+        self.modulestore.get_definitions.side_effect = lambda course_key, ids: [
+            {'_id': definition_id, 'fields': {'data': definition_id}} for definition_id in ids
+        ]
+        self.batch = DefinitionBatch(self.modulestore)
+        self.d1, self.d2, self.d3 = ObjectId(), ObjectId(), ObjectId()
+
+    def _loader(self, definition_id, course_key='course', group=None):
+        """ Returns a lazy loader of `definition_id` registered with the batch """
+        return DefinitionLazyLoader(
+            self.modulestore, course_key, 'html', definition_id, None, batch=self.batch, group=group,
+        )
+
+    def _loaded_ids(self):
+        """ Returns the ids of the definitions held by the batch, from the least recently used """
+        return [definition_id for _, definition_id in self.batch._loaded]  # pylint: disable=protected-access
+
+    def test_siblings_fetched_together(self):
+        loaders = [self._loader(definition_id) for definition_id in (self.d1, self.d2, self.d3)]
+        self.assertEqual(loaders[1].fetch()['fields'], {'data': self.d2})
+        self.assertEqual(self.modulestore.get_definitions.call_count, 1)
+        self.assertItemsEqual(self.modulestore.get_definitions.call_args[0][1], [self.d1, self.d2, self.d3])
+
+        self.assertEqual(loaders[0].fetch()['fields'], {'data': self.d1})
+        self.assertEqual(loaders[2].fetch()['fields'], {'data': self.d3})
+        self.assertEqual(self.modulestore.get_definitions.call_count, 1)
+        self.assertFalse(self.modulestore.get_definition.called)
+
+    def test_fetch_returns_copies(self):
+        loaders = [self._loader(self.d1), self._loader(self.d1)]
+        loaders[0].fetch()['fields']['data'] = 'changed'
+        self.assertEqual(loaders[1].fetch()['fields'], {'data': self.d1})
+
+    def test_batches_per_course(self):
+        self._loader(self.d1, course_key='course')
+        other = self._loader(self.d2, course_key='other')
+        other.fetch()
+        self.modulestore.get_definitions.assert_called_once_with('other', [self.d2])
+
+    def test_max_batch_size(self):
+        self.batch.MAX_BATCH_SIZE = 2
+        loaders = [self._loader(definition_id) for definition_id in (self.d1, self.d2, self.d3)]
+        loaders[2].fetch()
+        loaders[0].fetch()
+        loaders[1].fetch()
+        self.assertEqual(
+            [call[0][1] for call in self.modulestore.get_definitions.call_args_list],
+            [[self.d3, self.d1], [self.d2]],
+        )
+
+    def test_missing_definition(self):
+        self.modulestore.get_definitions.side_effect = lambda course_key, ids: []
+        self.modulestore.get_definition.return_value = None
+        self.assertIsNone(self._loader(self.d1).fetch())
+        self.modulestore.get_definition.assert_called_once_with('course', self.d1)
+
+    def test_fetched_definitions_dropped(self):
+        loaders = [self._loader(self.d1), self._loader(self.d1), self._loader(self.d2)]
+        loaders[0].fetch()
+        loaders[2].fetch()
+        self.assertEqual(self.batch._loaded.keys(), [('course', self.d1)])  # pylint: disable=protected-access
+        loaders[1].fetch()
+        self.assertEqual(self.batch._loaded, {})  # pylint: disable=protected-access
+        self.assertEqual(self.modulestore.get_definitions.call_count, 1)
+
+    def test_max_definitions_held(self):
+        self.batch.MAX_BATCH_SIZE = 2
+        self.batch.MAX_DEFINITIONS_HELD = 2
+        d4 = ObjectId()
+        loaders = [self._loader(definition_id) for definition_id in (self.d1, self.d2, self.d3, d4)]
+        loaders[0].fetch()
+        self.assertEqual(self._loaded_ids(), [self.d2])
+        # Batches stay full: d2 is dropped to make room for d3 and d4.
+        loaders[2].fetch()
+        self.assertEqual(self._loaded_ids(), [d4])
+        loaders[1].fetch()
+        self.assertEqual(
+            [call[0][1] for call in self.modulestore.get_definitions.call_args_list],
+            [[self.d1, self.d2], [self.d3, d4], [self.d2]],
+        )
+
+    def test_least_recently_used_dropped(self):
+        self.batch.MAX_BATCH_SIZE = 2
+        self.batch.MAX_DEFINITIONS_HELD = 3
+        d4 = ObjectId()
+        loaders = [self._loader(definition_id) for definition_id in (self.d1, self.d1, self.d2, self.d3, d4)]
+        loaders[0].fetch()
+        # d1 was used after d2 was loaded, so d2 is dropped first.
+        self.assertEqual(self._loaded_ids(), [self.d2, self.d1])
+        loaders[3].fetch()
+        self.assertEqual(self._loaded_ids(), [self.d1, d4])
+        loaders[1].fetch()
+        self.assertEqual(self.modulestore.get_definitions.call_count, 2)
+
+    def test_siblings_loaded_first(self):
+        self.batch.MAX_BATCH_SIZE = 3
+        d4 = ObjectId()
+        loaders = [
+            self._loader(self.d1, group='a'),
+            self._loader(self.d2, group='b'),
+            self._loader(self.d3, group='c'),
+            self._loader(d4, group='b'),
+        ]
+        # The rest of the batch is filled with the other pending definitions.
+        loaders[1].fetch()
+        loaders[2].fetch()
+        self.assertEqual(
+            [call[0][1] for call in self.modulestore.get_definitions.call_args_list],
+            [[self.d2, d4, self.d1], [self.d3]],
+        )
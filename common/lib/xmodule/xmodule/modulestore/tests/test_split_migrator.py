@@ -9,6 +9,7 @@ import mock
 
 from openedx.core.lib.tests import attr
 from xblock.fields import Reference, ReferenceList, ReferenceValueDict, UNIQUE_ID
+from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.split_migrator import SplitMigrator
 from xmodule.modulestore.tests.test_split_w_old_mongo import SplitWMongoCourseBootstrapper
 
@@ -199,3 +200,16 @@ class TestMigration(SplitWMongoCourseBootstrapper):
         # now compare the migrated to the original course
         self.compare_courses(self.draft_mongo, new_course_key, True)  # published
         self.compare_courses(self.draft_mongo, new_course_key, False)  # draft
+
+    def test_bulk_migrator(self):
+        user = mock.Mock(id=1)
+        db_connection = self.split_mongo.db_connection
+        with mock.patch.object(db_connection, 'insert_structure', wraps=db_connection.insert_structure) as insert:
+            new_course_key = self.migrator.migrate_mongo_course(
+                self.old_course_key, user.id, new_run='bulk_run', bulk=True
+            )
+        # the published and draft structures are each written once
+        self.assertEqual(insert.call_count, 2)
+        # now compare the migrated to the original course
+        self.compare_courses(self.draft_mongo, new_course_key, True)  # published
+        self.compare_courses(self.draft_mongo, new_course_key.for_branch(ModuleStoreEnum.BranchName.draft), False)
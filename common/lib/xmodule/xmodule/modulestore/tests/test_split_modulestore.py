@@ -13,6 +13,7 @@ import os
 import ddt
 from contracts import contract
 from django.core.cache import caches, InvalidCacheBackendError
+from django.test.utils import override_settings
 
 from openedx.core.lib import tempdir
 from openedx.core.lib.tests import attr
@@ -29,6 +30,7 @@ from ccx_keys.locator import CCXBlockUsageLocator
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.x_module import XModuleMixin
 from xmodule.fields import Date, Timedelta
+from xmodule.modulestore.split_mongo.mongo_connection import CourseStructureCache, LOCAL_STRUCTURE_CACHE
 from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.tests.test_modulestore import check_has_course_method
 from xmodule.modulestore.split_mongo import BlockKey
@@ -1003,6 +1005,64 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.CourseStructureCache.CHUNK_SIZE', 100)
+    def test_course_structure_cache_chunks(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # the structure is stored as a manifest plus several chunks
+        key = self.new_course.location.as_object_id(self.new_course.location.version_guid)
+        manifest = self.cache.get(key)
+        self.assertEqual(manifest[0], CourseStructureCache.CHUNKED_MARKER)
+        self.assertGreater(manifest[1], 1)
+
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+        self.assertEqual(cached_structure, not_cached_structure)
+
+        # losing any chunk is a cache miss
+        self.cache.delete(CourseStructureCache._chunk_key(key, 0))  # pylint: disable=protected-access
+        with check_mongo_calls(1):
+            self._get_structure(self.new_course)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    @override_settings(COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES=10 * 1024 * 1024)
+    def test_course_structure_local_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        self.addCleanup(LOCAL_STRUCTURE_CACHE.clear)
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # the local tier still serves the structure once the shared cache is gone
+        self.cache.clear()
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+        self.assertEqual(cached_structure, not_cached_structure)
+        self.assertIsNot(cached_structure, not_cached_structure)
+
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_summary_cache(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+        course_keys = [self.new_course.id.for_branch(None)]
+
+        # one call for the course indexes and one for the projected root blocks
+        with check_mongo_calls(2):
+            not_cached_summaries = modulestore().get_course_summaries(BRANCH_NAME_DRAFT, course_keys=course_keys)
+
+        # when cache is warmed, only the course indexes are read
+        with check_mongo_calls(1):
+            cached_summaries = modulestore().get_course_summaries(BRANCH_NAME_DRAFT, course_keys=course_keys)
+
+        self.assertEqual(len(cached_summaries), 1)
+        self.assertEqual(
+            [(summary.id, summary.display_name) for summary in cached_summaries],
+            [(summary.id, summary.display_name) for summary in not_cached_summaries],
+        )
+
     def _get_structure(self, course):
         """
         Helper function to get a structure from a course.
@@ -1210,6 +1270,10 @@ class SplitModuleItemTests(SplitModuleTest):
         self.assertEqual(len(matches), 4)
         matches = modulestore().get_items(locator, qualifiers={'category': 'garbage'})
         self.assertEqual(len(matches), 0)
+        matches = modulestore().get_items(locator, qualifiers={'category': {'$in': ['chapter', 'course']}})
+        self.assertEqual(len(matches), 5)
+        matches = modulestore().get_items(locator, qualifiers={'category': {'$nin': ['chapter', 'course']}})
+        self.assertEqual(len(matches), 3)
         # Test that we don't accidentally get an item with a similar name.
         matches = modulestore().get_items(locator, qualifiers={'name': 'chapter1'})
         self.assertEqual(len(matches), 1)
@@ -1,7 +1,13 @@
 """ Test the behavior of split_mongo/MongoConnection """
 import unittest
+from django.test.utils import override_settings
 from mock import patch
-from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    BlockTypeIndexCache,
+    LocalStructureCache,
+    MongoConnection,
+)
 from xmodule.exceptions import HeartbeatFailure
 
 
@@ -19,3 +25,59 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with self.assertRaises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+class TestBlockTypeIndexCache(unittest.TestCase):
+    """ Test the indexes of structures' blocks by block type """
+    shard = 2
+
+    def _structure(self, version_guid, block_keys):
+        """ Returns a structure with the given version guid and blocks """
+        return {'_id': version_guid, 'blocks': {block_key: None for block_key in block_keys}}
+
+    def test_index(self):
+        cache = BlockTypeIndexCache(max_entries=2)
+        block_keys = [BlockKey('chapter', 'c1'), BlockKey('chapter', 'c2'), BlockKey('problem', 'p1')]
+        index = cache.get(self._structure('v1', block_keys))
+        self.assertItemsEqual(index['chapter'], block_keys[:2])
+        self.assertItemsEqual(index['problem'], block_keys[2:])
+        self.assertNotIn('html', index)
+
+        # structures are immutable, so the index is cached by version guid
+        self.assertIs(cache.get(self._structure('v1', [])), index)
+
+    def test_max_entries(self):
+        cache = BlockTypeIndexCache(max_entries=2)
+        for version_guid in ('v1', 'v2', 'v1', 'v3'):
+            cache.get(self._structure(version_guid, [BlockKey('html', version_guid)]))
+        # v2 was the least recently used, so its index was evicted
+        self.assertEqual(cache.get(self._structure('v1', [])), {'html': [BlockKey('html', 'v1')]})
+        self.assertEqual(cache.get(self._structure('v2', [])), {})
+
+
+class TestLocalStructureCache(unittest.TestCase):
+    """ Test the per-process tier of the course structure cache """
+    shard = 2
+
+    @override_settings(COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES=10)
+    def test_max_bytes(self):
+        cache = LocalStructureCache()
+        cache.set('v1', 'aaaa')
+        cache.set('v2', 'bbbb')
+        self.assertEqual(cache.get('v1'), 'aaaa')
+        cache.set('v3', 'cccc')
+        # v2 was the least recently used, so it was evicted to make room for v3
+        self.assertIsNone(cache.get('v2'))
+        self.assertEqual(cache.get('v1'), 'aaaa')
+        self.assertEqual(cache.get('v3'), 'cccc')
+
+        # data larger than the whole cache is never stored
+        cache.set('v4', 'd' * 11)
+        self.assertIsNone(cache.get('v4'))
+        self.assertEqual(cache.get('v1'), 'aaaa')
+
+    @override_settings(COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES=0)
+    def test_disabled(self):
+        cache = LocalStructureCache()
+        cache.set('v1', 'aaaa')
+        self.assertIsNone(cache.get('v1'))
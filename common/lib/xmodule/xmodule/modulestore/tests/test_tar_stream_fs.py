@@ -0,0 +1,76 @@
+"""
+Tests for TarStreamFS.
+"""
+import io
+import tarfile
+import unittest
+
+from fs import errors
+
+from xmodule.modulestore.tar_stream_fs import TarStreamFS
+
+
+class TestTarStreamFS(unittest.TestCase):
+    """
+    Tests that files and directories written to a TarStreamFS end up in the archive.
+    """
+    def setUp(self):
+        super(TestTarStreamFS, self).setUp()
+        self.archive = io.BytesIO()
+        self.tar_fs = TarStreamFS(self.archive)
+
+    def read_archive(self):
+        """
+        Close the filesystem and return a map of the archive's entry names to their TarInfo and data.
+        """
+        self.tar_fs.close()
+        self.archive.seek(0)
+        entries = {}
+        with tarfile.open(fileobj=self.archive, mode='r:gz') as tar:
+            for tarinfo in tar:
+                data = tar.extractfile(tarinfo).read() if tarinfo.isfile() else None
+                entries[tarinfo.name] = (tarinfo, data)
+        return entries
+
+    def test_write_files_and_directories(self):
+        course_dir = self.tar_fs.makedir(u'course')
+        with course_dir.open(u'course.xml', 'wb') as course_xml:
+            course_xml.write(b'<course/>')
+        course_dir.makedirs(u'policies/run', recreate=True)
+        with self.tar_fs.open(u'course/policies/run/policy.json', 'w') as policy:
+            policy.write(u'{}')
+
+        entries = self.read_archive()
+        self.assertEqual(
+            sorted(entries),
+            ['course', 'course/course.xml', 'course/policies', 'course/policies/run', 'course/policies/run/policy.json'],
+        )
+        self.assertTrue(entries['course'][0].isdir())
+        self.assertEqual(entries['course/course.xml'][1], b'<course/>')
+        self.assertEqual(entries['course/policies/run/policy.json'][1], b'{}')
+
+    def test_upload_streams_file(self):
+        self.tar_fs.makedirs(u'course/static')
+        data = b'x' * (tarfile.BLOCKSIZE * 3 + 7)
+        self.tar_fs.upload(u'course/static/asset.bin', io.BytesIO(data))
+
+        self.assertEqual(self.tar_fs.listdir(u'course/static'), [u'asset.bin'])
+        self.assertTrue(self.tar_fs.isfile(u'course/static/asset.bin'))
+        entries = self.read_archive()
+        self.assertEqual(entries['course/static/asset.bin'][0].size, len(data))
+        self.assertEqual(entries['course/static/asset.bin'][1], data)
+
+    def test_missing_parent(self):
+        with self.assertRaises(errors.ResourceNotFound):
+            self.tar_fs.open(u'missing/file.txt', 'wb')
+        with self.assertRaises(errors.ResourceNotFound):
+            self.tar_fs.makedir(u'missing/dir')
+
+    def test_write_only(self):
+        self.tar_fs.makedir(u'course')
+        with self.assertRaises(errors.ResourceReadOnly):
+            self.tar_fs.open(u'course/course.xml', 'rb')
+        with self.assertRaises(errors.ResourceReadOnly):
+            self.tar_fs.removedir(u'course')
+        with self.assertRaises(errors.DirectoryExists):
+            self.tar_fs.makedir(u'course')
@@ -378,6 +378,26 @@ class StaticContentImporterTest(unittest.TestCase):
                 'static/inner/file1.txt', base_dir=expected_base_dir
             )
 
+    def test_import_static_content_directory_with_workers(self):
+        self.static_content_importer.workers = 3
+        mocked_os_walk_yield = [
+            ('static', None, ['file1.txt', 'file2.txt']),
+            ('static/inner', None, ['file1.txt']),
+        ]
+        with mock.patch(
+            'xmodule.modulestore.xml_importer.os.walk',
+            return_value=mocked_os_walk_yield
+        ), mock.patch.object(
+            self.static_content_importer, 'import_static_file',
+            side_effect=lambda file_path, base_dir: (file_path, 'key:' + file_path),
+        ):
+            remap_dict = self.static_content_importer.import_static_content_directory('static')
+        self.assertEqual(remap_dict, {
+            'static/file1.txt': 'key:static/file1.txt',
+            'static/file2.txt': 'key:static/file2.txt',
+            'static/inner/file1.txt': 'key:static/inner/file1.txt',
+        })
+
     def test_import_static_file(self):
         base_dir = path('/path/to/dir')
         full_file_path = os.path.join(base_dir, 'static/some_file.txt')
@@ -0,0 +1,66 @@
+"""
+Performance tests for get_course_blocks on synthetic courses.
+"""
+import unittest
+
+import ddt
+import pytest
+
+from openedx.core.djangoapps.content.block_structure.api import clear_course_from_cache, update_course_in_cache
+from student.tests.factories import UserFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.perf_tests.generate_course import COURSE_SHAPES, count_blocks, generate_course
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+
+from ..api import get_course_blocks
+
+# The dependency below needs to be installed manually from the development.txt file, which doesn't
+# get installed during unit tests!
+try:
+    from code_block_timer import CodeBlockTimer
+except ImportError:
+    CodeBlockTimer = None
+
+
+@ddt.ddt
+@unittest.skip
+class GetCourseBlocksTimings(ModuleStoreTestCase):
+    """
+    This class exists to time collecting and transforming the blocks of
+    synthetic courses of different sizes and shapes, in the split and old
+    mongo modulestores.
+    """
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*[
+        (store_type, shape_name)
+        for store_type in (ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+        for shape_name in sorted(COURSE_SHAPES)
+    ])
+    @ddt.unpack
+    def test_get_course_blocks_timings(self, store_type, shape_name):
+        """
+        Generate timings for get_course_blocks with the default transformers.
+        """
+        if CodeBlockTimer is None:
+            pytest.skip("CodeBlockTimer undefined.")
+
+        shape = COURSE_SHAPES[shape_name]
+        user = UserFactory.create()
+        desc = "GetCourseBlocks:{}:{}:{}".format(store_type, shape_name, count_blocks(shape))
+
+        with CodeBlockTimer(desc):
+            with self.store.default_store(store_type):
+                course_key = self.store.make_course_key('perf', 'course', shape_name)
+                blocks = generate_course(self.store, self.user.id, course_key, shape)
+                self.store.publish(blocks['course'][0], self.user.id)
+                course_key = self.store.get_course(course_key).id
+                clear_course_from_cache(course_key)
+
+                with CodeBlockTimer("collect"):
+                    update_course_in_cache(course_key)
+
+                with CodeBlockTimer("get_course_blocks"):
+                    get_course_blocks(user, self.store.make_course_usage_key(course_key))
@@ -4,6 +4,7 @@ Common utilities for use along with the course blocks.
 import json
 
 from courseware.models import StudentModule
+from courseware.user_state_client import DjangoXBlockUserStateClient
 
 
 def get_student_module_as_dict(user, course_key, block_key):
@@ -21,6 +22,8 @@ def get_student_module_as_dict(user, course_key, block_key):
     if not user.is_authenticated():
         return {}
 
+    # The state is read directly, so include the changes still pending in write-behind mode.
+    DjangoXBlockUserStateClient(user, write_behind=False).write_pending(user.username, [block_key])
     try:
         student_module = StudentModule.objects.get(
             student=user,
@@ -27,17 +27,20 @@ from abc import ABCMeta, abstractmethod
 from collections import defaultdict, namedtuple
 
 from contracts import contract, new_contract
+from django.conf import settings
 from django.db import DatabaseError, IntegrityError, transaction
 from opaque_keys.edx.asides import AsideUsageKeyV1, AsideUsageKeyV2
 from opaque_keys.edx.block_types import BlockTypeKeyV1
 from opaque_keys.edx.keys import CourseKey
-from xblock.core import XBlockAside
+from xblock.core import XBlock, XBlockAside
 from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
-from xblock.fields import Scope, UserScope
-from xblock.runtime import KeyValueStore
+from xblock.fields import Scope, ScopeIds, UserScope
+from xblock.plugin import PluginMissingError
+from xblock.runtime import KeyValueStore, Mixologist
 
 from courseware.user_state_client import DjangoXBlockUserStateClient
 from xmodule.modulestore.django import modulestore
+from xmodule.x_module import XModuleMixin
 
 from .models import StudentModule, XModuleStudentInfoField, XModuleStudentPrefsField, XModuleUserStateSummaryField
 
@@ -82,6 +85,61 @@ def _all_block_types(descriptors, aside_types):
     return block_types
 
 
+class BlockStructureBlock(object):
+    """
+    A stand-in for the descriptor of a block in a BlockStructure, with
+    the attributes that FieldDataCache needs in order to prefetch the
+    block's field data, which are determined from the block's class
+    without loading the block from the modulestore.
+    """
+    _mixologist = None
+
+    def __init__(self, usage_key, block_class, has_score):
+        self.location = usage_key
+        self.scope_ids = ScopeIds(None, usage_key.block_type, usage_key, usage_key)
+        self.entry_point = block_class.entry_point
+        self.fields = block_class.fields
+        self.has_score = has_score
+
+    @classmethod
+    def from_block_structure(cls, block_structure, usage_key):
+        """
+        Returns the BlockStructureBlock for the given block in the given
+        block structure.
+        """
+        block_class = cls.load_class(usage_key.block_type)
+        class_has_score = getattr(block_class, 'has_score', False)
+        has_score = block_structure.get_xblock_field(
+            usage_key,
+            'has_score',
+            class_has_score if isinstance(class_has_score, bool) else False,
+        )
+        return cls(usage_key, block_class, has_score)
+
+    @classmethod
+    def load_class(cls, block_type):
+        """
+        Returns the class of the given block type, mixed with the
+        XBlock mixins that the modulestore mixes into its blocks.
+        """
+        if cls._mixologist is None:
+            cls._mixologist = Mixologist(getattr(settings, 'XBLOCK_MIXINS', ()))
+        try:
+            block_class = XBlock.load_class(block_type, select=getattr(settings, 'XBLOCK_SELECT_FUNCTION', None))
+        except PluginMissingError:
+            block_class = XBlock
+        return cls._mixologist.mix(block_class)
+
+    @staticmethod
+    def has_required_modules(block_class):
+        """
+        Returns whether blocks of the given class may depend on
+        blocks that are not their descendants.
+        """
+        method = getattr(block_class, 'get_required_module_descriptors', None)
+        return method is not None and method.__func__ is not XModuleMixin.get_required_module_descriptors.__func__
+
+
 class DjangoKeyValueStore(KeyValueStore):
     """
     This KeyValueStore will read and write data in the following scopes to django models
@@ -776,6 +834,64 @@ class FieldDataCache(object):
 
         self.add_descriptors_to_cache(descriptors)
 
+    def add_block_structure_descendents(self, block_structure, usage_key, depth=None):
+        """
+        Add all descendants of the block with the given `usage_key` to this
+        FieldDataCache, as they are found in `block_structure`.
+
+        Unlike add_descriptor_descendents, the blocks are not loaded from the
+        modulestore, except for blocks that depend on other blocks that are
+        not their descendants, whose required blocks are added as well.
+
+        Arguments:
+            block_structure: A BlockStructure that contains the block
+            usage_key: The usage key of the block
+            depth is the number of levels of descendant blocks to load field data for, in addition to
+                the given block. If depth is None, load the field data of all descendants
+        """
+        blocks = []
+        required_modules_keys = []
+        visited = set()
+        level = [usage_key]
+        while level and (depth is None or depth >= 0):
+            next_level = []
+            for block_key in level:
+                if block_key in visited:
+                    continue
+                visited.add(block_key)
+                block = BlockStructureBlock.from_block_structure(block_structure, block_key)
+                blocks.append(block)
+                if BlockStructureBlock.has_required_modules(BlockStructureBlock.load_class(block_key.block_type)):
+                    required_modules_keys.append(block_key)
+                next_level.extend(block_structure.get_children(block_key))
+            level = next_level
+            if depth is not None:
+                depth -= 1
+
+        self.add_descriptors_to_cache(blocks)
+
+        if required_modules_keys:
+            store = modulestore()
+            with store.bulk_operations(usage_key.course_key):
+                for block_key in required_modules_keys:
+                    for required_descriptor in store.get_item(block_key).get_required_module_descriptors():
+                        self.add_descriptor_descendents(required_descriptor)
+
+    @classmethod
+    def cache_for_block_structure_descendents(cls, course_id, user, block_structure, usage_key, depth=None,
+                                              asides=None, read_only=False):
+        """
+        course_id: the course in the context of which we want StudentModules.
+        user: the django user for whom to load modules.
+        block_structure: a BlockStructure that contains the block with the given usage_key
+        usage_key: the usage key of the block
+        depth is the number of levels of descendant modules to load StudentModules for, in addition to
+            the given block. If depth is None, load all descendant StudentModules
+        """
+        cache = FieldDataCache([], course_id, user, asides=asides, read_only=read_only)
+        cache.add_block_structure_descendents(block_structure, usage_key, depth)
+        return cache
+
     @classmethod
     def cache_for_descriptor_descendents(cls, course_id, user, descriptor, depth=None,
                                          descriptor_filter=lambda descriptor: True,
@@ -988,6 +1104,31 @@ class ScoresClient(object):
         client.fetch_scores(scorable_locations)
         return client
 
+    @classmethod
+    def create_for_locations_and_users(cls, course_id, user_ids, scorable_locations):
+        """
+        Create a ScoresClient for each of the given users, with pre-fetched
+        data for the given locations, using a single query for all users.
+
+        Returns a dict mapping each user id to its ScoresClient.
+        """
+        clients = {user_id: cls(course_id, user_id) for user_id in user_ids}
+        scores_qset = StudentModule.objects.filter(
+            student_id__in=clients.keys(),
+            course_id=course_id,
+            module_state_key__in=set(scorable_locations),
+        )
+        for user_id, location, correct, total, created in scores_qset.values_list(
+                'student_id', 'module_state_key', 'grade', 'max_grade', 'created',
+        ):
+            # pylint: disable=protected-access
+            clients[user_id]._locations_to_scores[location.map_into_course(course_id)] = cls.Score(
+                correct, total, created,
+            )
+        for client in clients.itervalues():
+            client._has_fetched = True  # pylint: disable=protected-access
+        return clients
+
 
 # @contract(user_id=int, usage_key=UsageKey, score="number|None", max_score="number|None")
 def set_score(user_id, usage_key, score, max_score):
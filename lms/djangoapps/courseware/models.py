@@ -166,6 +166,10 @@ class StudentModule(models.Model):
         if not student.is_authenticated():
             return
         else:
+            from courseware.user_state_client import DjangoXBlockUserStateClient
+            DjangoXBlockUserStateClient(student, write_behind=False).write_pending(
+                student.username, [module_state_key],
+            )
             cls.objects.update_or_create(
                 student=student,
                 course_id=course_id,
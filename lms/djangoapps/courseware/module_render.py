@@ -13,7 +13,7 @@ from completion.models import BlockCompletion
 from completion import waffle as completion_waffle
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.cache import cache
+from django.core.cache import InvalidCacheBackendError, caches
 from django.middleware.csrf import CsrfViewMiddleware
 from django.template.context_processors import csrf
 from django.urls import reverse
@@ -38,6 +38,7 @@ from xblock.reference.plugins import FSService
 from xblock.runtime import KvsFieldData
 
 import static_replace
+from capa.safe_exec import SafeExecCache
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import get_user_role, has_access
 from courseware.access_response import IncorrectPartitionGroupError
@@ -49,6 +50,7 @@ from courseware.masquerade import (
     setup_masquerade
 )
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
+from courseware.toggles import PREFETCH_FROM_BLOCK_STRUCTURE, waffle
 from edxmako.shortcuts import render_to_string
 from eventtracking import tracker
 from lms.djangoapps.courseware.field_overrides import OverrideFieldData
@@ -58,6 +60,7 @@ from lms.djangoapps.lms_xblock.models import XBlockAsidesConfig
 from lms.djangoapps.lms_xblock.runtime import LmsModuleSystem
 from lms.djangoapps.verify_student.services import XBlockVerificationService
 from openedx.core.djangoapps.bookmarks.services import BookmarksService
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache_if_collected
 from openedx.core.djangoapps.crawlers.models import CrawlersConfig
 from openedx.core.djangoapps.credit.services import CreditService
 from openedx.core.djangoapps.util.user_utils import SystemUser
@@ -108,6 +111,36 @@ XQUEUE_INTERFACE = XQueueInterface(
     REQUESTS_AUTH,
 )
 
+_SAFE_EXEC_CACHE = None
+
+
+def _get_safe_exec_backend():
+    """
+    Returns the current thread's 'safe_exec' cache if there is one, so that safe_exec
+    results don't compete with everything else in the default cache.
+    """
+    try:
+        return caches['safe_exec']
+    except InvalidCacheBackendError:
+        return caches['default']
+
+
+def get_safe_exec_cache():
+    """
+    Returns the SafeExecCache which capa problems cache their safe_exec results in,
+    and which counts the hits, misses and sandbox time of every problem in this process.
+
+    Django's caches are per thread, so the backend is looked up on every access.
+    """
+    global _SAFE_EXEC_CACHE  # pylint: disable=global-statement
+    if _SAFE_EXEC_CACHE is None:
+        _SAFE_EXEC_CACHE = SafeExecCache(
+            _get_safe_exec_backend,
+            max_value_bytes=settings.SAFE_EXEC_CACHE_MAX_VALUE_BYTES,
+            local_max_bytes=settings.SAFE_EXEC_CACHE_LOCAL_MAX_BYTES,
+        )
+    return _SAFE_EXEC_CACHE
+
 # TODO: course_id and course_key are used interchangeably in this file, which is wrong.
 # Some brave person should make the variable names consistently someday, but the code's
 # coupled enough that it's kind of tricky--you've been warned!
@@ -804,7 +837,7 @@ def get_module_system_for_user(
         publish=publish,
         anonymous_student_id=anonymous_student_id,
         course_id=course_id,
-        cache=cache,
+        cache=get_safe_exec_cache(),
         can_execute_unsafe_code=(lambda: can_execute_unsafe_code(course_id)),
         get_python_lib_zip=(lambda: get_python_lib_zip(contentstore, course_id)),
         # TODO: When we merge the descriptor and module systems, we can stop reaching into the mixologist (cpennington)
@@ -1061,6 +1094,65 @@ def handle_xblock_callback(request, course_id, usage_id, handler, suffix=None):
         return _invoke_xblock_handler(request, course_id, usage_id, handler, suffix, course=course)
 
 
+def field_data_cache_for_descendents(course_id, user, descriptor, depth=None, read_only=False):
+    """
+    Returns a FieldDataCache with the field data of the given descriptor
+    and its descendants, down to the given depth.
+
+    When the PREFETCH_FROM_BLOCK_STRUCTURE switch is enabled, the
+    descendants are found in the course's cached block structure, so
+    that they don't need to be loaded from the modulestore.  The course
+    is never collected for this: if it isn't in the cache, the
+    descendants are loaded from the modulestore as usual.
+    """
+    block_structure = _block_structure_for_prefetch(course_id, descriptor.location)
+    if block_structure is not None:
+        return FieldDataCache.cache_for_block_structure_descendents(
+            course_id,
+            user,
+            block_structure,
+            descriptor.location,
+            depth=depth,
+            read_only=read_only,
+        )
+    return FieldDataCache.cache_for_descriptor_descendents(
+        course_id,
+        user,
+        descriptor,
+        depth=depth,
+        read_only=read_only,
+    )
+
+
+def add_descendents_to_field_data_cache(field_data_cache, descriptor, depth=None):
+    """
+    Adds the field data of the given descriptor and its descendants,
+    down to the given depth, to the given FieldDataCache.
+
+    Like field_data_cache_for_descendents, the descendants are found in
+    the course's cached block structure when the
+    PREFETCH_FROM_BLOCK_STRUCTURE switch is enabled and the course is
+    collected.
+    """
+    block_structure = _block_structure_for_prefetch(field_data_cache.course_id, descriptor.location)
+    if block_structure is not None:
+        field_data_cache.add_block_structure_descendents(block_structure, descriptor.location, depth=depth)
+    else:
+        field_data_cache.add_descriptor_descendents(descriptor, depth=depth)
+
+
+def _block_structure_for_prefetch(course_id, usage_key):
+    """
+    Returns the course's cached block structure if field data should be
+    prefetched from it for the block with the given usage_key, or None.
+    """
+    if waffle().is_enabled(PREFETCH_FROM_BLOCK_STRUCTURE):
+        block_structure = get_course_in_cache_if_collected(course_id)
+        if block_structure is not None and usage_key in block_structure:
+            return block_structure
+    return None
+
+
 def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_info=False, course=None):
     """
     Gets a module instance based on its `usage_id` in a course, for a given request/user
@@ -1100,7 +1192,7 @@ def get_module_by_usage_id(request, course_id, usage_id, disable_staff_debug_inf
         tracking_context['module']['original_usage_version'] = unicode(descriptor_orig_version)
 
     unused_masquerade, user = setup_masquerade(request, course_id, has_access(user, 'staff', descriptor, course_id))
-    field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+    field_data_cache = field_data_cache_for_descendents(
         course_id,
         user,
         descriptor,
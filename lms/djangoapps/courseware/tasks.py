@@ -0,0 +1,35 @@
+"""
+Asynchronous tasks for the courseware app.
+"""
+from celery import task
+from celery_utils.persist_on_failure import LoggedPersistOnFailureTask
+from django.db.utils import DatabaseError
+
+from courseware.user_state_client import DjangoXBlockUserStateClient
+
+RETRY_DELAY_SECONDS = 30
+# How many times a flush waits for earlier state changes to the same blocks
+# to be written by the tasks that recorded them, before writing its own anyway.
+MAX_IN_ORDER_ATTEMPTS = 10
+
+
+@task(bind=True, base=LoggedPersistOnFailureTask, max_retries=None, default_retry_delay=RETRY_DELAY_SECONDS)
+def flush_pending_user_state(self, username, block_states):
+    """
+    Writes XBlock user state changes recorded by a write-behind
+    DjangoXBlockUserStateClient to the database.  See
+    DjangoXBlockUserStateClient.flush_pending.
+
+    The state changes only exist in the cache and in this task, so it
+    retries until they are written, rather than giving up.
+    """
+    in_order = self.request.retries < MAX_IN_ORDER_ATTEMPTS
+    try:
+        remaining = DjangoXBlockUserStateClient(write_behind=False).flush_pending(username, block_states, in_order)
+    except DatabaseError as exc:
+        raise self.retry(exc=exc)
+    if remaining:
+        raise self.retry(
+            kwargs={'username': username, 'block_states': remaining},
+            countdown=DjangoXBlockUserStateClient.WRITE_BEHIND_DELAY_SECONDS,
+        )
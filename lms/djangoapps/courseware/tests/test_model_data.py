@@ -4,6 +4,7 @@ Test for lms courseware app, module data (runtime data storage for XBlocks)
 import json
 from functools import partial
 
+import ddt
 from django.db import DatabaseError
 from django.test import TestCase
 from mock import Mock, patch
@@ -26,8 +27,12 @@ from courseware.tests.factories import (
     course_id,
     location
 )
+from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
 from openedx.core.lib.tests import attr
 from student.tests.factories import UserFactory
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
 
 
 def mock_field(scope, name):
@@ -434,3 +439,41 @@ class TestStudentInfoStorage(OtherUserFailureTestMixin, StorageTestBase, TestCas
     storage_class = XModuleStudentInfoField
     other_key_factory = partial(DjangoKeyValueStore.Key, Scope.user_info, 2, 'mock_problem')  # user_id=2, not 1
     existing_field_name = "existing_field"
+
+
+@ddt.ddt
+class TestBlockStructurePrefetch(ModuleStoreTestCase):
+    """
+    Tests for prefetching field data using a course's block structure.
+    """
+    def setUp(self):
+        super(TestBlockStructurePrefetch, self).setUp()
+        self.user = UserFactory.create()
+        self.course = CourseFactory.create()
+        self.chapter = ItemFactory.create(parent=self.course, category='chapter')
+        self.sequential = ItemFactory.create(parent=self.chapter, category='sequential')
+        self.vertical = ItemFactory.create(parent=self.sequential, category='vertical')
+        self.problems = [ItemFactory.create(parent=self.vertical, category='problem') for _ in range(2)]
+        for problem in self.problems:
+            cmfStudentModuleFactory.create(
+                student=self.user,
+                course_id=self.course.id,
+                module_state_key=problem.location,
+                state=json.dumps({'attempts': 1}),
+            )
+
+    @ddt.data(None, 0, 1, 3)
+    def test_same_as_descriptor_descendents(self, depth):
+        descriptor = modulestore().get_item(self.chapter.location)
+        descriptor_cache = FieldDataCache.cache_for_descriptor_descendents(
+            self.course.id, self.user, descriptor, depth=depth,
+        )
+        block_structure_cache = FieldDataCache.cache_for_block_structure_descendents(
+            self.course.id, self.user, get_course_in_cache(self.course.id), self.chapter.location, depth=depth,
+        )
+        self.assertEqual(block_structure_cache.scorable_locations, descriptor_cache.scorable_locations)
+        for problem in self.problems:
+            key = DjangoKeyValueStore.Key(Scope.user_state, self.user.id, problem.location, 'attempts')
+            self.assertEqual(block_structure_cache.has(key), descriptor_cache.has(key))
+            if descriptor_cache.has(key):
+                self.assertEqual(block_structure_cache.get(key), 1)
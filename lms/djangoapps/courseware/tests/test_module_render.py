@@ -4,6 +4,7 @@ Test for lms courseware app, module render unit
 """
 import itertools
 import json
+import threading
 from datetime import datetime
 from functools import partial
 
@@ -43,6 +44,7 @@ from xblock.runtime import (
 )
 from xblock.test.tools import TestRuntime
 
+from capa.safe_exec import SafeExecCache
 from capa.tests.response_xml_factory import OptionResponseXMLFactory
 from course_modes.models import CourseMode
 from courseware import module_render as render
@@ -55,8 +57,14 @@ from courseware.module_render import get_module_for_descriptor, hash_resource
 from courseware.tests.factories import GlobalStaffFactory, StudentModuleFactory, UserFactory, RequestFactoryNoCsrf
 from courseware.tests.test_submitting_problems import TestSubmittingProblems
 from courseware.tests.tests import LoginEnrollmentTestCase
+from courseware.toggles import PREFETCH_FROM_BLOCK_STRUCTURE, waffle as courseware_waffle
 from lms.djangoapps.lms_xblock.field_data import LmsFieldData
 from lms.djangoapps.courseware.field_overrides import OverrideFieldData
+from openedx.core.djangoapps.content.block_structure.api import (
+    clear_course_from_cache,
+    get_course_in_cache,
+    get_course_in_cache_if_collected,
+)
 from openedx.core.djangoapps.credit.api import set_credit_requirement_status, set_credit_requirements
 from openedx.core.djangoapps.credit.models import CreditCourse
 from openedx.core.lib.courses import course_image_url
@@ -2400,6 +2408,85 @@ class LMSXBlockServiceBindingTest(SharedModuleStoreTestCase):
         self.assertFalse(runtime.user_is_beta_tester)
         self.assertEqual(runtime.days_early_for_beta, 5)
 
+    def test_safe_exec_cache(self):
+        """
+        Tests that the runtimes share a SafeExecCache, which keeps the stats of every problem.
+        """
+        descriptor = ItemFactory(category="pure", parent=self.course)
+        runtimes = [
+            render.get_module_system_for_user(
+                self.user,
+                self.student_data,
+                descriptor,
+                self.course.id,
+                self.track_function,
+                self.xqueue_callback_url_prefix,
+                self.request_token,
+                course=self.course
+            )[0]
+            for __ in range(2)
+        ]
+        self.assertIsInstance(runtimes[0].cache, SafeExecCache)
+        self.assertIs(runtimes[0].cache, runtimes[1].cache)
+
+        # Each thread stores results with its own instance of the cache backend.
+        backends = []
+        thread = threading.Thread(target=lambda: backends.append(runtimes[0].cache.backend))
+        thread.start()
+        thread.join()
+        self.assertIsNot(backends[0], runtimes[0].cache.backend)
+        self.assertIs(runtimes[0].cache.backend, runtimes[0].cache.backend)
+
+
+@ddt.ddt
+class TestFieldDataCacheForDescendents(SharedModuleStoreTestCase):
+    """
+    Tests for field_data_cache_for_descendents.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super(TestFieldDataCacheForDescendents, cls).setUpClass()
+        cls.course = CourseFactory.create()
+        cls.chapter = ItemFactory.create(parent=cls.course, category='chapter')
+
+    def setUp(self):
+        super(TestFieldDataCacheForDescendents, self).setUp()
+        self.user = UserFactory()
+
+    @ddt.data(True, False)
+    def test_prefetch_from_block_structure(self, collected):
+        clear_course_from_cache(self.course.id)
+        if collected:
+            get_course_in_cache(self.course.id)
+        with courseware_waffle().override(PREFETCH_FROM_BLOCK_STRUCTURE, active=True):
+            with patch.object(
+                FieldDataCache, 'cache_for_block_structure_descendents', wraps=FieldDataCache.cache_for_block_structure_descendents,
+            ) as mock_from_block_structure:
+                render.field_data_cache_for_descendents(self.course.id, self.user, self.course, depth=1)
+
+        self.assertEqual(mock_from_block_structure.called, collected)
+        # A course that isn't collected is not collected during the request.
+        self.assertEqual(get_course_in_cache_if_collected(self.course.id) is not None, collected)
+
+    @ddt.data(True, False)
+    def test_add_descendents_from_block_structure(self, collected):
+        clear_course_from_cache(self.course.id)
+        if collected:
+            get_course_in_cache(self.course.id)
+        field_data_cache = FieldDataCache([], self.course.id, self.user)
+        with courseware_waffle().override(PREFETCH_FROM_BLOCK_STRUCTURE, active=True):
+            with patch.object(
+                FieldDataCache, 'add_block_structure_descendents', wraps=field_data_cache.add_block_structure_descendents,
+            ) as mock_from_block_structure:
+                with patch.object(
+                    FieldDataCache, 'add_descriptor_descendents', wraps=field_data_cache.add_descriptor_descendents,
+                ) as mock_from_descriptors:
+                    render.add_descendents_to_field_data_cache(field_data_cache, self.chapter)
+
+        self.assertEqual(mock_from_block_structure.called, collected)
+        self.assertEqual(mock_from_descriptors.called, not collected)
+        self.assertEqual(get_course_in_cache_if_collected(self.course.id) is not None, collected)
+
 
 class PureXBlockWithChildren(PureXBlock):
     """
@@ -3,10 +3,17 @@ Black-box tests of the DjangoUserStateClient against the semantics
 defined in edx_user_state_client.
 """
 
+import json
 from collections import defaultdict
 
+from django.core.cache import cache
+from django.db.utils import DatabaseError
 from edx_user_state_client.tests import UserStateClientTestBase
+from mock import patch
+from opaque_keys.edx.locator import CourseLocator
 
+from courseware.models import StudentModule
+from courseware.tasks import flush_pending_user_state
 from courseware.tests.factories import UserFactory
 from courseware.user_state_client import DjangoXBlockUserStateClient
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
@@ -34,3 +41,198 @@ class TestDjangoUserStateClient(UserStateClientTestBase, ModuleStoreTestCase):
         super(TestDjangoUserStateClient, self).setUp()
         self.client = DjangoXBlockUserStateClient()
         self.users = defaultdict(UserFactory.create)
+
+
+class TestDjangoUserStateClientWriteBehind(TestDjangoUserStateClient):
+    """
+    Tests of the DjangoUserStateClient backend in write-behind mode,
+    with the state changes flushed as soon as they are made.
+    It reuses all tests from :class:`~UserStateClientTestBase`.
+    """
+    def setUp(self):
+        super(TestDjangoUserStateClientWriteBehind, self).setUp()
+        cache.clear()
+        self.client = DjangoXBlockUserStateClient(write_behind=True)
+        patcher = patch.object(
+            flush_pending_user_state,
+            'apply_async',
+            side_effect=lambda kwargs, countdown: flush_pending_user_state.apply(kwargs=kwargs),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestWriteBehind(ModuleStoreTestCase):
+    """
+    Tests of the pending state changes of the DjangoUserStateClient
+    backend in write-behind mode.
+    """
+    shard = 4
+
+    def setUp(self):
+        super(TestWriteBehind, self).setUp()
+        cache.clear()
+        self.user = UserFactory.create()
+        self.client = DjangoXBlockUserStateClient(self.user, write_behind=True)
+        self.block_key = CourseLocator('edX', 'WriteBehind', 'Run').make_usage_key('problem', 'problem')
+        patcher = patch.object(flush_pending_user_state, 'apply_async')
+        self.mock_apply_async = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _flush(self, call_index):
+        """
+        Runs the flush task enqueued by the set_many call with the given index.
+        """
+        flush_pending_user_state.apply(kwargs=self.mock_apply_async.call_args_list[call_index][1]['kwargs'])
+
+    def _stored_state(self):
+        """
+        Returns the state of the block stored in the database.
+        """
+        student_module = StudentModule.objects.get(student=self.user, module_state_key=self.block_key)
+        return json.loads(student_module.state)
+
+    def _evict(self, kind, version=None):
+        """
+        Evicts the given kind of write-behind cache entry of the block.
+        """
+        cache.delete(DjangoXBlockUserStateClient._write_behind_cache_key(  # pylint: disable=protected-access
+            kind, self.user.username, self.block_key, version,
+        ))
+
+    def _pending_version(self, call_index):
+        """
+        Returns the version of the state changes of the set_many call with the given index.
+        """
+        block_states = self.mock_apply_async.call_args_list[call_index][1]['kwargs']['block_states']
+        return block_states[unicode(self.block_key)][1]
+
+    def test_first_write_is_synchronous(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.assertEqual(self._stored_state(), {'a': 1})
+        self.assertFalse(self.mock_apply_async.called)
+
+    def test_read_your_writes(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(self.user.username, self.block_key, {'b': 2})
+        self.client.set(self.user.username, self.block_key, {'c': 3})
+        self.assertEqual(self._stored_state(), {'a': 1})
+        self.assertEqual(self.client.get(self.user.username, self.block_key).state, {'a': 1, 'b': 2, 'c': 3})
+
+        self._flush(1)
+        self.assertEqual(self._stored_state(), {'a': 1, 'b': 2, 'c': 3})
+        self.assertEqual(self.client.get(self.user.username, self.block_key).state, {'a': 1, 'b': 2, 'c': 3})
+
+    def test_superseded_flush(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(self.user.username, self.block_key, {'a': 2})
+        self.client.set(self.user.username, self.block_key, {'a': 3})
+        self._flush(1)
+        self._flush(0)
+        self.assertEqual(self._stored_state(), {'a': 3})
+
+        self.client.set(self.user.username, self.block_key, {'b': 4})
+        self.assertEqual(self.client.get(self.user.username, self.block_key).state, {'a': 3, 'b': 4})
+        self._flush(2)
+        self.assertEqual(self._stored_state(), {'a': 3, 'b': 4})
+
+    def test_versions_are_distinct(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        # Another process changing the same block concurrently.
+        DjangoXBlockUserStateClient(write_behind=True).set(self.user.username, self.block_key, {'b': 2})
+        self.client.set(self.user.username, self.block_key, {'c': 3})
+        self.assertEqual(self._pending_version(1), self._pending_version(0) + 1)
+
+        self._flush(1)
+        self.assertEqual(self._stored_state(), {'a': 1, 'b': 2, 'c': 3})
+
+    def test_flush_in_order(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(self.user.username, self.block_key, {'a': 2})
+        self.client.set(self.user.username, self.block_key, {'a': 3})
+        self._evict('change', self._pending_version(0))
+
+        # The earlier changes are only known to their own task, which writes them first.
+        later_states = self.mock_apply_async.call_args_list[1][1]['kwargs']['block_states']
+        self.assertEqual(self.client.flush_pending(self.user.username, later_states), later_states)
+        self.assertEqual(self._stored_state(), {'a': 1})
+
+        self._flush(0)
+        self.assertEqual(self._stored_state(), {'a': 3})
+        self.assertEqual(self.client.flush_pending(self.user.username, later_states), {})
+        self.assertEqual(self._stored_state(), {'a': 3})
+
+    def test_flush_out_of_order_eventually(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(self.user.username, self.block_key, {'b': 2})
+        self.client.set(self.user.username, self.block_key, {'c': 3})
+        self._evict('change', self._pending_version(0))
+
+        # The task retries until it gives up waiting for the earlier changes.
+        self._flush(1)
+        self.assertEqual(self._stored_state(), {'a': 1, 'c': 3})
+
+    def test_evicted_version(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(self.user.username, self.block_key, {'a': 2, 'b': 2})
+        self._evict('version')
+
+        # The pending changes are written along with the new ones.
+        self.client.set(self.user.username, self.block_key, {'a': 3})
+        self.assertEqual(self._stored_state(), {'a': 3, 'b': 2})
+
+        # The task in flight for the earlier changes doesn't write them over the new ones.
+        self._flush(0)
+        self.assertEqual(self._stored_state(), {'a': 3, 'b': 2})
+
+        self.client.set(self.user.username, self.block_key, {'c': 4})
+        self.assertGreater(self._pending_version(1), self._pending_version(0))
+        self._flush(1)
+        self.assertEqual(self._stored_state(), {'a': 3, 'b': 2, 'c': 4})
+
+    def test_flush_retries_database_errors(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(self.user.username, self.block_key, {'a': 2})
+        with patch.object(
+            DjangoXBlockUserStateClient,
+            'flush_pending',
+            autospec=True,
+            side_effect=[DatabaseError] * 3 + [{}],
+        ) as mock_flush_pending:
+            self._flush(0)
+        self.assertEqual(mock_flush_pending.call_count, 4)
+
+    def test_direct_write_before_flush(self):
+        self.client.set(self.user.username, self.block_key, {'attempts': 1, 'a': 1})
+        self.client.set(self.user.username, self.block_key, {'attempts': 2})
+        # e.g. an instructor resetting the attempts, which reads and writes the StudentModule directly
+        state = self._stored_state()
+        self.assertEqual(state, {'attempts': 1, 'a': 1})
+        self.assertTrue(self.client.write_pending(self.user.username, [self.block_key]))
+        state = self._stored_state()
+        state['attempts'] = 0
+        StudentModule.save_state(self.user, self.block_key.course_key, self.block_key, {'state': json.dumps(state)})
+
+        # The pending change was written before the direct write, not over it.
+        self._flush(0)
+        self.assertEqual(self._stored_state(), {'attempts': 0, 'a': 1})
+        self.assertEqual(self.client.get(self.user.username, self.block_key).state, {'attempts': 0, 'a': 1})
+        self.assertFalse(self.client.write_pending(self.user.username, [self.block_key]))
+
+    def test_save_state_writes_pending(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(self.user.username, self.block_key, {'b': 2})
+        StudentModule.save_state(self.user, self.block_key.course_key, self.block_key, {'max_grade': 3})
+        self.assertEqual(self._stored_state(), {'a': 1, 'b': 2})
+        self._flush(0)
+        student_module = StudentModule.objects.get(student=self.user, module_state_key=self.block_key)
+        self.assertEqual(json.loads(student_module.state), {'a': 1, 'b': 2})
+        self.assertEqual(student_module.max_grade, 3)
+
+    def test_delete_pending(self):
+        self.client.set(self.user.username, self.block_key, {'a': 1})
+        self.client.set(self.user.username, self.block_key, {'b': 2})
+        self.client.delete(self.user.username, self.block_key, fields=['a'])
+        self._flush(0)
+        self.assertEqual(self._stored_state(), {'b': 2})
+        self.assertEqual(self.client.get(self.user.username, self.block_key).state, {'b': 2})
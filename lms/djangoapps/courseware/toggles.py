@@ -0,0 +1,22 @@
+"""
+Waffle switches for the courseware app.
+"""
+from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
+
+# Namespace
+WAFFLE_NAMESPACE = u'courseware'
+
+# Switches
+# Prefetch field data using the course's cached block structure, rather than
+# by loading the descendants of the requested block from the modulestore.
+PREFETCH_FROM_BLOCK_STRUCTURE = u'prefetch_from_block_structure'
+# Acknowledge XBlock user state changes before they are written to the
+# database, and write them asynchronously in batches.
+USER_STATE_WRITE_BEHIND = u'user_state_write_behind'
+
+
+def waffle():
+    """
+    Returns the namespaced, cached, audited Waffle class for Courseware.
+    """
+    return WaffleSwitchNamespace(name=WAFFLE_NAMESPACE, log_prefix=u'Courseware: ')
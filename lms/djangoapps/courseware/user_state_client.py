@@ -3,21 +3,26 @@ An implementation of :class:`XBlockUserStateClient`, which stores XBlock Scope.u
 data in a Django ORM model.
 """
 
+import hashlib
 import itertools
 import logging
 from operator import attrgetter
-from time import time
+from time import sleep, time
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.paginator import Paginator
 from django.contrib.auth.models import User
 from django.db import transaction
 from django.db.utils import IntegrityError
+from django.utils import timezone
 from edx_django_utils import monitoring as monitoring_utils
 from edx_user_state_client.interface import XBlockUserState, XBlockUserStateClient
+from opaque_keys.edx.keys import CourseKey, UsageKey
 from xblock.fields import Scope
 
 from courseware.models import BaseStudentModuleHistory, StudentModule
+from courseware.toggles import USER_STATE_WRITE_BEHIND, waffle
 
 try:
     import simplejson as json
@@ -51,6 +56,17 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
     # Use this sample rate for DataDog events.
     API_DATADOG_SAMPLE_RATE = 0.1
 
+    # Delay before state changes recorded in write-behind mode are flushed to
+    # the database, during which later changes to the same blocks supersede them.
+    WRITE_BEHIND_DELAY_SECONDS = 2
+    # How long pending state changes, and the versions that were flushed, are
+    # kept in the cache.  Must outlast any delay in running the flush tasks.
+    WRITE_BEHIND_TIMEOUT_SECONDS = 60 * 60
+    # How long a process writing pending state changes to a block may hold its lock.
+    WRITE_BEHIND_LOCK_SECONDS = 60
+    # The most pending versions of the state changes to a block that are read.
+    WRITE_BEHIND_MAX_PENDING_VERSIONS = 100
+
     class ServiceUnavailable(XBlockUserStateClient.ServiceUnavailable):
         """
         This error is raised if the service backing this client is currently unavailable.
@@ -69,14 +85,22 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         """
         pass
 
-    def __init__(self, user=None):
+    def __init__(self, user=None, write_behind=None):
         """
         Arguments:
             user (:class:`~User`): An already-loaded django user. If this user matches the username
                 supplied to `set_many`, then that will reduce the number of queries made to store
                 the user state.
+            write_behind (bool): Whether `set_many` only records the state changes as pending
+                in the cache, and enqueues a task to write them to the database. Pending
+                changes are included in the state returned by `get_many`, so that they can
+                be read back before they are written. Defaults to whether the
+                USER_STATE_WRITE_BEHIND waffle switch is enabled.
         """
         self.user = user
+        if write_behind is None:
+            write_behind = waffle().is_enabled(USER_STATE_WRITE_BEHIND)
+        self.write_behind = write_behind
 
     def _get_student_modules(self, username, block_keys):
         """
@@ -175,13 +199,22 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         # keep track of blocks requested
         self._nr_stat_accumulate('get_many', 'blocks_requested', len(block_keys))
 
+        pending_entries = self._get_pending_entries(username, block_keys) if self.write_behind else {}
+
         modules = self._get_student_modules(username, block_keys)
         for module, usage_key in modules:
-            if module.state is None:
+            pending_entry = pending_entries.pop(usage_key, None)
+            if module.state is None and pending_entry is None:
                 continue
 
-            state = json.loads(module.state)
-            state_length = len(module.state)
+            state = json.loads(module.state) if module.state is not None else {}
+            state_length = len(module.state or '')
+            modified = module.modified
+
+            # Overlay the state changes that aren't written to the database yet.
+            if pending_entry is not None:
+                state.update(pending_entry['state'])
+                modified = pending_entry['updated']
 
             # If the state is the empty dict, then it has been deleted, and so
             # conformant UserStateClients should treat it as if it doesn't exist.
@@ -193,14 +226,13 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             self._nr_block_stat_accumulate('get_many', usage_key.block_type, 'size', state_length)
             total_block_count += 1
 
-            # filter state on fields
-            if fields is not None:
-                state = {
-                    field: state[field]
-                    for field in fields
-                    if field in state
-                }
-            yield XBlockUserState(username, usage_key, state, module.modified, scope)
+            yield XBlockUserState(username, usage_key, self._filter_fields(state, fields), modified, scope)
+
+        # Blocks whose state isn't written to the database at all yet.
+        for usage_key, pending_entry in pending_entries.iteritems():
+            yield XBlockUserState(
+                username, usage_key, self._filter_fields(pending_entry['state'], fields), pending_entry['updated'], scope,
+            )
 
         # The rest of this method exists only to report metrics.
         finish_time = time()
@@ -239,6 +271,10 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
             # what we have.
             return
 
+        if self.write_behind:
+            self._set_many_pending(username, block_keys_to_state)
+            return
+
         evt_time = time()
 
         for usage_key, state in block_keys_to_state.items():
@@ -322,6 +358,11 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
+        if self.write_behind:
+            # Write any pending state changes first, so that they
+            # aren't written after the deletion.
+            self.write_pending(username, block_keys)
+
         evt_time = time()
         student_modules = self._get_student_modules(username, block_keys)
         for student_module, _ in student_modules:
@@ -341,6 +382,289 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         # Event for the entire delete_many call.
         finish_time = time()
 
+    def flush_pending(self, username, block_states, in_order=True):
+        """
+        Write state changes recorded in write-behind mode to the database,
+        along with any later changes to the same blocks that are pending,
+        unless they have already been written.
+
+        The changes to a block are written in the order of their versions.
+
+        Arguments:
+            username: The name of the user whose state should be written
+            block_states (dict): A dict mapping serialized UsageKeys to
+                (serialized CourseKey, version, state dict) lists, as
+                recorded by `set_many`.
+            in_order (bool): If False, the changes are written even if earlier
+                changes to the same blocks are still pending, but missing from
+                the cache, so that they could only be written by the task that
+                recorded them.
+
+        Returns:
+            A dict of the entries of `block_states` that couldn't be written
+            yet, because earlier changes to their blocks have to be written
+            first, or because another process is writing changes to them.
+        """
+        remaining = {}
+        for usage_id, (course_id, version, state) in block_states.iteritems():
+            usage_key = UsageKey.from_string(usage_id).map_into_course(CourseKey.from_string(course_id))
+            if not self._write_pending(username, usage_key, {version: {'state': state}}, in_order=in_order):
+                remaining[usage_id] = [course_id, version, state]
+        return remaining
+
+    def write_pending(self, username, block_keys):
+        """
+        Write the state changes to the given blocks that were recorded in
+        write-behind mode and are still pending to the database, without
+        waiting for the tasks that will flush them.
+
+        Code that reads and writes StudentModules directly, rather than
+        through this client, must call this first, so that the pending
+        changes are neither missing from the state it reads, nor written
+        over its own changes later.
+
+        Arguments:
+            username: The name of the user whose state should be written
+            block_keys (list): The UsageKeys of the blocks whose state should be written
+
+        Returns:
+            Whether any pending changes were written.
+        """
+        pending_block_keys = [
+            usage_key
+            for usage_key, (__, changes) in self._get_pending_changes(username, block_keys).iteritems()
+            if changes
+        ]
+        for usage_key in pending_block_keys:
+            self._write_pending(username, usage_key, in_order=False, wait=True)
+        return bool(pending_block_keys)
+
+    def _set_many_pending(self, username, block_keys_to_state):
+        """
+        Record the given state changes as pending in the cache, and
+        enqueue a task to write them to the database.
+
+        Each change is recorded under a version of its block, allocated
+        atomically in the cache.  The changes to blocks that have no
+        version in the cache, because they weren't changed recently or the
+        version was evicted, are written synchronously instead.
+        """
+        from courseware.tasks import flush_pending_user_state
+
+        updated = timezone.now()
+        new_changes = {}
+        block_states = {}
+        for usage_key, state in block_keys_to_state.iteritems():
+            version = self._next_pending_version(username, usage_key)
+            if version is None:
+                self._set_synchronously(username, usage_key, state)
+                continue
+
+            new_changes[self._write_behind_cache_key('change', username, usage_key, version)] = {
+                'state': state,
+                'updated': updated,
+            }
+            block_states[unicode(usage_key)] = [unicode(usage_key.course_key), version, state]
+            self._nr_block_stat_increment('set_many', usage_key.block_type, 'blocks_pending')
+
+        if not block_states:
+            return
+
+        cache.set_many(new_changes, self.WRITE_BEHIND_TIMEOUT_SECONDS)
+        flush_pending_user_state.apply_async(
+            kwargs={'username': username, 'block_states': block_states},
+            countdown=self.WRITE_BEHIND_DELAY_SECONDS,
+        )
+
+    def _next_pending_version(self, username, usage_key):
+        """
+        Return the next version of the pending state changes to the given block,
+        or None if the block has no version in the cache.
+        """
+        try:
+            return cache.incr(self._write_behind_cache_key('version', username, usage_key))
+        except ValueError:
+            return None
+
+    def _set_synchronously(self, username, usage_key, state):
+        """
+        Write the given state changes to the given block to the database, after any
+        of its pending changes still in the cache, and start versioning its later
+        changes.
+
+        Versions are started from the current time in milliseconds, rather than
+        from 1, so that they keep increasing after the previous version of the
+        block is evicted from the cache, and so that flush tasks still in flight
+        for earlier versions don't write their changes over these ones.
+        """
+        self._write_pending(username, usage_key, in_order=False, wait=True)
+        DjangoXBlockUserStateClient(self.user, write_behind=False).set_many(username, {usage_key: state})
+
+        flushed_version = cache.get(self._write_behind_cache_key('flushed', username, usage_key))
+        base_version = max(int(time() * 1000), flushed_version or 0)
+        if cache.add(
+            self._write_behind_cache_key('version', username, usage_key), base_version, self.WRITE_BEHIND_TIMEOUT_SECONDS
+        ):
+            cache.set(
+                self._write_behind_cache_key('flushed', username, usage_key), base_version, self.WRITE_BEHIND_TIMEOUT_SECONDS
+            )
+
+    def _write_pending(self, username, usage_key, known_changes=None, in_order=True, wait=False):
+        """
+        Write the pending state changes to the given block to the database, in
+        the order of their versions, and record the last version written.
+
+        Arguments:
+            username: The name of the user whose state should be written
+            usage_key (UsageKey): The block whose state should be written
+            known_changes (dict): Pending changes to the block, by version, which
+                may be missing from the cache.
+            in_order (bool): If False, changes are written even if earlier
+                changes are missing from the cache.
+            wait (bool): Whether to wait for another process writing changes to
+                the block, rather than giving up.
+
+        Returns:
+            Whether all of `known_changes` have been written.
+        """
+        lock_key = self._write_behind_cache_key('lock', username, usage_key)
+        locked = cache.add(lock_key, True, self.WRITE_BEHIND_LOCK_SECONDS)
+        attempts = self.WRITE_BEHIND_LOCK_SECONDS * 10 if wait else 0
+        while not locked and attempts:
+            sleep(0.1)
+            attempts -= 1
+            locked = cache.add(lock_key, True, self.WRITE_BEHIND_LOCK_SECONDS)
+        if not locked:
+            return False
+
+        try:
+            flushed_version, changes = self._get_pending_changes(username, [usage_key]).get(usage_key, (None, {}))
+            changes.update(known_changes or {})
+            versions = sorted(
+                version for version in changes
+                if flushed_version is None or version > flushed_version
+            )
+            if in_order and flushed_version is not None:
+                # Stop before the first change that is missing from the cache.
+                versions = [
+                    version for index, version in enumerate(versions)
+                    if version == flushed_version + index + 1
+                ]
+
+            if versions:
+                state = {}
+                for version in versions:
+                    state.update(changes[version]['state'])
+                DjangoXBlockUserStateClient(self.user, write_behind=False).set_many(username, {usage_key: state})
+                flushed_version = versions[-1]
+                cache.set(
+                    self._write_behind_cache_key('flushed', username, usage_key),
+                    flushed_version,
+                    self.WRITE_BEHIND_TIMEOUT_SECONDS,
+                )
+                cache.delete_many([
+                    self._write_behind_cache_key('change', username, usage_key, version) for version in versions
+                ])
+        finally:
+            cache.delete(lock_key)
+
+        return all(
+            flushed_version is not None and version <= flushed_version
+            for version in (known_changes or {})
+        )
+
+    def _get_pending_changes(self, username, block_keys):
+        """
+        Return a dict mapping the given UsageKeys to their last version that was
+        written to the database, or None if it isn't known, and a dict of their
+        later state changes that are pending in the cache, by version.
+
+        A pending change is a dict with the changed 'state' and when it was
+        'updated'.  Blocks with neither are left out.
+        """
+        block_keys = list(block_keys)
+        cached_versions = cache.get_many(
+            [self._write_behind_cache_key('version', username, usage_key) for usage_key in block_keys] +
+            [self._write_behind_cache_key('flushed', username, usage_key) for usage_key in block_keys]
+        )
+
+        change_cache_keys = {}
+        flushed_versions = {}
+        for usage_key in block_keys:
+            latest_version = cached_versions.get(self._write_behind_cache_key('version', username, usage_key))
+            flushed_version = cached_versions.get(self._write_behind_cache_key('flushed', username, usage_key))
+            if latest_version is None and flushed_version is None:
+                continue
+
+            flushed_versions[usage_key] = flushed_version
+            # Without the latest version, look for the changes recorded before
+            # it was evicted, which follow the last version written.
+            if latest_version is None:
+                latest_version = flushed_version + self.WRITE_BEHIND_MAX_PENDING_VERSIONS
+            first_version = latest_version - self.WRITE_BEHIND_MAX_PENDING_VERSIONS + 1
+            if flushed_version is not None:
+                first_version = max(first_version, flushed_version + 1)
+            for version in xrange(first_version, latest_version + 1):
+                change_cache_keys[self._write_behind_cache_key('change', username, usage_key, version)] = (
+                    usage_key, version,
+                )
+
+        cached_changes = cache.get_many(change_cache_keys.keys())
+        pending_changes = {usage_key: (flushed_versions[usage_key], {}) for usage_key in flushed_versions}
+        for cache_key, change in cached_changes.iteritems():
+            usage_key, version = change_cache_keys[cache_key]
+            pending_changes[usage_key][1][version] = change
+        return pending_changes
+
+    def _get_pending_entries(self, username, block_keys):
+        """
+        Return a dict mapping the given UsageKeys to their pending state
+        changes in the cache, for the blocks that have any.
+
+        An entry is a dict with all the pending 'state' changes, and when
+        they were last 'updated'.
+        """
+        pending_entries = {}
+        for usage_key, (__, changes) in self._get_pending_changes(username, block_keys).iteritems():
+            if not changes:
+                continue
+            state = {}
+            for version in sorted(changes):
+                state.update(changes[version]['state'])
+            pending_entries[usage_key] = {'state': state, 'updated': changes[max(changes)]['updated']}
+        return pending_entries
+
+    @staticmethod
+    def _write_behind_cache_key(kind, username, usage_key, version=None):
+        """
+        Return the cache key of the given kind of write-behind entry for the
+        given user and block:
+
+            'version': The latest version of its state changes.
+            'flushed': The last version of its state changes written to the database.
+            'change': The state changes of the given version.
+            'lock': Held while its state changes are written to the database.
+        """
+        key = u'courseware.user_state.{}.{}'.format(
+            kind, hashlib.sha1(u'{}|{}'.format(username, usage_key).encode('utf-8')).hexdigest()
+        )
+        if version is not None:
+            key = u'{}.{}'.format(key, version)
+        return key
+
+    @staticmethod
+    def _filter_fields(state, fields):
+        """
+        Return the given state, filtered on the given fields if they aren't None.
+        """
+        if fields is None:
+            return state
+        return {
+            field: state[field]
+            for field in fields
+            if field in state
+        }
+
     def get_history(self, username, block_key, scope=Scope.user_state):
         """
         Retrieve history of state changes for a given block for a given
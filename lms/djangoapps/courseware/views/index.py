@@ -60,8 +60,12 @@ from ..masquerade import (
     setup_masquerade,
     check_content_start_date_for_masquerade_user
 )
-from ..model_data import FieldDataCache
-from ..module_render import get_module_for_descriptor, toc_for_course
+from ..module_render import (
+    add_descendents_to_field_data_cache,
+    field_data_cache_for_descendents,
+    get_module_for_descriptor,
+    toc_for_course
+)
 
 log = logging.getLogger("edx.courseware.views.index")
 
@@ -347,7 +351,7 @@ class CoursewareIndex(View):
         Prefetches all descendant data for the requested section and
         sets up the runtime, which binds the request user to the section.
         """
-        self.field_data_cache = FieldDataCache.cache_for_descriptor_descendents(
+        self.field_data_cache = field_data_cache_for_descendents(
             self.course_key,
             self.effective_user,
             self.course,
@@ -371,7 +375,7 @@ class CoursewareIndex(View):
         """
         # Pre-fetch all descendant data
         self.section = modulestore().get_item(self.section.location, depth=None, lazy=False)
-        self.field_data_cache.add_descriptor_descendents(self.section, depth=None)
+        add_descendents_to_field_data_cache(self.field_data_cache, self.section, depth=None)
 
         # Bind section to user
         self.section = get_module_for_descriptor(
@@ -6,12 +6,16 @@ from logging import getLogger
 
 from six import text_type
 
+from openedx.core.djangoapps.course_groups.cohorts import bulk_cache_cohorts
 from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED, COURSE_GRADE_NOW_PASSED
+from student.models import CourseEnrollment
+from student.roles import BulkRoleCache
 
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
 from .models import PersistentCourseGrade, prefetch
+from .subsection_grade_factory import BulkSubsectionGradeFactory
 
 log = getLogger(__name__)
 
@@ -104,6 +108,60 @@ class CourseGradeFactory(object):
         for user in users:
             yield self._iter_grade_result(user, course_data, force_update)
 
+    def bulk_update(
+            self,
+            users,
+            course=None,
+            collected_block_structure=None,
+            course_key=None,
+    ):
+        """
+        Computes, updates, and saves the CourseGrades of the given users
+        in the course, recomputing all of their subsection grades, and
+        yields a GradeResult for each user, as iter does.
+
+        Unlike calling update with force_update_subsections for each
+        user, the users' scores are read and their subsection grades are
+        saved in bulk, using a BulkSubsectionGradeFactory.  The course
+        grades are saved once all the subsection grades are saved.
+        """
+        users = list(users)
+        course_data = CourseData(
+            user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
+        )
+        # Prefetch the data used when transforming each user's course structure.
+        CourseEnrollment.bulk_fetch_enrollment_states(users, course_data.course_key)
+        bulk_cache_cohorts(course_data.course_key, users)
+        BulkRoleCache.prefetch(users)
+
+        bulk_factory = BulkSubsectionGradeFactory(users, course_data)
+        try:
+            course_grades = []
+            for user in users:
+                try:
+                    user_course_data = CourseData(
+                        user,
+                        course=course_data.course,
+                        collected_block_structure=course_data.collected_structure,
+                        course_key=course_data.course_key,
+                    )
+                    course_grades.append(
+                        self._compute(user, user_course_data, force_update_subsections=True, bulk_factory=bulk_factory)
+                    )
+                except Exception as exc:  # pylint: disable=broad-except
+                    yield self._grade_error_result(user, course_data, exc)
+
+            bulk_factory.save()
+
+            for course_grade in course_grades:
+                try:
+                    self._save(course_grade.user, course_grade.course_data, course_grade)
+                    yield self.GradeResult(course_grade.user, course_grade, None)
+                except Exception as exc:  # pylint: disable=broad-except
+                    yield self._grade_error_result(course_grade.user, course_data, exc)
+        finally:
+            bulk_factory.clear()
+
     def _iter_grade_result(self, user, course_data, force_update):
         try:
             kwargs = {
@@ -119,15 +177,21 @@ class CourseGradeFactory(object):
             course_grade = method(**kwargs)
             return self.GradeResult(user, course_grade, None)
         except Exception as exc:  # pylint: disable=broad-except
-            # Keep marching on even if this student couldn't be graded for
-            # some reason, but log it for future reference.
-            log.exception(
-                'Cannot grade student %s in course %s because of exception: %s',
-                user.id,
-                course_data.course_key,
-                text_type(exc)
-            )
-            return self.GradeResult(user, None, exc)
+            return self._grade_error_result(user, course_data, exc)
+
+    def _grade_error_result(self, user, course_data, exc):
+        """
+        Returns the GradeResult for a student who couldn't be graded.
+        """
+        # Keep marching on even if this student couldn't be graded for
+        # some reason, but log it for future reference.
+        log.exception(
+            'Cannot grade student %s in course %s because of exception: %s',
+            user.id,
+            course_data.course_key,
+            text_type(exc)
+        )
+        return self.GradeResult(user, None, exc)
 
     @staticmethod
     def _create_zero(user, course_data):
@@ -165,19 +229,38 @@ class CourseGradeFactory(object):
         Sends a COURSE_GRADE_CHANGED signal to listeners and a
         COURSE_GRADE_NOW_PASSED if learner has passed course.
         """
-        should_persist = should_persist_grades(course_data.course_key)
+        course_grade = CourseGradeFactory._compute(user, course_data, force_update_subsections)
+        CourseGradeFactory._save(user, course_data, course_grade)
+        return course_grade
 
-        if should_persist and force_update_subsections:
+    @staticmethod
+    def _compute(user, course_data, force_update_subsections=False, bulk_factory=None):
+        """
+        Computes and returns a CourseGrade object for the given user
+        and course, without saving it.  Updated subsection grades are
+        saved, unless a BulkSubsectionGradeFactory is given, in which
+        case they are added to it for saving in bulk.
+        """
+        if should_persist_grades(course_data.course_key) and force_update_subsections and not bulk_factory:
             prefetch(user, course_data.course_key)
 
         course_grade = CourseGrade(
             user,
             course_data,
-            force_update_subsections=force_update_subsections
+            force_update_subsections=force_update_subsections,
+            bulk_subsection_grade_factory=bulk_factory,
         )
-        course_grade = course_grade.update()
+        return course_grade.update()
 
-        should_persist = should_persist and course_grade.attempted
+    @staticmethod
+    def _save(user, course_data, course_grade):
+        """
+        Saves the given computed CourseGrade object for the given user
+        and course.
+        Sends a COURSE_GRADE_CHANGED signal to listeners and a
+        COURSE_GRADE_NOW_PASSED if learner has passed course.
+        """
+        should_persist = should_persist_grades(course_data.course_key) and course_grade.attempted
         if should_persist:
             course_grade._subsection_grade_factory.bulk_create_unsaved()
             PersistentCourseGrade.update_or_create(
@@ -209,5 +292,3 @@ class CourseGradeFactory(object):
             u'Grades: Update, %s, User: %s, %s, persisted: %s',
             course_data.full_string(), user.id, course_grade, should_persist,
         )
-
-        return course_grade
@@ -15,7 +15,7 @@ from collections import defaultdict, namedtuple
 from hashlib import sha1
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
 from django.utils.timezone import now
 from lazy import lazy
 from model_utils.models import TimeStampedModel
@@ -226,6 +226,29 @@ class VisibleBlocks(models.Model):
         non_existent_brls = {brl for brl in block_record_lists if brl.hash_value not in cached_records}
         cls.bulk_create(user_id, course_key, non_existent_brls)
 
+    @classmethod
+    def bulk_get_or_create_for_course(cls, course_key, block_record_lists):
+        """
+        Bulk creates VisibleBlocks for the given iterator of
+        BlockRecordList objects, which may belong to many users in the
+        given course, but only for those that aren't already created.
+        Unlike bulk_get_or_create, only the records with the given
+        hashes are read, and the request cache is not updated.
+        """
+        brls_by_hash = {brl.hash_value: brl for brl in block_record_lists}
+        existing_hashes = set(
+            cls.objects.filter(hashed__in=brls_by_hash.keys()).values_list('hashed', flat=True)
+        )
+        return cls.objects.bulk_create([
+            VisibleBlocks(
+                blocks_json=brl.json_value,
+                hashed=hash_value,
+                course_id=course_key,
+            )
+            for hash_value, brl in brls_by_hash.iteritems()
+            if hash_value not in existing_hashes
+        ])
+
     @classmethod
     def _initialize_cache(cls, user_id, course_key):
         """
@@ -348,11 +371,13 @@ class PersistentSubsectionGrade(TimeStampedModel):
         cache_key = cls._cache_key(course_key)
         get_cache(cls._CACHE_NAMESPACE)[cache_key] = defaultdict(list)
         cached_grades = get_cache(cls._CACHE_NAMESPACE)[cache_key]
-        queryset = cls.objects.select_related('visible_blocks', 'override').filter(
+        queryset = cls.objects.select_related('visible_blocks').filter(
             user_id__in=[user.id for user in users],
             course_id=course_key,
         )
-        for record in queryset:
+        records = list(queryset)
+        PersistentSubsectionGradeOverride.bulk_attach_overrides(records)
+        for record in records:
             cached_grades[record.user_id].append(record)
 
     @classmethod
@@ -453,6 +478,29 @@ class PersistentSubsectionGrade(TimeStampedModel):
             cls._emit_grade_calculated_event(grade)
         return grades
 
+    @classmethod
+    def bulk_save_grades(cls, grades, block_record_lists, course_key):
+        """
+        Saves the given grade models, which may belong to many users in
+        the given course, along with the VisibleBlocks for the given
+        BlockRecordLists that they reference.
+
+        Grades that were not read from the database are bulk created;
+        the others are updated in place.
+        """
+        if not grades:
+            return
+
+        with transaction.atomic():
+            VisibleBlocks.bulk_get_or_create_for_course(course_key, block_record_lists)
+            cls.objects.bulk_create([grade for grade in grades if grade.id is None])
+            for grade in grades:
+                if grade.id is not None:
+                    grade.save()
+
+        for grade in grades:
+            cls._emit_grade_calculated_event(grade)
+
     @classmethod
     def _prepare_params(cls, params):
         """
@@ -658,6 +706,29 @@ class PersistentSubsectionGradeOverride(models.Model):
             cls.objects.filter(grade__user_id=user_id, grade__course_id=course_key)
         }
 
+    @classmethod
+    def bulk_attach_overrides(cls, grades):
+        """
+        Attaches their overrides to the given PersistentSubsectionGrades,
+        which may belong to many users, reading them with one query.
+        Grades without an override are marked as such, so that reading
+        their override doesn't query for it.
+        """
+        grade_ids = [grade.id for grade in grades if grade.id is not None]
+        if not grade_ids:
+            return
+        overrides_by_grade_id = {
+            override.grade_id: override
+            for override in cls.objects.filter(grade_id__in=grade_ids)
+        }
+        # Assigning None to the reverse one-to-one relation would clear its
+        # cache rather than record that there is no override, so the
+        # relation's cache is set directly.
+        override_cache_name = PersistentSubsectionGrade.override.cache_name
+        for grade in grades:
+            if grade.id is not None:
+                setattr(grade, override_cache_name, overrides_by_grade_id.get(grade.id))
+
     @classmethod
     def get_override(cls, user_id, usage_key):
         prefetch_values = get_cache(cls._CACHE_NAMESPACE).get((user_id, str(usage_key.course_key)), None)
@@ -27,11 +27,7 @@ from .. import events
 from ..constants import ScoreDatabaseTableEnum
 from ..course_grade_factory import CourseGradeFactory
 from ..scores import weighted_score
-from ..tasks import (
-    RECALCULATE_GRADE_DELAY_SECONDS,
-    recalculate_subsection_grade_v3,
-    recalculate_course_and_subsection_grades_for_user
-)
+from ..tasks import enqueue_subsection_update_task, recalculate_course_and_subsection_grades_for_user
 
 log = getLogger(__name__)
 
@@ -215,8 +211,8 @@ def enqueue_subsection_update(sender, **kwargs):  # pylint: disable=unused-argum
     enqueueing a subsection update operation to occur asynchronously.
     """
     events.grade_updated(**kwargs)
-    recalculate_subsection_grade_v3.apply_async(
-        kwargs=dict(
+    enqueue_subsection_update_task(
+        dict(
             user_id=kwargs['user_id'],
             anonymous_user_id=kwargs.get('anonymous_user_id'),
             course_id=kwargs['course_id'],
@@ -229,7 +225,6 @@ def enqueue_subsection_update(sender, **kwargs):  # pylint: disable=unused-argum
             score_db_table=kwargs['score_db_table'],
             force_update_subsections=kwargs.get('force_update_subsections', False),
         ),
-        countdown=RECALCULATE_GRADE_DELAY_SECONDS,
     )
 
 
@@ -265,17 +265,20 @@ class CreateSubsectionGrade(NonZeroSubsectionGrade):
         """
         if self._should_persist_per_attempted(score_deleted, force_update_subsections):
             model = PersistentSubsectionGrade.update_or_create_grade(**self._persisted_model_params(student))
-
-            if hasattr(model, 'override'):
-                # When we're doing an update operation, the PersistentSubsectionGrade model
-                # will be updated based on the problem_scores, but if a grade override
-                # exists that's related to the updated persistent grade, we need to update
-                # the aggregated scores for this object to reflect the override.
-                self.all_total = self._aggregated_score_from_model(model, is_graded=False)
-                self.graded_total = self._aggregated_score_from_model(model, is_graded=True)
-
+            self._update_aggregated_scores_for_override(model)
             return model
 
+    def _update_aggregated_scores_for_override(self, model):
+        """
+        When we're doing an update operation, the PersistentSubsectionGrade model
+        will be updated based on the problem_scores, but if a grade override
+        exists that's related to the updated persistent grade, we need to update
+        the aggregated scores for this object to reflect the override.
+        """
+        if hasattr(model, 'override'):
+            self.all_total = self._aggregated_score_from_model(model, is_graded=False)
+            self.graded_total = self._aggregated_score_from_model(model, is_graded=True)
+
     @classmethod
     def bulk_create_models(cls, student, subsection_grades, course_key):
         """
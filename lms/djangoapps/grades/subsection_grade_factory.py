@@ -5,7 +5,7 @@ from lazy import lazy
 
 from courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_grades
-from lms.djangoapps.grades.models import PersistentSubsectionGrade
+from lms.djangoapps.grades.models import BlockRecordList, PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 from student.models import anonymous_id_for_user
@@ -21,9 +21,10 @@ class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
-    def __init__(self, student, course=None, course_structure=None, course_data=None):
+    def __init__(self, student, course=None, course_structure=None, course_data=None, bulk_factory=None):
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
+        self._bulk_factory = bulk_factory
 
         self._cached_subsection_grades = None
         self._unsaved_subsection_grades = OrderedDict()
@@ -89,11 +90,19 @@ class SubsectionGradeFactory(object):
                     ):
                         return orig_subsection_grade
 
-            grade_model = calculated_grade.update_or_create_model(
-                self.student,
-                score_deleted,
-                force_update_subsections
-            )
+            if self._bulk_factory:
+                grade_model = self._bulk_factory.add(
+                    self.student,
+                    calculated_grade,
+                    score_deleted,
+                    force_update_subsections
+                )
+            else:
+                grade_model = calculated_grade.update_or_create_model(
+                    self.student,
+                    score_deleted,
+                    force_update_subsections
+                )
             self._update_saved_subsection_grade(subsection.location, grade_model)
 
         return calculated_grade
@@ -104,6 +113,8 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        if self._bulk_factory:
+            return self._bulk_factory.csm_scores[self.student.id]
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -113,6 +124,8 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        if self._bulk_factory:
+            return self._bulk_factory.submissions_scores[self.student.id]
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
@@ -161,3 +174,146 @@ class SubsectionGradeFactory(object):
             getattr(subsection, 'subtree_edited_on', None),
             self.student.id,
         ))
+
+
+class BulkSubsectionGradeFactory(object):
+    """
+    Factory for the subsection grades of a batch of users in a course,
+    shared by the SubsectionGradeFactory of each of those users.
+
+    Instead of each user's factory querying and saving its own data:
+
+    * the courseware student module scores of all the users are read
+      with one query, and their submissions scores with one query per
+      block type, for the scorable locations of the collected course
+      structure, which are computed once,
+    * the users' saved subsection grades and their overrides are
+      prefetched with one query each,
+    * updated grades are held in memory until save() writes them all,
+      bulk creating the grades that did not exist yet.
+    """
+    def __init__(self, users, course_data):
+        """
+        Arguments:
+            users ([User]) - The users whose grades are computed.
+
+            course_data (CourseData) - Data of the course, whose collected
+                structure is shared by all the users.
+        """
+        self.users = users
+        self.course_data = course_data
+
+        # list [PersistentSubsectionGrade]
+        self._unsaved_grade_models = []
+        # list [BlockRecordList]
+        self._unsaved_visible_blocks = []
+        # dict {user id: {subsection usage key: PersistentSubsectionGrade}}
+        self._saved_grade_models_by_user = {}
+
+        PersistentSubsectionGrade.prefetch(self.course_data.course_key, self.users)
+
+    @lazy
+    def scorable_locations(self):
+        """
+        Returns the locations in the collected course structure that
+        may have scores.
+        """
+        return [block_key for block_key in self.course_data.collected_structure if possibly_scored(block_key)]
+
+    @lazy
+    def csm_scores(self):
+        """
+        Returns a map of user id to the ScoresClient with the user's
+        scores stored in the user state (in CSM) for the course.
+        """
+        return ScoresClient.create_for_locations_and_users(
+            self.course_data.course_key, [user.id for user in self.users], self.scorable_locations,
+        )
+
+    @lazy
+    def submissions_scores(self):
+        """
+        Returns a map of user id to the user's scores stored by the
+        Submissions API for the course, in the format returned by
+        submissions_api.get_scores.
+
+        The scores are read per item type of the scorable locations,
+        with one query each, rather than per user.
+        """
+        user_ids_by_anonymous_id = {
+            anonymous_id_for_user(user, self.course_data.course_key, save=False): user.id
+            for user in self.users
+        }
+        scores = {user.id: {} for user in self.users}
+        item_types = {block_key.block_type for block_key in self.scorable_locations}
+        for item_type in item_types:
+            course_submissions = submissions_api.get_all_course_submission_information(
+                str(self.course_data.course_key), item_type, read_replica=False,
+            )
+            for student_item, _, score in course_submissions:
+                user_id = user_ids_by_anonymous_id.get(student_item['student_id'])
+                # Only the submission with the latest score comes with it.
+                if user_id is not None and score:
+                    scores[user_id][student_item['item_id']] = score
+        return scores
+
+    def add(self, student, subsection_grade, score_deleted=False, force_update_subsections=False):
+        """
+        Adds the given calculated subsection grade of the given student
+        to the grades to save, and returns its unsaved model, or None if
+        the grade is not to be persisted.
+        """
+        # pylint: disable=protected-access
+        if not subsection_grade._should_persist_per_attempted(score_deleted, force_update_subsections):
+            return None
+
+        params = subsection_grade._persisted_model_params(student)
+        visible_blocks = BlockRecordList.from_list(params.pop('visible_blocks'), self.course_data.course_key)
+        first_attempted = params.pop('first_attempted')
+        params.update(
+            course_id=self.course_data.course_key,
+            course_version=params['course_version'] or "",
+            visible_blocks_id=visible_blocks.hash_value,
+        )
+
+        grade_model = self._saved_grade_models(student.id).get(subsection_grade.location)
+        if grade_model is None:
+            grade_model = PersistentSubsectionGrade(**params)
+        else:
+            for field_name, value in params.iteritems():
+                setattr(grade_model, field_name, value)
+        if grade_model.first_attempted is None:
+            grade_model.first_attempted = first_attempted
+
+        self._unsaved_grade_models.append(grade_model)
+        self._unsaved_visible_blocks.append(visible_blocks)
+        subsection_grade._update_aggregated_scores_for_override(grade_model)
+        return grade_model
+
+    def save(self):
+        """
+        Saves all the subsection grades added so far.
+        """
+        PersistentSubsectionGrade.bulk_save_grades(
+            self._unsaved_grade_models, self._unsaved_visible_blocks, self.course_data.course_key,
+        )
+        self._unsaved_grade_models = []
+        self._unsaved_visible_blocks = []
+
+    def clear(self):
+        """
+        Clears the data prefetched for the users.
+        """
+        PersistentSubsectionGrade.clear_prefetched_data(self.course_data.course_key)
+
+    def _saved_grade_models(self, user_id):
+        """
+        Returns a map of subsection usage key to the given user's saved
+        subsection grade model.
+        """
+        if user_id not in self._saved_grade_models_by_user:
+            self._saved_grade_models_by_user[user_id] = {
+                grade_model.full_usage_key: grade_model
+                for grade_model in PersistentSubsectionGrade.bulk_read_grades(user_id, self.course_data.course_key)
+            }
+        return self._saved_grade_models_by_user[user_id]
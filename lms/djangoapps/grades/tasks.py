@@ -2,14 +2,17 @@
 This module contains tasks for asynchronous execution of grade updates.
 """
 
+import hashlib
 from datetime import timedelta
 from logging import getLogger
+from uuid import uuid4
 
 import six
 from celery import task
 from celery_utils.persist_on_failure import LoggedPersistOnFailureTask
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db.utils import DatabaseError
 from django.utils import timezone
@@ -27,7 +30,14 @@ from track.event_transaction_utils import set_event_transaction_id, set_event_tr
 from util.date_utils import from_timestamp
 from xmodule.modulestore.django import modulestore
 
-from .config.waffle import DISABLE_REGRADE_ON_POLICY_CHANGE, ENFORCE_FREEZE_GRADE_AFTER_COURSE_END, waffle, waffle_flags
+from .config.waffle import (
+    BULK_COMPUTE_GRADES,
+    COALESCE_SUBSECTION_UPDATES,
+    DISABLE_REGRADE_ON_POLICY_CHANGE,
+    ENFORCE_FREEZE_GRADE_AFTER_COURSE_END,
+    waffle,
+    waffle_flags
+)
 from .constants import ScoreDatabaseTableEnum
 from .course_grade_factory import CourseGradeFactory
 from .exceptions import DatabaseNotReadyError
@@ -45,6 +55,10 @@ KNOWN_RETRY_ERRORS = (  # Errors we expect occasionally, should be resolved on r
     DatabaseNotReadyError,
 )
 RECALCULATE_GRADE_DELAY_SECONDS = 2  # to prevent excessive _has_db_updated failures. See TNL-6424.
+# Window during which repeated updates of the same score are coalesced into the last one.
+COALESCED_RECALCULATE_GRADE_DELAY_SECONDS = 10
+# How long the latest pending update of a score is remembered; must outlast the task's retries.
+COALESCED_UPDATE_TIMEOUT_SECONDS = 60 * 60
 RETRY_DELAY_SECONDS = 40
 SUBSECTION_GRADE_TIMEOUT_SECONDS = 300
 
@@ -120,8 +134,13 @@ def compute_grades_for_course(course_key, offset, batch_size, **kwargs):  # pyli
         return
 
     enrollments = CourseEnrollment.objects.filter(course_id=course_key).order_by('created')
-    student_iter = (enrollment.user for enrollment in enrollments[offset:offset + batch_size])
-    for result in CourseGradeFactory().iter(users=student_iter, course_key=course_key, force_update=True):
+    if waffle().is_enabled(BULK_COMPUTE_GRADES):
+        students = [enrollment.user for enrollment in enrollments.select_related('user')[offset:offset + batch_size]]
+        results = CourseGradeFactory().bulk_update(users=students, course_key=course_key)
+    else:
+        student_iter = (enrollment.user for enrollment in enrollments[offset:offset + batch_size])
+        results = CourseGradeFactory().iter(users=student_iter, course_key=course_key, force_update=True)
+    for result in results:
         if result.error is not None:
             raise result.error
 
@@ -214,6 +233,15 @@ def _recalculate_subsection_grade(self, **kwargs):
         set_custom_metrics_for_course_key(course_key)
         set_custom_metric('usage_id', unicode(scored_block_usage_key))
 
+        if _is_subsection_update_superseded(kwargs):
+            set_custom_metric('subsection_update_coalesced', True)
+            log.info(
+                u"Grades: Skipping subsection update superseded by a later update, user: %s, block: %s",
+                kwargs['user_id'],
+                scored_block_usage_key,
+            )
+            return
+
         # The request cache is not maintained on celery workers,
         # where this code runs. So we take the values from the
         # main request cache and store them in the local request
@@ -304,6 +332,63 @@ def _has_db_updated_with_new_score(self, scored_block_usage_key, **kwargs):
     return db_is_updated
 
 
+def enqueue_subsection_update_task(task_kwargs):
+    """
+    Enqueues a recalculate_subsection_grade_v3 task with the given kwargs.
+
+    When the COALESCE_SUBSECTION_UPDATES switch is enabled, the task is
+    delayed for a short window and marked as the latest pending update
+    of its score, so that any earlier task still pending for the same
+    user, block and flags is skipped when it runs.  Since a recompute
+    reads all of the learner's current scores, the last task covers
+    the updates of the ones it supersedes.
+    """
+    countdown = RECALCULATE_GRADE_DELAY_SECONDS
+    if waffle().is_enabled(COALESCE_SUBSECTION_UPDATES):
+        task_kwargs['coalesce_token'] = uuid4().hex
+        cache.set(
+            _coalesced_update_cache_key(task_kwargs),
+            task_kwargs['coalesce_token'],
+            COALESCED_UPDATE_TIMEOUT_SECONDS,
+        )
+        countdown = COALESCED_RECALCULATE_GRADE_DELAY_SECONDS
+    recalculate_subsection_grade_v3.apply_async(kwargs=task_kwargs, countdown=countdown)
+
+
+def _is_subsection_update_superseded(kwargs):
+    """
+    Returns whether a later subsection update task was enqueued for the
+    same score as the task with the given kwargs.  Returns False if it
+    is unknown, so that the task runs.
+    """
+    coalesce_token = kwargs.get('coalesce_token')
+    if coalesce_token is None:
+        return False
+    latest_token = cache.get(_coalesced_update_cache_key(kwargs))
+    return latest_token is not None and latest_token != coalesce_token
+
+
+def _coalesced_update_cache_key(kwargs):
+    """
+    Returns the cache key of the latest pending subsection update task
+    for the score in the given task kwargs.  Tasks with different flags
+    are not coalesced with each other.
+    """
+    return u'grades.coalesced_update.{}'.format(
+        hashlib.sha1(u'|'.join(
+            unicode(kwargs.get(name)) for name in (
+                'user_id',
+                'course_id',
+                'usage_id',
+                'only_if_higher',
+                'score_deleted',
+                'score_db_table',
+                'force_update_subsections',
+            )
+        ).encode('utf-8')).hexdigest()
+    )
+
+
 def _update_subsection_grades(
         course_key, scored_block_usage_key, only_if_higher, user_id, score_deleted, force_update_subsections=False
 ):
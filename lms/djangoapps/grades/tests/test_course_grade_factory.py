@@ -296,6 +296,13 @@ class TestGradeIteration(SharedModuleStoreTestCase):
             self.assertIsNone(course_grade.letter_grade)
             self.assertEqual(course_grade.percent, 0.0)
 
+    def test_bulk_update(self):
+        grade_results = list(CourseGradeFactory().bulk_update(self.students, self.course))
+        self.assertEqual([result.student for result in grade_results], self.students)
+        for result in grade_results:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.course_grade.percent, 0.0)
+
     @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.read')
     def test_grading_exception(self, mock_course_grade):
         """Test that we correctly capture exception messages that bubble up from
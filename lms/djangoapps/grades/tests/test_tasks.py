@@ -11,18 +11,31 @@ import ddt
 import pytz
 import six
 from django.conf import settings
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from mock import MagicMock, patch
 
 from lms.djangoapps.grades import tasks
 from lms.djangoapps.grades.config.models import PersistentGradesEnabledFlag
-from lms.djangoapps.grades.config.waffle import waffle_flags, ENFORCE_FREEZE_GRADE_AFTER_COURSE_END
+from lms.djangoapps.grades.config.waffle import (
+    BULK_COMPUTE_GRADES,
+    COALESCE_SUBSECTION_UPDATES,
+    ENFORCE_FREEZE_GRADE_AFTER_COURSE_END,
+    waffle,
+    waffle_flags
+)
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
-from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
+from lms.djangoapps.grades.models import (
+    PersistentCourseGrade,
+    PersistentSubsectionGrade,
+    PersistentSubsectionGradeOverride
+)
 from lms.djangoapps.grades.services import GradesService
 from lms.djangoapps.grades.signals.signals import PROBLEM_WEIGHTED_SCORE_CHANGED
 from lms.djangoapps.grades.tasks import (
+    COALESCED_RECALCULATE_GRADE_DELAY_SECONDS,
     RECALCULATE_GRADE_DELAY_SECONDS,
     _course_task_args,
     compute_all_grades_for_course,
@@ -156,6 +169,39 @@ class RecalculateSubsectionGradeTest(HasCourseWithProblemsMixin, ModuleStoreTest
             PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **send_args)
             mock_task_apply.assert_called_once_with(countdown=RECALCULATE_GRADE_DELAY_SECONDS, kwargs=local_task_args)
 
+    @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
+    def test_coalesced_updates(self, mock_subsection_signal):
+        """
+        Ensures that only the last of repeated updates of a score
+        recalculates the subsection grade.
+        """
+        self.set_up_course()
+        with waffle().override(COALESCE_SUBSECTION_UPDATES, active=True):
+            with patch(
+                'lms.djangoapps.grades.tasks.recalculate_subsection_grade_v3.apply_async',
+                return_value=None
+            ) as mock_task_apply:
+                for _ in range(3):
+                    PROBLEM_WEIGHTED_SCORE_CHANGED.send(sender=None, **self.problem_weighted_score_changed_kwargs)
+
+            self.assertEqual(mock_task_apply.call_count, 3)
+            for call in mock_task_apply.call_args_list:
+                self.assertEqual(call[1]['countdown'], COALESCED_RECALCULATE_GRADE_DELAY_SECONDS)
+            superseded_kwargs, last_kwargs = (
+                mock_task_apply.call_args_list[index][1]['kwargs'] for index in (0, -1)
+            )
+
+            mock_score = MagicMock(
+                modified=datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(days=1),
+                grade=1.0,
+                max_grade=2.0,
+            )
+            with self.mock_csm_get_score(mock_score), mock_get_score(1, 2):
+                recalculate_subsection_grade_v3.apply(kwargs=superseded_kwargs)
+                self.assertFalse(mock_subsection_signal.called)
+                recalculate_subsection_grade_v3.apply(kwargs=last_kwargs)
+                self.assertTrue(mock_subsection_signal.called)
+
     @patch('lms.djangoapps.grades.signals.signals.SUBSECTION_SCORE_CHANGED.send')
     def test_triggers_subsection_score_signal(self, mock_subsection_signal):
         """
@@ -431,14 +477,16 @@ class ComputeGradesForCourseTest(HasCourseWithProblemsMixin, ModuleStoreTestCase
         for user in self.users:
             CourseEnrollment.enroll(user, self.course.id)
 
-    @ddt.data(*xrange(0, 12, 3))
-    def test_behavior(self, batch_size):
-        with mock_get_score(1, 2):
-            result = compute_grades_for_course_v2.delay(
-                course_key=six.text_type(self.course.id),
-                batch_size=batch_size,
-                offset=4,
-            )
+    @ddt.data(*itertools.product(xrange(0, 12, 3), (True, False)))
+    @ddt.unpack
+    def test_behavior(self, batch_size, bulk_compute):
+        with waffle().override(BULK_COMPUTE_GRADES, active=bulk_compute):
+            with mock_get_score(1, 2):
+                result = compute_grades_for_course_v2.delay(
+                    course_key=six.text_type(self.course.id),
+                    batch_size=batch_size,
+                    offset=4,
+                )
         self.assertTrue(result.successful)
         self.assertEqual(
             PersistentCourseGrade.objects.filter(course_id=self.course.id).count(),
@@ -449,6 +497,52 @@ class ComputeGradesForCourseTest(HasCourseWithProblemsMixin, ModuleStoreTestCase
             min(batch_size, 8)  # No more than 8 due to offset
         )
 
+    def test_bulk_recompute(self):
+        with waffle().override(BULK_COMPUTE_GRADES, active=True):
+            for earned in (1, 2):
+                with mock_get_score(earned, 2):
+                    result = compute_grades_for_course_v2.delay(
+                        course_key=six.text_type(self.course.id),
+                        batch_size=12,
+                        offset=0,
+                    )
+                self.assertTrue(result.successful)
+
+        # existing grades are updated rather than duplicated
+        subsection_grades = PersistentSubsectionGrade.objects.filter(course_id=self.course.id)
+        self.assertEqual(subsection_grades.count(), 12)
+        self.assertEqual({grade.earned_all for grade in subsection_grades}, {2})
+        self.assertEqual(PersistentCourseGrade.objects.filter(course_id=self.course.id).count(), 12)
+
+    def test_bulk_recompute_reads_overrides_once(self):
+        with waffle().override(BULK_COMPUTE_GRADES, active=True):
+            with mock_get_score(1, 2):
+                compute_grades_for_course_v2.delay(
+                    course_key=six.text_type(self.course.id),
+                    batch_size=12,
+                    offset=0,
+                )
+            PersistentSubsectionGradeOverride.objects.create(
+                grade=PersistentSubsectionGrade.objects.filter(user_id=self.users[0].id).first(),
+                earned_all_override=0.0,
+                earned_graded_override=0.0,
+            )
+            with mock_get_score(2, 2):
+                with CaptureQueriesContext(connection) as queries:
+                    result = compute_grades_for_course_v2.delay(
+                        course_key=six.text_type(self.course.id),
+                        batch_size=12,
+                        offset=0,
+                    )
+        self.assertTrue(result.successful)
+
+        # the overrides of all the learners' grades are read together
+        override_queries = [
+            query for query in queries.captured_queries
+            if PersistentSubsectionGradeOverride._meta.db_table in query['sql']
+        ]
+        self.assertEqual(len(override_queries), 1)
+
     @ddt.data(*xrange(1, 12, 3))
     def test_course_task_args(self, test_batch_size):
         offset_expected = 0
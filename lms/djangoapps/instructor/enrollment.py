@@ -21,6 +21,7 @@ from six import text_type
 
 from course_modes.models import CourseMode
 from courseware.models import StudentModule
+from courseware.user_state_client import DjangoXBlockUserStateClient
 from eventtracking import tracker
 from lms.djangoapps.grades.constants import ScoreDatabaseTableEnum
 from lms.djangoapps.grades.events import STATE_DELETED_EVENT_TYPE
@@ -302,6 +303,10 @@ def reset_student_attempts(course_id, student, module_state_key, requesting_user
             text_type(module_state_key),
         )
 
+    # Write the student's state changes that are still pending first, so
+    # that they aren't written over the reset later.
+    DjangoXBlockUserStateClient(student, write_behind=False).write_pending(student.username, [module_state_key])
+
     module_to_reset = StudentModule.objects.get(
         student_id=student.id,
         course_id=course_id,
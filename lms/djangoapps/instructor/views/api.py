@@ -2564,7 +2564,8 @@ def calculate_grades_csv(request, course_id):
     """
     report_type = _('grade')
     course_key = CourseKey.from_string(course_id)
-    lms.djangoapps.instructor_task.api.submit_calculate_grades_csv(request, course_key)
+    incremental = request.POST.get('incremental') == 'true'
+    lms.djangoapps.instructor_task.api.submit_calculate_grades_csv(request, course_key, incremental=incremental)
     success_status = SUCCESS_MESSAGE_TEMPLATE.format(report_type=report_type)
 
     return JsonResponse({"status": success_status})
@@ -18,12 +18,13 @@ import hashlib
 import json
 import logging
 import os.path
+from tempfile import SpooledTemporaryFile
 from uuid import uuid4
 
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 from opaque_keys.edx.django.models import CourseKeyField
 from six import text_type
@@ -231,6 +232,10 @@ class DjangoStorageReportStore(ReportStore):
     """
     ReportStore implementation that delegates to django's storage api.
     """
+    # Size of a CSV being written that is held in memory before spilling
+    # to a temporary file.
+    CSV_SPOOL_MAX_SIZE = 10 * 1024 * 1024
+
     def __init__(self, storage_class=None, storage_kwargs=None):
         if storage_kwargs is None:
             storage_kwargs = {}
@@ -269,14 +274,37 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        `rows` may be a generator; the CSV is spooled to a temporary file
+        once it grows past CSV_SPOOL_MAX_SIZE, so large reports are not
+        held in memory.
+        """
+        with SpooledTemporaryFile(max_size=self.CSV_SPOOL_MAX_SIZE) as spooled_csv:
+            # Adding unicode signature (BOM) for MS Excel 2013 compatibility
+            spooled_csv.write(codecs.BOM_UTF8)
+            csvwriter = csv.writer(spooled_csv)
+            csvwriter.writerows(self._get_utf8_encoded_rows(rows))
+            spooled_csv.seek(0)
+            self.store(course_id, filename, File(spooled_csv))
+
+    def open(self, course_id, filename):
+        """
+        Return a read-only file object for the file named `filename` that
+        was previously stored for `course_id`.
+        """
+        return self.storage.open(self.path_to(course_id, filename))
+
+    def exists(self, course_id, filename):
+        """
+        Return True if a file named `filename` has been stored for `course_id`.
+        """
+        return self.storage.exists(self.path_to(course_id, filename))
+
+    def delete(self, course_id, filename):
+        """
+        Remove the file named `filename` stored for `course_id`.
         """
-        output_buffer = ContentFile('')
-        # Adding unicode signature (BOM) for MS Excel 2013 compatibility
-        output_buffer.write(codecs.BOM_UTF8)
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        self.storage.delete(self.path_to(course_id, filename))
 
     def links_for(self, course_id):
         """
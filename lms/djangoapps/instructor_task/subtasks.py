@@ -8,7 +8,7 @@ from time import time
 from uuid import uuid4
 
 import psutil
-from celery.states import READY_STATES, RETRY, SUCCESS
+from celery.states import FAILURE, READY_STATES, RETRY, SUCCESS
 from django.core.cache import cache
 from django.db import DatabaseError, transaction
 
@@ -344,6 +344,46 @@ def queue_subtasks_for_query(
     return progress
 
 
+def claim_final_subtask(entry_id, final_subtask_id):
+    """
+    Determines whether the subtask `final_subtask_id` should now be queued.
+
+    Some tasks fan out into several subtasks that can run in parallel, plus one final subtask
+    (e.g. a merge step) that must only run once all of the others are done.  The final subtask is
+    registered up front with the others, so that progress is reported against a single set of
+    subtasks, but it is not queued until this returns True.
+
+    Returns True exactly once: when `final_subtask_id` is the only subtask of the InstructorTask
+    that has not yet reached a ready state.  A cache lock is used so that parallel subtasks
+    completing at the same time do not both queue the final subtask.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    subtask_status_info = json.loads(entry.subtasks)['status']
+    pending_subtask_ids = [
+        subtask_id for subtask_id, status in subtask_status_info.iteritems()
+        if status['state'] not in READY_STATES
+    ]
+    if pending_subtask_ids != [final_subtask_id]:
+        return False
+
+    # cache.add fails if the key already exists
+    key = "subtask-final-{}".format(final_subtask_id)
+    return cache.add(key, 'true', SUBTASK_LOCK_EXPIRE)
+
+
+def fail_instructor_task(entry_id, exception, traceback_string):
+    """
+    Marks the InstructorTask as having failed with `exception`.
+
+    Used when a final subtask that produces the result of the whole task fails, since the
+    InstructorTask is otherwise marked as SUCCESS once all of its subtasks are done.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    entry.task_state = FAILURE
+    entry.task_output = InstructorTask.create_output_for_failure(exception, traceback_string)
+    entry.save_now()
+
+
 def _acquire_subtask_lock(task_id):
     """
     Mark the specified task_id as being in progress.
@@ -20,13 +20,24 @@ of the query for traversing StudentModule objects.
 
 """
 import logging
+import traceback
 from functools import partial
 
 from celery import task
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.utils.translation import ugettext_noop
 
 from bulk_email.tasks import perform_delegate_email_batches
+from lms.djangoapps.instructor_task.config.models import GradeReportSetting
+from lms.djangoapps.instructor_task.models import InstructorTask
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    claim_final_subtask,
+    fail_instructor_task,
+    update_subtask_status
+)
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import (
@@ -46,6 +57,7 @@ from lms.djangoapps.instructor_task.tasks_helper.module_state import (
     delete_problem_module_state,
     perform_module_state_update,
     override_score_module_state,
+    prime_rescore_scripts,
     rescore_problem_module_state,
     reset_attempts_module_state
 )
@@ -76,8 +88,9 @@ def rescore_problem(entry_id, xmodule_instance_args):
     # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
     action_name = ugettext_noop('rescored')
     update_fcn = partial(rescore_problem_module_state, xmodule_instance_args)
+    prime_fcn = partial(prime_rescore_scripts, xmodule_instance_args)
 
-    visit_fcn = partial(perform_module_state_update, update_fcn, None)
+    visit_fcn = partial(perform_module_state_update, update_fcn, None, prime_fcn=prime_fcn)
     return run_main_task(entry_id, visit_fcn, action_name)
 
 
@@ -183,10 +196,96 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
+    grade_report_setting = GradeReportSetting.current()
+    if grade_report_setting.enabled:
+        task_fn = partial(
+            CourseGradeReport.generate_in_shards,
+            partial(_create_grades_csv_shard_subtask, entry_id, xmodule_instance_args),
+            grade_report_setting.batch_size,
+            xmodule_instance_args,
+        )
+    else:
+        task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+def _create_grades_csv_shard_subtask(entry_id, xmodule_instance_args, shard, initial_subtask_status):
+    """Creates a subtask to grade a single shard of the learners in a course."""
+    return calculate_grades_csv_shard.subtask(
+        (
+            entry_id,
+            xmodule_instance_args,
+            shard,
+            initial_subtask_status.to_dict(),
+        ),
+        task_id=initial_subtask_status.task_id,
+        routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    )
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
+def calculate_grades_csv_shard(entry_id, xmodule_instance_args, shard, subtask_status_dict):
+    """
+    Grade the learners in one user-id range of a course and store their rows
+    as a partial grade report.
+
+    `shard` is the dict built by `CourseGradeReport.generate_in_shards`.  The
+    last shard to finish queues `merge_grades_csv_shards`.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        course_id = InstructorTask.objects.get(pk=entry_id).course_id
+        succeeded, failed = CourseGradeReport.generate_shard(xmodule_instance_args, entry_id, course_id, shard)
+        subtask_status.increment(succeeded=succeeded, failed=failed, state=SUCCESS)
+    except Exception:  # pylint: disable=broad-except
+        TASK_LOG.exception(
+            u"Task: %s, InstructorTask ID: %s, grade report shard %s failed",
+            current_task_id, entry_id, shard['index'],
+        )
+        subtask_status.increment(state=FAILURE)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+
+    merge_subtask_id = shard['merge_subtask_id']
+    if claim_final_subtask(entry_id, merge_subtask_id):
+        merge_grades_csv_shards.apply_async(
+            (
+                entry_id,
+                xmodule_instance_args,
+                shard,
+                SubtaskStatus.create(merge_subtask_id).to_dict(),
+            ),
+            task_id=merge_subtask_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
+def merge_grades_csv_shards(entry_id, xmodule_instance_args, plan, subtask_status_dict):
+    """
+    Combine the partial grade reports written by `calculate_grades_csv_shard`
+    into the final grade report.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        course_id = InstructorTask.objects.get(pk=entry_id).course_id
+        CourseGradeReport.merge_shards(xmodule_instance_args, entry_id, course_id, plan)
+        subtask_status.increment(state=SUCCESS)
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception(u"Task: %s, InstructorTask ID: %s, merging grade report shards failed", current_task_id, entry_id)
+        subtask_status.increment(state=FAILURE)
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        # Without the merge there is no report, so the whole task has failed.
+        fail_instructor_task(entry_id, exc, traceback.format_exc())
+    else:
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -1,29 +1,36 @@
 """
 Functionality for generating grade reports.
 """
+import json
 import logging
 import re
 from collections import defaultdict, OrderedDict
 from datetime import datetime
 from itertools import chain, izip, izip_longest
+from tempfile import SpooledTemporaryFile
 from time import time
+from uuid import uuid4
 
+import unicodecsv
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from edx_user_state_client.interface import XBlockUserState
 from lazy import lazy
 from opaque_keys.edx.keys import UsageKey
 from pytz import UTC
 from six import text_type
+from xblock.fields import Scope
 
 from course_blocks.api import get_course_blocks
 from courseware.courses import get_course_by_id
-from courseware.user_state_client import DjangoXBlockUserStateClient
-from instructor_analytics.basic import list_problem_responses
-from instructor_analytics.csvs import format_dictlist
+from courseware.models import StudentModule
 from lms.djangoapps.certificates.models import CertificateWhitelist, GeneratedCertificate, certificate_info_for_user
+from lms.djangoapps.grades.config import should_persist_grades
 from lms.djangoapps.grades.context import grading_context, grading_context_for_course
 from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore
+from lms.djangoapps.instructor_task.subtasks import SubtaskStatus, initialize_subtask_info
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -32,12 +39,14 @@ from openedx.core.djangoapps.user_api.course_tag.api import BulkCourseTags
 from openedx.core.djangoapps.waffle_utils import WaffleSwitchNamespace
 from student.models import CourseEnrollment
 from student.roles import BulkRoleCache
+from util.db import outer_atomic
+from util.file import course_filename_prefix_generator
 from xmodule.modulestore.django import modulestore
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.split_test_module import get_split_user_partitions
 
 from .runner import TaskProgress
-from .utils import upload_csv_to_report_store
+from .utils import REPORT_TIMESTAMP_FORMAT, upload_csv_to_report_store
 
 WAFFLE_NAMESPACE = 'instructor_task'
 WAFFLE_SWITCHES = WaffleSwitchNamespace(name=WAFFLE_NAMESPACE)
@@ -72,7 +81,7 @@ class _CourseGradeReportContext(object):
     elements of this context are serialized and parsed across process
     boundaries.
     """
-    def __init__(self, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+    def __init__(self, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name, user_id_range=None):
         self.task_info_string = (
             u'Task: {task_id}, '
             u'InstructorTask ID: {entry_id}, '
@@ -86,6 +95,12 @@ class _CourseGradeReportContext(object):
         )
         self.action_name = action_name
         self.course_id = course_id
+        # When set, only learners whose ids fall in this inclusive (min, max)
+        # range are included; used by the shards of a parallel grade report.
+        self.user_id_range = user_id_range
+        # When set, the report starts from the previous grade report and only
+        # recomputes the rows of learners whose grades have changed since.
+        self.incremental = bool(_task_input and _task_input.get('incremental'))
         self.task_progress = TaskProgress(self.action_name, total=None, start_time=time())
 
     @lazy
@@ -210,6 +225,169 @@ class CourseGradeReport(object):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def generate_in_shards(
+        cls, create_shard_subtask_fcn, users_per_shard,
+        _xmodule_instance_args, _entry_id, course_id, _task_input, action_name,
+    ):
+        """
+        Public method to generate a grade report in parallel.
+
+        The enrolled learners are split into contiguous user-id ranges of
+        at most `users_per_shard` learners.  `create_shard_subtask_fcn` is
+        called with the shard plan and a SubtaskStatus for each range, and
+        must return a celery subtask that calls `generate_shard`.  Once all
+        of the shards are done, a final merge subtask (registered here, but
+        queued by the last shard to finish) calls `merge_shards`.
+
+        Courses that fit in a single shard are graded in-process by
+        `generate`.
+        """
+        # Incremental reports only recompute learners whose grades have
+        # changed, so they are not worth sharding.
+        if _task_input and _task_input.get('incremental'):
+            return cls.generate(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+
+        entry = InstructorTask.objects.get(pk=_entry_id)
+        # If the parent task is requeued after its shards have been queued,
+        # don't queue a second set of shards.
+        if len(entry.subtasks) > 0 and len(entry.task_output) > 0:
+            TASK_LOG.warning(u'Task %s has already been sharded: %s', entry.task_id, entry)
+            return json.loads(entry.task_output)
+
+        context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+        report = CourseGradeReport()
+        user_id_ranges = report._user_id_ranges(context, users_per_shard)
+        if len(user_id_ranges) <= 1:
+            return cls.generate(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+
+        total_num_users = sum(num_users for _, _, num_users in user_id_ranges)
+        shard_subtask_ids = [str(uuid4()) for _ in user_id_ranges]
+        merge_subtask_id = str(uuid4())
+        plan = {
+            'action_name': action_name,
+            'timestamp': time(),
+            'num_shards': len(user_id_ranges),
+            'merge_subtask_id': merge_subtask_id,
+        }
+
+        context.update_status(u'Queuing {} grade report shards'.format(len(user_id_ranges)))
+        with outer_atomic():
+            progress = initialize_subtask_info(
+                entry, action_name, total_num_users, shard_subtask_ids + [merge_subtask_id],
+            )
+
+        for index, ((min_user_id, max_user_id, _), subtask_id) in enumerate(zip(user_id_ranges, shard_subtask_ids)):
+            shard = dict(plan, index=index, min_user_id=min_user_id, max_user_id=max_user_id)
+            create_shard_subtask_fcn(shard, SubtaskStatus.create(subtask_id)).apply_async()
+
+        return progress
+
+    @classmethod
+    def generate_shard(cls, _xmodule_instance_args, _entry_id, course_id, shard):
+        """
+        Public method to generate the rows of a grade report for a single
+        shard of learners.  The rows are stored as partial CSVs (without
+        headers) for `merge_shards` to combine.
+
+        Returns a tuple of the number of learners that succeeded and failed.
+        """
+        with modulestore().bulk_operations(course_id):
+            context = _CourseGradeReportContext(
+                _xmodule_instance_args, _entry_id, course_id, shard, shard['action_name'],
+                user_id_range=(shard['min_user_id'], shard['max_user_id']),
+            )
+            report = CourseGradeReport()
+            success_rows, error_rows = [], []
+            for batch_success_rows, batch_error_rows in report._batched_rows(context):
+                success_rows.extend(batch_success_rows)
+                error_rows.extend(batch_error_rows)
+
+            report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+            report_store.store_rows(
+                course_id, cls._shard_filename(_entry_id, 'grade_report', shard['index']), success_rows,
+            )
+            if error_rows:
+                report_store.store_rows(
+                    course_id, cls._shard_filename(_entry_id, 'grade_report_err', shard['index']), error_rows,
+                )
+            return len(success_rows), len(error_rows)
+
+    @classmethod
+    def merge_shards(cls, _xmodule_instance_args, _entry_id, course_id, plan):
+        """
+        Public method to combine the partial CSVs written by each shard of
+        a parallel grade report into the final grade report, and remove
+        the partial CSVs.
+        """
+        with modulestore().bulk_operations(course_id):
+            context = _CourseGradeReportContext(
+                _xmodule_instance_args, _entry_id, course_id, plan, plan['action_name'],
+            )
+            report = CourseGradeReport()
+            report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+            shard_indices = range(plan['num_shards'])
+
+            success_filenames = [cls._shard_filename(_entry_id, 'grade_report', index) for index in shard_indices]
+            missing_filenames = [
+                filename for filename in success_filenames if not report_store.exists(course_id, filename)
+            ]
+            if missing_filenames:
+                raise ValueError(u'{}, Missing grade report shards: {}'.format(
+                    context.task_info_string, missing_filenames,
+                ))
+            error_filenames = [
+                filename for filename in (
+                    cls._shard_filename(_entry_id, 'grade_report_err', index) for index in shard_indices
+                )
+                if report_store.exists(course_id, filename)
+            ]
+
+            TASK_LOG.info(
+                u'%s, Task type: %s, Merging %d grade report shards',
+                context.task_info_string, context.action_name, plan['num_shards'],
+            )
+            date = datetime.fromtimestamp(plan['timestamp'], UTC)
+            upload_csv_to_report_store(
+                chain([report._success_headers(context)], cls._shard_rows(report_store, course_id, success_filenames)),
+                'grade_report',
+                course_id,
+                date,
+            )
+            if error_filenames:
+                upload_csv_to_report_store(
+                    chain([report._error_headers()], cls._shard_rows(report_store, course_id, error_filenames)),
+                    'grade_report_err',
+                    course_id,
+                    date,
+                )
+
+            for filename in success_filenames + error_filenames:
+                report_store.delete(course_id, filename)
+
+    @staticmethod
+    def _shard_filename(entry_id, csv_name, index):
+        """
+        Returns the name of the partial CSV written by the shard at `index`.
+        Partial CSVs are kept in a subdirectory so that they are not listed
+        on the instructor dashboard.
+        """
+        return u'grade_report_shards/{entry_id}/{csv_name}_{index:04d}.csv'.format(
+            entry_id=entry_id,
+            csv_name=csv_name,
+            index=index,
+        )
+
+    @staticmethod
+    def _shard_rows(report_store, course_id, filenames):
+        """
+        A generator of the rows stored in the given partial CSVs, in order.
+        """
+        for filename in filenames:
+            with report_store.open(course_id, filename) as csv_file:
+                for row in unicodecsv.reader(csv_file, encoding='utf-8-sig'):
+                    yield row
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -217,7 +395,11 @@ class CourseGradeReport(object):
         context.update_status(u'Starting grades')
         success_headers = self._success_headers(context)
         error_headers = self._error_headers()
-        batched_rows = self._batched_rows(context)
+        snapshot = self._previous_snapshot(context, success_headers) if context.incremental else None
+        if snapshot is not None:
+            batched_rows = self._incremental_batched_rows(context, *snapshot)
+        else:
+            batched_rows = self._batched_rows(context)
 
         context.update_status(u'Compiling grades')
         success_rows, error_rows = self._compile(context, batched_rows)
@@ -256,6 +438,87 @@ class CourseGradeReport(object):
             users = filter(lambda u: u is not None, users)
             yield self._rows_for_users(context, users)
 
+    def _incremental_batched_rows(self, context, snapshot_time, snapshot_rows):
+        """
+        A generator of batches of (success_rows, error_rows) for this report
+        that reuses the grade columns of `snapshot_rows` (a dict of the
+        previous report's rows keyed by user id) for all learners whose
+        persisted course grade has not been modified since `snapshot_time`.
+
+        Learners who were not in the previous report, or who failed to be
+        graded for it, are always regraded.  The other columns of every row
+        are always recomputed.
+        """
+        changed_user_ids = set(PersistentCourseGrade.objects.filter(
+            course_id=context.course_id,
+            modified__gte=snapshot_time,
+        ).values_list('user_id', flat=True))
+        enrolled_user_ids = get_user_model().objects.filter(
+            courseenrollment__course_id=context.course_id,
+        ).values_list('id', flat=True).order_by('id')
+
+        TASK_LOG.info(
+            u'%s, Task type: %s, Recomputing grades for %d learners changed since %s',
+            context.task_info_string, context.action_name, len(changed_user_ids), snapshot_time,
+        )
+        for user_ids in izip_longest(*([iter(enrolled_user_ids)] * self.USER_BATCH_SIZE)):
+            user_ids = [user_id for user_id in user_ids if user_id is not None]
+            stale_user_ids = set(
+                user_id for user_id in user_ids
+                if user_id in changed_user_ids or user_id not in snapshot_rows
+            )
+            success_rows, error_rows = [], []
+            if stale_user_ids:
+                users = get_user_model().objects.filter(id__in=stale_user_ids).select_related('profile')
+                success_rows, error_rows = self._rows_for_users(context, users)
+            if len(stale_user_ids) < len(user_ids):
+                users = get_user_model().objects.filter(
+                    id__in=[user_id for user_id in user_ids if user_id not in stale_user_ids],
+                ).select_related('profile')
+                success_rows += self._rows_from_snapshot(context, users, snapshot_rows)
+
+            rows_by_user_id = {row[0]: row for row in success_rows}
+            yield [rows_by_user_id[user_id] for user_id in user_ids if user_id in rows_by_user_id], error_rows
+
+    def _previous_snapshot(self, context, success_headers):
+        """
+        Returns a tuple of the time at which the most recent grade report
+        for the course was started, and a dict of its rows keyed by user id.
+
+        Returns None if there is no previous report, if grades are not
+        persisted for the course (so that changes cannot be detected), or
+        if the previous report's columns differ from `success_headers`.
+        """
+        if not should_persist_grades(context.course_id):
+            TASK_LOG.info(u'%s, Grades are not persisted, generating full report', context.task_info_string)
+            return None
+
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        filename_prefix = u'{}_grade_report_'.format(course_filename_prefix_generator(context.course_id))
+        snapshots = []
+        for filename, _ in report_store.links_for(context.course_id):
+            if filename.startswith(filename_prefix) and filename.endswith('.csv'):
+                try:
+                    snapshot_time = datetime.strptime(filename[len(filename_prefix):-len('.csv')], REPORT_TIMESTAMP_FORMAT)
+                except ValueError:
+                    # e.g. the error report, "<prefix>_grade_report_err_<timestamp>.csv"
+                    continue
+                snapshots.append((snapshot_time.replace(tzinfo=UTC), filename))
+        if not snapshots:
+            TASK_LOG.info(u'%s, No previous grade report, generating full report', context.task_info_string)
+            return None
+
+        snapshot_time, filename = max(snapshots)
+        with report_store.open(context.course_id, filename) as csv_file:
+            rows = unicodecsv.reader(csv_file, encoding='utf-8-sig')
+            if next(rows, None) != [text_type(header) for header in success_headers]:
+                TASK_LOG.info(
+                    u'%s, Columns of %s have changed, generating full report', context.task_info_string, filename,
+                )
+                return None
+            snapshot_rows = {int(row[0]): row for row in rows}
+        return snapshot_time, snapshot_rows
+
     def _compile(self, context, batched_rows):
         """
         Compiles and returns the complete list of (success_rows, error_rows) for
@@ -276,8 +539,11 @@ class CourseGradeReport(object):
     def _upload(self, context, success_headers, success_rows, error_headers, error_rows):
         """
         Creates and uploads a CSV for the given headers and rows.
+
+        The report is named with the time at which grading started, which
+        incremental reports use as the time of their starting snapshot.
         """
-        date = datetime.now(UTC)
+        date = datetime.fromtimestamp(context.task_progress.start_time, UTC)
         upload_csv_to_report_store([success_headers] + success_rows, 'grade_report', context.course_id, date)
         if len(error_rows) > 0:
             error_rows = [error_headers] + error_rows
@@ -315,18 +581,23 @@ class CourseGradeReport(object):
             users = users.select_related('profile')
             return grouper(users)
 
-        def users_for_course_v2(course_id):
+        def users_for_course_v2(course_id, user_id_range=None):
             """
             Get all the enrolled users in a course chunk by chunk.
 
             This generator method fetches & loads the enrolled user objects on demand which in chunk
             size defined. This method is a workaround to avoid out-of-memory errors.
+
+            If `user_id_range` is given, only users whose ids fall in that inclusive range are returned.
             """
             filter_kwargs = {
                 'courseenrollment__course_id': course_id,
             }
 
-            user_ids_list = get_user_model().objects.filter(**filter_kwargs).values_list('id', flat=True).order_by('id')
+            user_ids_list = get_user_model().objects.filter(**filter_kwargs)
+            if user_id_range is not None:
+                user_ids_list = user_ids_list.filter(id__range=user_id_range)
+            user_ids_list = user_ids_list.values_list('id', flat=True).order_by('id')
             user_chunks = grouper(user_ids_list)
             for user_ids in user_chunks:
                 user_ids = [user_id for user_id in user_ids if user_id is not None]
@@ -340,6 +611,10 @@ class CourseGradeReport(object):
                 yield users
 
         task_log_message = u'{}, Task type: {}'.format(context.task_info_string, context.action_name)
+        if context.user_id_range is not None:
+            TASK_LOG.info(u'%s, Creating Course Grade for users in range %s', task_log_message, context.user_id_range)
+            return users_for_course_v2(context.course_id, context.user_id_range)
+
         if WAFFLE_SWITCHES.is_enabled(OPTIMIZE_GET_LEARNERS_FOR_COURSE):
             TASK_LOG.info(u'%s, Creating Course Grade with optimization', task_log_message)
             return users_for_course_v2(context.course_id)
@@ -348,6 +623,22 @@ class CourseGradeReport(object):
         batch_users = users_for_course(context.course_id)
         return batch_users
 
+    def _user_id_ranges(self, context, users_per_shard):
+        """
+        Returns a list of (min_user_id, max_user_id, num_users) tuples that
+        partition the users enrolled in the course into contiguous id ranges
+        of at most `users_per_shard` users each.
+        """
+        user_ids = get_user_model().objects.filter(
+            courseenrollment__course_id=context.course_id,
+        ).values_list('id', flat=True).order_by('id')
+
+        user_id_ranges = []
+        for user_ids_chunk in izip_longest(*([iter(user_ids)] * users_per_shard)):
+            user_ids_chunk = [user_id for user_id in user_ids_chunk if user_id is not None]
+            user_id_ranges.append((user_ids_chunk[0], user_ids_chunk[-1], len(user_ids_chunk)))
+        return user_id_ranges
+
     def _user_grades(self, course_grade, context):
         """
         Returns a list of grade results for the given course_grade corresponding
@@ -442,7 +733,7 @@ class CourseGradeReport(object):
         )
         return [enrollment_mode, verification_status]
 
-    def _user_certificate_info(self, user, context, course_grade, bulk_certs):
+    def _user_certificate_info(self, user, context, letter_grade, bulk_certs):
         """
         Returns the course certification information for the given user.
         """
@@ -450,19 +741,18 @@ class CourseGradeReport(object):
         certificate_info = certificate_info_for_user(
             user,
             context.course_id,
-            course_grade.letter_grade,
+            letter_grade,
             is_whitelisted,
             bulk_certs.certificates_by_user.get(user.id),
         )
         TASK_LOG.info(
             u'Student certificate eligibility: %s '
-            u'(user=%s, course_id=%s, grade_percent=%s letter_grade=%s gradecutoffs=%s, allow_certificate=%s, '
+            u'(user=%s, course_id=%s, letter_grade=%s gradecutoffs=%s, allow_certificate=%s, '
             u'is_whitelisted=%s)',
             certificate_info[0],
             user,
             context.course_id,
-            course_grade.percent,
-            course_grade.letter_grade,
+            letter_grade,
             context.course.grade_cutoffs,
             user.profile.allow_certificate,
             is_whitelisted,
@@ -487,18 +777,48 @@ class CourseGradeReport(object):
                     # An empty gradeset means we failed to grade a student.
                     error_rows.append([user.id, user.username, text_type(error)])
                 else:
-                    success_rows.append(
-                        [user.id, user.email, user.username] +
-                        self._user_grades(course_grade, context) +
-                        self._user_cohort_group_names(user, context) +
-                        self._user_experiment_group_names(user, context) +
-                        self._user_team_names(user, bulk_context.teams) +
-                        self._user_verification_mode(user, context, bulk_context.enrollments) +
-                        self._user_certificate_info(user, context, course_grade, bulk_context.certs) +
-                        [_user_enrollment_status(user, context.course_id)]
-                    )
+                    success_rows.append(self._user_row(
+                        user, context, bulk_context, self._user_grades(course_grade, context), course_grade.letter_grade,
+                    ))
             return success_rows, error_rows
 
+    def _rows_from_snapshot(self, context, users, snapshot_rows):
+        """
+        Returns a list of rows for the given users for this report, reusing
+        the grade columns of their rows in `snapshot_rows`.  The other
+        columns are recomputed, since they can change without the learner's
+        grade changing.
+        """
+        num_grade_columns = len(self._grades_header(context))
+        with modulestore().bulk_operations(context.course_id):
+            bulk_context = _CourseGradeBulkContext(context, users)
+
+            rows = []
+            for user in users:
+                try:
+                    letter_grade = PersistentCourseGrade.read(user.id, context.course_id).letter_grade or None
+                except PersistentCourseGrade.DoesNotExist:
+                    letter_grade = None
+                grade_results = snapshot_rows[user.id][3:3 + num_grade_columns]
+                rows.append(self._user_row(user, context, bulk_context, grade_results, letter_grade))
+            return rows
+
+    def _user_row(self, user, context, bulk_context, grade_results, letter_grade):
+        """
+        Returns the row for the given user for this report, with the given
+        grade columns.
+        """
+        return (
+            [user.id, user.email, user.username] +
+            grade_results +
+            self._user_cohort_group_names(user, context) +
+            self._user_experiment_group_names(user, context) +
+            self._user_team_names(user, bulk_context.teams) +
+            self._user_verification_mode(user, context, bulk_context.enrollments) +
+            self._user_certificate_info(user, context, letter_grade, bulk_context.certs) +
+            [_user_enrollment_status(user, context.course_id)]
+        )
+
 
 class ProblemGradeReport(object):
     @classmethod
@@ -598,6 +918,12 @@ class ProblemGradeReport(object):
 
 
 class ProblemResponses(object):
+    # Columns included in every row of the report.
+    STUDENT_DATA_KEYS = ('username', 'title', 'location', 'block_key', 'state')
+
+    # Size of the spooled response data that is held in memory before
+    # spilling to a temporary file.
+    SPOOL_MAX_SIZE = 10 * 1024 * 1024
 
     @classmethod
     def _build_problem_list(cls, course_blocks, root, path=None):
@@ -627,10 +953,42 @@ class ProblemResponses(object):
                 yield result
 
     @classmethod
-    def _build_student_data(cls, user_id, course_key, usage_key_str):
+    def _iter_student_modules(cls, course_key, block_key, limit=None):
         """
-        Generate a list of problem responses for all problem under the
-        ``problem_location`` root.
+        A generator of lists of the StudentModule rows for the given block,
+        in primary key order.  Rows are fetched USER_STATE_BATCH_SIZE at a
+        time using the primary key as a cursor, so that neither the query
+        nor the results grow with the number of rows.
+
+        Arguments:
+            course_key (CourseKey): The course containing the block
+            block_key (UsageKey): The block whose rows are returned
+            limit (int): If given, the maximum number of rows to return
+
+        Yields:
+            List[StudentModule]: the next chunk of rows
+        """
+        student_modules = StudentModule.objects.filter(
+            course_id=course_key,
+            module_state_key=block_key,
+        ).select_related('student').order_by('id')
+
+        last_id = 0
+        while limit is None or limit > 0:
+            chunk_size = settings.USER_STATE_BATCH_SIZE if limit is None else min(settings.USER_STATE_BATCH_SIZE, limit)
+            chunk = list(student_modules.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].id
+            if limit is not None:
+                limit -= len(chunk)
+
+    @classmethod
+    def _iter_student_data(cls, user_id, course_key, usage_key_str):
+        """
+        Generate the problem responses for all problems under the
+        ``usage_key_str`` root, one response at a time.
 
         Arguments:
             user_id (int): The user id for the user generating the report
@@ -639,22 +997,19 @@ class ProblemResponses(object):
             usage_key_str (str): The generated report will include this
                 block and it child blocks.
 
-        Returns:
-              Tuple[List[Dict], List[str]]: Returns a list of dictionaries
-                containing the student data which will be included in the
-                final csv, and the features/keys to include in that CSV.
+        Yields:
+              Dict: The student data for one response, which will be
+                included as a row in the final csv.  Besides the keys in
+                ``STUDENT_DATA_KEYS``, a row contains any columns returned
+                by the block's report generator.
         """
         usage_key = UsageKey.from_string(usage_key_str).map_into_course(course_key)
         user = get_user_model().objects.get(pk=user_id)
         course_blocks = get_course_blocks(user, usage_key)
 
-        student_data = []
         max_count = settings.FEATURES.get('MAX_PROBLEM_RESPONSES_COUNT')
 
         store = modulestore()
-        user_state_client = DjangoXBlockUserStateClient()
-
-        student_data_keys = set()
 
         with store.bulk_operations(course_key):
             for title, path, block_key in cls._build_problem_list(course_blocks, usage_key):
@@ -664,63 +1019,88 @@ class ProblemResponses(object):
                     continue
 
                 block = store.get_item(block_key)
-                generated_report_data = defaultdict(list)
-
-                # Blocks can implement the generate_report_data method to provide their own
-                # human-readable formatting for user state.
-                if hasattr(block, 'generate_report_data'):
-                    try:
-                        user_state_iterator = user_state_client.iter_all_for_block(block_key)
-                        for username, state in block.generate_report_data(user_state_iterator, max_count):
-                            generated_report_data[username].append(state)
-                    except NotImplementedError:
-                        pass
-
-                responses = []
-
-                for response in list_problem_responses(course_key, block_key, max_count):
-                    response['title'] = title
-                    # A human-readable location for the current block
-                    response['location'] = ' > '.join(path)
-                    # A machine-friendly location for the current block
-                    response['block_key'] = str(block_key)
-                    # A block that has a single state per user can contain multiple responses
-                    # within the same state.
-                    user_states = generated_report_data.get(response['username'], [])
-                    if user_states:
-                        # For each response in the block, copy over the basic data like the
-                        # title, location, block_key and state, and add in the responses
-                        for user_state in user_states:
-                            user_response = response.copy()
-                            user_response.update(user_state)
-                            student_data_keys = student_data_keys.union(user_state.keys())
-                            responses.append(user_response)
-                    else:
-                        responses.append(response)
 
-                student_data += responses
+                for student_modules in cls._iter_student_modules(course_key, block_key, max_count):
+                    generated_report_data = defaultdict(list)
+
+                    # Blocks can implement the generate_report_data method to provide their own
+                    # human-readable formatting for user state.
+                    if hasattr(block, 'generate_report_data'):
+                        user_state_iterator = (
+                            XBlockUserState(
+                                student_module.student.username,
+                                student_module.module_state_key,
+                                state,
+                                student_module.modified,
+                                Scope.user_state,
+                            )
+                            for student_module, state in (
+                                (student_module, json.loads(student_module.state))
+                                for student_module in student_modules
+                            )
+                            if state != {}
+                        )
+                        try:
+                            for username, state in block.generate_report_data(user_state_iterator, max_count):
+                                generated_report_data[username].append(state)
+                        except NotImplementedError:
+                            pass
+
+                    num_responses = 0
+                    for student_module in student_modules:
+                        response = {
+                            'username': student_module.student.username,
+                            'state': student_module.state,
+                            'title': title,
+                            # A human-readable location for the current block
+                            'location': ' > '.join(path),
+                            # A machine-friendly location for the current block
+                            'block_key': str(block_key),
+                        }
+                        # A block that has a single state per user can contain multiple responses
+                        # within the same state.
+                        user_states = generated_report_data.get(response['username'], [])
+                        if user_states:
+                            # For each response in the block, copy over the basic data like the
+                            # title, location, block_key and state, and add in the responses
+                            for user_state in user_states:
+                                user_response = response.copy()
+                                user_response.update(user_state)
+                                num_responses += 1
+                                yield user_response
+                        else:
+                            num_responses += 1
+                            yield response
+
+                    if max_count is not None:
+                        max_count -= num_responses
+                        if max_count <= 0:
+                            return
 
-                if max_count is not None:
-                    max_count -= len(responses)
-                    if max_count <= 0:
-                        break
+    @classmethod
+    def _student_data_keys(cls, report_keys):
+        """
+        Returns the CSV columns for a report whose rows contain the given keys.
 
-        # Keep the keys in a useful order, starting with username, title and location,
-        # then the columns returned by the xblock report generator in sorted order and
-        # finally end with the more machine friendly block_key and state.
-        student_data_keys_list = (
+        Keep the keys in a useful order, starting with username, title and location,
+        then the columns returned by the xblock report generator in sorted order and
+        finally end with the more machine friendly block_key and state.
+        """
+        return (
             ['username', 'title', 'location'] +
-            sorted(student_data_keys) +
+            sorted(set(report_keys) - set(cls.STUDENT_DATA_KEYS)) +
             ['block_key', 'state']
         )
 
-        return student_data, student_data_keys_list
-
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, task_input, action_name):
         """
         For a given `course_id`, generate a CSV file containing
         all student answers to a given problem, and store using a `ReportStore`.
+
+        The CSV columns depend on every response, so responses are first
+        spooled to a temporary file as they are generated, and then written
+        out as CSV rows; memory use does not grow with the number of responses.
         """
         start_time = time()
         start_date = datetime.now(UTC)
@@ -730,31 +1110,38 @@ class ProblemResponses(object):
         task_progress.update_task_state(extra_meta=current_step)
         problem_location = task_input.get('problem_location')
 
-        # Compute result table and format it
-        student_data, student_data_keys = cls._build_student_data(
-            user_id=task_input.get('user_id'),
-            course_key=course_id,
-            usage_key_str=problem_location
-        )
-
-        for data in student_data:
-            for key in student_data_keys:
-                data.setdefault(key, '')
+        with SpooledTemporaryFile(max_size=cls.SPOOL_MAX_SIZE) as spooled_student_data:
+            # Compute result table, one JSON-encoded response per line
+            report_keys = set()
+            num_rows = 0
+            for data in cls._iter_student_data(
+                user_id=task_input.get('user_id'),
+                course_key=course_id,
+                usage_key_str=problem_location
+            ):
+                report_keys.update(data)
+                spooled_student_data.write(json.dumps(data))
+                spooled_student_data.write('\n')
+                num_rows += 1
 
-        header, rows = format_dictlist(student_data, student_data_keys)
+            student_data_keys = cls._student_data_keys(report_keys)
 
-        task_progress.attempted = task_progress.succeeded = len(rows)
-        task_progress.skipped = task_progress.total - task_progress.attempted
+            task_progress.attempted = task_progress.succeeded = num_rows
+            task_progress.skipped = task_progress.total - task_progress.attempted
 
-        rows.insert(0, header)
+            current_step = {'step': 'Uploading CSV'}
+            task_progress.update_task_state(extra_meta=current_step)
 
-        current_step = {'step': 'Uploading CSV'}
-        task_progress.update_task_state(extra_meta=current_step)
+            # Perform the upload
+            spooled_student_data.seek(0)
+            rows = (
+                [data.get(key, '') for key in student_data_keys]
+                for data in (json.loads(line) for line in spooled_student_data)
+            )
+            problem_location = re.sub(r'[:/]', '_', problem_location)
+            csv_name = 'student_state_from_{}'.format(problem_location)
+            report_name = upload_csv_to_report_store(chain([student_data_keys], rows), csv_name, course_id, start_date)
 
-        # Perform the upload
-        problem_location = re.sub(r'[:/]', '_', problem_location)
-        csv_name = 'student_state_from_{}'.format(problem_location)
-        report_name = upload_csv_to_report_store(rows, csv_name, course_id, start_date)
         current_step = {'step': 'CSV uploaded', 'report_name': report_name}
 
         return task_progress.update_task_state(extra_meta=current_step)
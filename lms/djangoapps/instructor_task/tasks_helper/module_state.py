@@ -3,6 +3,8 @@ Instructor Tasks related to module state.
 """
 import json
 import logging
+from collections import OrderedDict
+from itertools import islice
 from time import time
 
 from django.utils.translation import ugettext_noop
@@ -13,8 +15,9 @@ from courseware.courses import get_course_by_id, get_problems_in_section
 from courseware.model_data import DjangoKeyValueStore, FieldDataCache
 from courseware.models import StudentModule
 from courseware.module_render import get_module_for_descriptor_internal
+from courseware.user_state_client import DjangoXBlockUserStateClient
 from lms.djangoapps.grades.events import GRADES_OVERRIDE_EVENT_TYPE, GRADES_RESCORE_EVENT_TYPE
-from student.models import get_user_by_username_or_email
+from student.models import anonymous_id_for_user, get_user_by_username_or_email
 from track.event_transaction_utils import create_new_event_transaction_id, set_event_transaction_type
 from track.views import task_track
 from util.db import outer_atomic
@@ -28,8 +31,12 @@ from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED,
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# Number of StudentModules handed to a prime_fcn at a time.
+STUDENT_MODULE_CHUNK_SIZE = 100
 
-def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
+
+def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name,
+                                prime_fcn=None):
     """
     Performs generic update by visiting StudentModule instances with the update_fcn provided.
 
@@ -41,6 +48,10 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     on the particular student module failed.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
+    If `prime_fcn` is not None, it is called before updating each chunk of StudentModules, with the dict of
+    problem descriptors by usage key and the list of StudentModules in the chunk, so that it can prepare
+    work shared between the updates.
+
     The return value is a dict containing the task's results, with the following keys:
 
           'attempted': number of attempts made
@@ -86,26 +97,89 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, len(modules_to_update), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        module_descriptor = problems[unicode(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        update_status = update_fcn(module_descriptor, module_to_update, task_input)
-        if update_status == UPDATE_STATUS_SUCCEEDED:
-            # If the update_fcn returns true, then it performed some kind of work.
-            # Logging of failures is left to the update_fcn itself.
-            task_progress.succeeded += 1
-        elif update_status == UPDATE_STATUS_FAILED:
-            task_progress.failed += 1
-        elif update_status == UPDATE_STATUS_SKIPPED:
-            task_progress.skipped += 1
-        else:
-            raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
+    modules_iter = iter(modules_to_update)
+    while True:
+        chunk = list(islice(modules_iter, STUDENT_MODULE_CHUNK_SIZE))
+        if not chunk:
+            break
+        for module_to_update in chunk:
+            _write_pending_state(module_to_update)
+        if prime_fcn is not None:
+            prime_fcn(problems, chunk)
+
+        for module_to_update in chunk:
+            task_progress.attempted += 1
+            module_descriptor = problems[unicode(module_to_update.module_state_key)]
+            # There is no try here:  if there's an error, we let it throw, and the task will
+            # be marked as FAILED, with a stack trace.
+            update_status = update_fcn(module_descriptor, module_to_update, task_input)
+            if update_status == UPDATE_STATUS_SUCCEEDED:
+                # If the update_fcn returns true, then it performed some kind of work.
+                # Logging of failures is left to the update_fcn itself.
+                task_progress.succeeded += 1
+            elif update_status == UPDATE_STATUS_FAILED:
+                task_progress.failed += 1
+            elif update_status == UPDATE_STATUS_SKIPPED:
+                task_progress.skipped += 1
+            else:
+                raise UpdateProblemModuleStateError("Unexpected update_status returned: {}".format(update_status))
 
     return task_progress.update_task_state()
 
 
+def _write_pending_state(student_module):
+    """
+    Writes the state changes to the given StudentModule that are still
+    pending in write-behind mode, and reloads it if there were any, so that
+    they are neither missing from it when it's updated nor written over the
+    update later.
+    """
+    student = student_module.student
+    usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+    if DjangoXBlockUserStateClient(student, write_behind=False).write_pending(student.username, [usage_key]):
+        student_module.refresh_from_db()
+
+
+def prime_rescore_scripts(xmodule_instance_args, problems, student_modules):
+    """
+    Runs the scripts of the capa problems about to be rescored for all the learners of
+    `student_modules` at once, with as few sandboxed processes as possible per problem.
+    Instantiating each learner's problem during the rescore then finds the script
+    results in the safe_exec cache, rather than starting a sandbox of its own.
+
+    This is only an optimization, so it never fails the task.
+    """
+    modules_by_problem = OrderedDict()
+    for student_module in student_modules:
+        modules_by_problem.setdefault(unicode(student_module.module_state_key), []).append(student_module)
+
+    for usage_key, problem_modules in modules_by_problem.iteritems():
+        if len(problem_modules) < 2:
+            continue
+        first_module = problem_modules[0]
+        try:
+            instance = _get_module_instance_for_task(
+                first_module.course_id,
+                first_module.student,
+                problems[usage_key],
+                xmodule_instance_args,
+                grade_bucket_type='rescore',
+            )
+            lcp = getattr(instance, 'lcp', None)
+            if lcp is None:
+                continue
+
+            learners = []
+            for student_module in problem_modules[1:]:
+                seed = json.loads(student_module.state or '{}').get('seed')
+                if seed is not None:
+                    # Capa problems are XModules, which get the per-student anonymized id.
+                    learners.append((seed, anonymous_id_for_user(student_module.student, None)))
+            lcp.prime_script_cache(learners)
+        except Exception:  # pylint: disable=broad-except
+            TASK_LOG.warning(u"Could not run the scripts of problem %s ahead of rescoring it", usage_key, exc_info=True)
+
+
 @outer_atomic
 def rescore_problem_module_state(xmodule_instance_args, module_descriptor, student_module, task_input):
     '''
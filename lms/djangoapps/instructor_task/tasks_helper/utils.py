@@ -12,6 +12,9 @@ UPDATE_STATUS_SUCCEEDED = 'succeeded'
 UPDATE_STATUS_FAILED = 'failed'
 UPDATE_STATUS_SKIPPED = 'skipped'
 
+# format of the timestamp included in report filenames
+REPORT_TIMESTAMP_FORMAT = "%Y-%m-%d-%H%M"
+
 
 def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name='GRADES_DOWNLOAD'):
     """
@@ -34,7 +37,7 @@ def upload_csv_to_report_store(rows, csv_name, course_id, timestamp, config_name
     report_name = u"{course_prefix}_{csv_name}_{timestamp_str}.csv".format(
         course_prefix=course_filename_prefix_generator(course_id),
         csv_name=csv_name,
-        timestamp_str=timestamp.strftime("%Y-%m-%d-%H%M")
+        timestamp_str=timestamp.strftime(REPORT_TIMESTAMP_FORMAT)
     )
 
     report_store.store_rows(course_id, report_name, rows)
@@ -1,11 +1,20 @@
 """
 Unit tests for instructor_task subtasks.
 """
+import json
 from uuid import uuid4
 
+from celery.states import FAILURE, SUCCESS
 from mock import Mock, patch
 
-from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    claim_final_subtask,
+    fail_instructor_task,
+    initialize_subtask_info,
+    queue_subtasks_for_query,
+    update_subtask_status
+)
 from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskCourseTestCase
 from student.models import CourseEnrollment
@@ -80,3 +89,42 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+    def test_claim_final_subtask(self):
+        """Test that the final subtask is claimed only once, after all other subtasks are done."""
+        instructor_task = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+        subtask_ids = [str(uuid4()), str(uuid4())]
+        final_subtask_id = str(uuid4())
+        initialize_subtask_info(instructor_task, 'graded', 2, subtask_ids + [final_subtask_id])
+        self.assertFalse(claim_final_subtask(instructor_task.id, final_subtask_id))
+
+        for subtask_id in subtask_ids:
+            update_subtask_status(
+                instructor_task.id, subtask_id, SubtaskStatus.create(subtask_id, succeeded=1, state=SUCCESS),
+            )
+        self.assertTrue(claim_final_subtask(instructor_task.id, final_subtask_id))
+        self.assertFalse(claim_final_subtask(instructor_task.id, final_subtask_id))
+
+    def test_fail_instructor_task(self):
+        """Test that a failed final subtask marks the whole task as failed, rather than succeeded."""
+        instructor_task = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+        final_subtask_id = str(uuid4())
+        initialize_subtask_info(instructor_task, 'graded', 1, [final_subtask_id])
+        update_subtask_status(
+            instructor_task.id, final_subtask_id, SubtaskStatus.create(final_subtask_id, state=FAILURE),
+        )
+        fail_instructor_task(instructor_task.id, ValueError('Missing grade report shards'), None)
+
+        instructor_task.refresh_from_db()
+        self.assertEqual(instructor_task.task_state, FAILURE)
+        self.assertEqual(json.loads(instructor_task.task_output)['exception'], 'ValueError')
@@ -8,12 +8,15 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
 import shutil
 import tempfile
 import urllib
 from contextlib import contextmanager
 from datetime import datetime, timedelta
+from itertools import chain
+from uuid import uuid4
 
 import ddt
 import unicodecsv
@@ -26,7 +29,7 @@ from django.urls import reverse
 from django.test.utils import override_settings
 from edx_django_utils.cache import RequestCache
 from freezegun import freeze_time
-from instructor_analytics.basic import UNAVAILABLE, list_problem_responses
+from instructor_analytics.basic import UNAVAILABLE
 from mock import MagicMock, Mock, patch, ANY
 from pytz import UTC
 from shoppingcart.models import (
@@ -76,6 +79,7 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_course_survey_report,
     upload_ora2_data,
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
@@ -88,7 +92,7 @@ from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from openedx.core.djangoapps.credit.tests.factories import CreditCourseFactory
 from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase, TestConditionalContent
-from ..models import ReportStore
+from ..models import InstructorTask, ReportStore
 from ..tasks_helper.utils import UPDATE_STATUS_FAILED, UPDATE_STATUS_SUCCEEDED
 
 
@@ -442,6 +446,185 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         )
 
 
+@patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+class TestShardedInstructorGradeReport(InstructorGradeReportTestCase):
+    """
+    Tests that grade reports generated in parallel shards match the
+    reports generated by a single task.
+    """
+    def setUp(self):
+        super(TestShardedInstructorGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+            for index in range(5)
+        ]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_type='grade_course',
+        )
+
+    def _generate_in_shards(self, users_per_shard):
+        """
+        Queue the shards of a grade report, returning the shards that
+        would have been passed to the shard subtasks.
+        """
+        create_shard_subtask_fcn = Mock()
+        progress = CourseGradeReport.generate_in_shards(
+            create_shard_subtask_fcn, users_per_shard, None, self.entry.id, self.course.id, None, 'graded',
+        )
+        shards = [call_args[0][0] for call_args in create_shard_subtask_fcn.call_args_list]
+        return progress, shards
+
+    def test_shards_cover_all_learners(self, _mock_current_task):
+        progress, shards = self._generate_in_shards(users_per_shard=2)
+        self.assertEqual(progress['total'], len(self.students))
+        self.assertEqual(len(shards), 3)
+        self.assertEqual(shards[0]['min_user_id'], self.students[0].id)
+        self.assertEqual(shards[-1]['max_user_id'], self.students[-1].id)
+
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        subtask_dict = json.loads(entry.subtasks)
+        # One subtask per shard, plus the merge subtask.
+        self.assertEqual(subtask_dict['total'], len(shards) + 1)
+        self.assertIn(shards[0]['merge_subtask_id'], subtask_dict['status'])
+
+    def test_single_shard_generates_in_process(self, _mock_current_task):
+        progress, shards = self._generate_in_shards(users_per_shard=len(self.students))
+        self.assertEqual(shards, [])
+        self.assertDictContainsSubset({'attempted': 5, 'succeeded': 5, 'failed': 0}, progress)
+
+    def test_merge_shards(self, _mock_current_task):
+        _, shards = self._generate_in_shards(users_per_shard=2)
+        counts = [
+            CourseGradeReport.generate_shard(None, self.entry.id, self.course.id, shard)
+            for shard in shards
+        ]
+        self.assertEqual(counts, [(2, 0), (2, 0), (1, 0)])
+
+        CourseGradeReport.merge_shards(None, self.entry.id, self.course.id, shards[0])
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        # Only the merged report is listed, and the partial CSVs are removed.
+        self.assertEqual(len(links), 1)
+        self.assertIn('grade_report', links[0][0])
+        for index in range(len(shards)):
+            self.assertFalse(report_store.exists(
+                self.course.id, CourseGradeReport._shard_filename(self.entry.id, 'grade_report', index),
+            ))
+        self.verify_rows_in_csv(
+            [
+                {'Student ID': unicode(student.id), 'Username': student.username, 'Grade': '0.0'}
+                for student in self.students
+            ],
+            ignore_other_columns=True,
+        )
+
+    def test_merge_missing_shard(self, _mock_current_task):
+        _, shards = self._generate_in_shards(users_per_shard=2)
+        CourseGradeReport.generate_shard(None, self.entry.id, self.course.id, shards[0])
+        with self.assertRaises(ValueError):
+            CourseGradeReport.merge_shards(None, self.entry.id, self.course.id, shards[0])
+
+
+@patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+class TestIncrementalInstructorGradeReport(InstructorGradeReportTestCase):
+    """
+    Tests that incremental grade reports only recompute learners whose
+    grades have changed since the previous report.
+    """
+    def setUp(self):
+        super(TestIncrementalInstructorGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [
+            self.create_student(u'student{}'.format(index), u'student{}@example.com'.format(index))
+            for index in range(3)
+        ]
+        self.report_time = datetime(2018, 1, 1, tzinfo=UTC)
+
+    def _generate(self, incremental, minutes_after_report=0):
+        """
+        Generates a grade report, returning the ids of the users whose
+        rows were recomputed.
+        """
+        rows_for_users = CourseGradeReport._rows_for_users
+        with freeze_time(self.report_time + timedelta(minutes=minutes_after_report)):
+            with patch.object(
+                CourseGradeReport, '_rows_for_users', autospec=True, side_effect=rows_for_users,
+            ) as mock_rows_for_users:
+                result = CourseGradeReport.generate(None, None, self.course.id, {'incremental': incremental}, 'graded')
+        num_students = len(self.students)
+        self.assertDictContainsSubset({'attempted': num_students, 'succeeded': num_students, 'failed': 0}, result)
+        return sorted(
+            user.id for call_args in mock_rows_for_users.call_args_list for user in call_args[0][2]
+        )
+
+    def _set_grades_modified(self, modified, users=None):
+        """
+        Sets the modified time of the persisted course grades of the given users.
+        """
+        grades = PersistentCourseGrade.objects.filter(course_id=self.course.id)
+        if users is not None:
+            grades = grades.filter(user_id__in=[user.id for user in users])
+        grades.update(modified=modified)
+
+    def test_no_previous_report(self, _mock_current_task):
+        recomputed_user_ids = self._generate(incremental=True)
+        self.assertEqual(recomputed_user_ids, [student.id for student in self.students])
+
+    def test_only_changed_learners_recomputed(self, _mock_current_task):
+        self._generate(incremental=False)
+        self._set_grades_modified(self.report_time - timedelta(days=1))
+        self._set_grades_modified(self.report_time + timedelta(minutes=1), users=[self.students[1]])
+
+        recomputed_user_ids = self._generate(incremental=True, minutes_after_report=5)
+        self.assertEqual(recomputed_user_ids, [self.students[1].id])
+        self.verify_rows_in_csv(
+            [
+                {'Student ID': unicode(student.id), 'Username': student.username}
+                for student in self.students
+            ],
+            ignore_other_columns=True,
+        )
+
+    def test_other_columns_recomputed(self, _mock_current_task):
+        self._generate(incremental=False)
+        self._set_grades_modified(self.report_time - timedelta(days=1))
+        self.students[0].email = u'changed@example.com'
+        self.students[0].save()
+        CourseEnrollment.unenroll(self.students[1], self.course.id)
+
+        recomputed_user_ids = self._generate(incremental=True, minutes_after_report=5)
+        self.assertEqual(recomputed_user_ids, [])
+        self.verify_rows_in_csv(
+            [
+                {'Student ID': unicode(self.students[0].id), 'Email': u'changed@example.com',
+                 'Enrollment Status': ENROLLED_IN_COURSE},
+                {'Student ID': unicode(self.students[1].id), 'Email': self.students[1].email,
+                 'Enrollment Status': NOT_ENROLLED_IN_COURSE},
+                {'Student ID': unicode(self.students[2].id), 'Email': self.students[2].email,
+                 'Enrollment Status': ENROLLED_IN_COURSE},
+            ],
+            ignore_other_columns=True,
+        )
+
+    def test_new_learner_recomputed(self, _mock_current_task):
+        self._generate(incremental=False)
+        self._set_grades_modified(self.report_time - timedelta(days=1))
+        self.students.append(self.create_student(u'student3', u'student3@example.com'))
+
+        recomputed_user_ids = self._generate(incremental=True, minutes_after_report=5)
+        self.assertEqual(recomputed_user_ids, [self.students[3].id])
+
+    @patch.dict(settings.FEATURES, {'PERSISTENT_GRADES_ENABLED_FOR_ALL_TESTS': False})
+    def test_grades_not_persisted(self, _mock_current_task):
+        self._generate(incremental=False)
+        recomputed_user_ids = self._generate(incremental=True, minutes_after_report=5)
+        self.assertEqual(recomputed_user_ids, [student.id for student in self.students])
+
+
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
 
@@ -505,9 +688,9 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         CapaDescriptor.generate_report_data = generate_report_data
 
     @patch.dict('django.conf.settings.FEATURES', {'MAX_PROBLEM_RESPONSES_COUNT': 4})
-    def test_build_student_data_limit(self):
+    def test_iter_student_data_limit(self):
         """
-        Ensure that the _build_student_data method respects the global setting for
+        Ensure that the _iter_student_data method respects the global setting for
         maximum responses to return in a report.
         """
         self.define_option_problem(u'Problem1')
@@ -515,19 +698,15 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
             student = self.create_student('student{}'.format(ctr))
             self.submit_student_answer(student.username, u'Problem1', ['Option 1'])
 
-        student_data, _ = ProblemResponses._build_student_data(
+        student_data = list(ProblemResponses._iter_student_data(
             user_id=self.instructor.id,
             course_key=self.course.id,
             usage_key_str=str(self.course.location),
-        )
+        ))
 
         self.assertEquals(len(student_data), 4)
 
-    @patch(
-        'lms.djangoapps.instructor_task.tasks_helper.grades.list_problem_responses',
-        wraps=list_problem_responses
-    )
-    def test_build_student_data_for_block_without_generate_report_data(self, mock_list_problem_responses):
+    def test_iter_student_data_for_block_without_generate_report_data(self):
         """
         Ensure that building student data for a block the doesn't have the
         ``generate_report_data`` method works as expected.
@@ -535,11 +714,11 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         problem = self.define_option_problem(u'Problem1')
         self.submit_student_answer(self.student.username, u'Problem1', ['Option 1'])
         with self._remove_capa_report_generator():
-            student_data, _ = ProblemResponses._build_student_data(
+            student_data = list(ProblemResponses._iter_student_data(
                 user_id=self.instructor.id,
                 course_key=self.course.id,
                 usage_key_str=str(problem.location),
-            )
+            ))
         self.assertEquals(len(student_data), 1)
         self.assertDictContainsSubset({
             'username': 'student',
@@ -548,10 +727,9 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
             'title': 'Problem1',
         }, student_data[0])
         self.assertIn('state', student_data[0])
-        mock_list_problem_responses.assert_called_with(self.course.id, ANY, ANY)
 
     @patch('xmodule.capa_module.CapaDescriptor.generate_report_data', create=True)
-    def test_build_student_data_for_block_with_mock_generate_report_data(self, mock_generate_report_data):
+    def test_iter_student_data_for_block_with_mock_generate_report_data(self, mock_generate_report_data):
         """
         Ensure that building student data for a block that supports the
         ``generate_report_data`` method works as expected.
@@ -564,11 +742,11 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
             ('student', state1),
             ('student', state2),
         ])
-        student_data, _ = ProblemResponses._build_student_data(
+        student_data = list(ProblemResponses._iter_student_data(
             user_id=self.instructor.id,
             course_key=self.course.id,
             usage_key_str=str(self.course.location),
-        )
+        ))
         self.assertEquals(len(student_data), 2)
         self.assertDictContainsSubset({
             'username': 'student',
@@ -588,18 +766,18 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         }, student_data[1])
         self.assertEquals(student_data[0]['state'], student_data[1]['state'])
 
-    def test_build_student_data_for_block_with_real_generate_report_data(self):
+    def test_iter_student_data_for_block_with_real_generate_report_data(self):
         """
         Ensure that building student data for a block that supports the
         ``generate_report_data`` method works as expected.
         """
         self.define_option_problem(u'Problem1')
         self.submit_student_answer(self.student.username, u'Problem1', ['Option 1'])
-        student_data, _ = ProblemResponses._build_student_data(
+        student_data = list(ProblemResponses._iter_student_data(
             user_id=self.instructor.id,
             course_key=self.course.id,
             usage_key_str=str(self.course.location),
-        )
+        ))
         self.assertEquals(len(student_data), 1)
         self.assertDictContainsSubset({
             'username': 'student',
@@ -613,26 +791,50 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         }, student_data[0])
         self.assertIn('state', student_data[0])
 
-    @patch('lms.djangoapps.instructor_task.tasks_helper.grades.list_problem_responses')
     @patch('xmodule.capa_module.CapaDescriptor.generate_report_data', create=True)
-    def test_build_student_data_for_block_with_generate_report_data_not_implemented(
+    def test_iter_student_data_for_block_with_generate_report_data_not_implemented(
             self,
             mock_generate_report_data,
-            mock_list_problem_responses,
     ):
         """
         Ensure that if ``generate_report_data`` raises a NotImplementedError,
         the report falls back to the alternative method.
         """
         problem = self.define_option_problem(u'Problem1')
+        self.submit_student_answer(self.student.username, u'Problem1', ['Option 1'])
         mock_generate_report_data.side_effect = NotImplementedError
-        ProblemResponses._build_student_data(
+        student_data = list(ProblemResponses._iter_student_data(
             user_id=self.instructor.id,
             course_key=self.course.id,
             usage_key_str=str(problem.location),
-        )
+        ))
+        student_data_keys = ProblemResponses._student_data_keys(set(chain.from_iterable(student_data)))
         mock_generate_report_data.assert_called_with(ANY, ANY)
-        mock_list_problem_responses.assert_called_with(self.course.id, ANY, ANY)
+        self.assertEquals(len(student_data), 1)
+        self.assertIn('state', student_data[0])
+        self.assertEquals(student_data_keys, ['username', 'title', 'location', 'block_key', 'state'])
+
+    @patch.dict('django.conf.settings.FEATURES', {'MAX_PROBLEM_RESPONSES_COUNT': None})
+    @override_settings(USER_STATE_BATCH_SIZE=2)
+    def test_iter_student_data_in_chunks(self):
+        """
+        Ensure that responses are read in chunks of USER_STATE_BATCH_SIZE
+        without dropping or repeating any of them.
+        """
+        self.define_option_problem(u'Problem1')
+        for ctr in range(5):
+            student = self.create_student('student{}'.format(ctr))
+            self.submit_student_answer(student.username, u'Problem1', ['Option 1'])
+
+        student_data = list(ProblemResponses._iter_student_data(
+            user_id=self.instructor.id,
+            course_key=self.course.id,
+            usage_key_str=str(self.course.location),
+        ))
+        self.assertEquals(
+            sorted(data['username'] for data in student_data),
+            ['student{}'.format(ctr) for ctr in range(5)],
+        )
 
     def test_success(self):
         task_input = {
@@ -641,15 +843,12 @@ class TestProblemResponsesReport(TestReportMixin, InstructorTaskModuleTestCase):
         }
         with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
             with patch('lms.djangoapps.instructor_task.tasks_helper.grades'
-                       '.ProblemResponses._build_student_data') as mock_build_student_data:
-                mock_build_student_data.return_value = (
-                    [
-                        {'username': 'user0', 'state': u'state0'},
-                        {'username': 'user1', 'state': u'state1'},
-                        {'username': 'user2', 'state': u'state2'},
-                    ],
-                    ['username', 'state']
-                )
+                       '.ProblemResponses._iter_student_data') as mock_iter_student_data:
+                mock_iter_student_data.return_value = iter([
+                    {'username': 'user0', 'state': u'state0'},
+                    {'username': 'user1', 'state': u'state1'},
+                    {'username': 'user2', 'state': u'state2'},
+                ])
                 result = ProblemResponses.generate(
                     None, None, self.course.id, task_input, 'calculated'
                 )
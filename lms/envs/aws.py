@@ -504,6 +504,18 @@ XBLOCK_FIELD_DATA_WRAPPERS = ENV_TOKENS.get(
     XBLOCK_FIELD_DATA_WRAPPERS
 )
 
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = ENV_TOKENS.get(
+    'COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES',
+    COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES
+)
+CONTENTSERVER_DISK_CACHE_DIR = ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE_DIR', CONTENTSERVER_DISK_CACHE_DIR)
+CONTENTSERVER_DISK_CACHE_MAX_BYTES = ENV_TOKENS.get(
+    'CONTENTSERVER_DISK_CACHE_MAX_BYTES',
+    CONTENTSERVER_DISK_CACHE_MAX_BYTES
+)
+SAFE_EXEC_CACHE_MAX_VALUE_BYTES = ENV_TOKENS.get('SAFE_EXEC_CACHE_MAX_VALUE_BYTES', SAFE_EXEC_CACHE_MAX_VALUE_BYTES)
+SAFE_EXEC_CACHE_LOCAL_MAX_BYTES = ENV_TOKENS.get('SAFE_EXEC_CACHE_LOCAL_MAX_BYTES', SAFE_EXEC_CACHE_LOCAL_MAX_BYTES)
+
 ############### Mixed Related(Secure/Not-Secure) Items ##########
 LMS_SEGMENT_KEY = AUTH_TOKENS.get('SEGMENT_KEY')
 
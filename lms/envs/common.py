@@ -897,6 +897,24 @@ XBLOCK_FIELD_DATA_WRAPPERS = ()
 ############# ModuleStore Configuration ##########
 
 MODULESTORE_BRANCH = 'published-only'
+
+# Maximum total size, in bytes, of the pickled course structures kept in each
+# process on top of the 'course_structure_cache' backend. 0 disables it.
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 64 * 1024 * 1024
+
+# Local directory in which contentserver keeps the course assets too large for the
+# 'course_assets' cache, and the maximum total size, in bytes, of the files in it.
+# None disables it.
+CONTENTSERVER_DISK_CACHE_DIR = None
+CONTENTSERVER_DISK_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# Results of the code capa problems run with safe_exec are cached in the
+# 'safe_exec' cache if it is configured, else in 'default'. Results larger than
+# SAFE_EXEC_CACHE_MAX_VALUE_BYTES once compressed are not cached, and up to
+# SAFE_EXEC_CACHE_LOCAL_MAX_BYTES of them are also kept in each process. 0
+# disables the per-process copy.
+SAFE_EXEC_CACHE_MAX_VALUE_BYTES = 1000 * 1000
+SAFE_EXEC_CACHE_LOCAL_MAX_BYTES = 0
 CONTENTSTORE = None
 DOC_STORE_CONFIG = {
     'host': 'localhost',
@@ -1961,6 +1979,16 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Backend storage options
     PRUNING_ACTIVE=False,
+
+    # Maximum total size, in bytes of serialized data, of the block
+    # structures kept in each process's cache when the
+    # block_structure.process_cache waffle switch is enabled.
+    PROCESS_CACHE_MAX_SIZE=50 * 1024 * 1024,
+
+    # Number of seconds for which a block structure in the process cache is
+    # served without checking its version in storage, so a course update can
+    # take this long to reach each process.  0 checks on every read.
+    PROCESS_CACHE_VERIFY_INTERVAL=30,
 )
 
 ################################ Bulk Email ###################################
@@ -230,6 +230,9 @@ CACHES = {
     },
 }
 
+# Structures cached in-process would outlive the per-test cache resets
+COURSE_STRUCTURE_CACHE_LOCAL_MAX_BYTES = 0
+
 # Dummy secret key for dev
 SECRET_KEY = '85920908f28904ed733fe576320db18cabd7b6cd'
 
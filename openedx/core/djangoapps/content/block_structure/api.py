@@ -4,6 +4,7 @@ Higher order functions built on the BlockStructureManager to interact with a dja
 from django.core.cache import cache
 from xmodule.modulestore.django import modulestore
 
+from .exceptions import BlockStructureNotFound, TransformerDataIncompatible
 from .manager import BlockStructureManager
 
 
@@ -20,6 +21,18 @@ def get_course_in_cache(course_key):
     return get_block_structure_manager(course_key).get_collected()
 
 
+def get_course_in_cache_if_collected(course_key):
+    """
+    Returns the block structure in the cache for the given course_key,
+    like get_course_in_cache, or None if it would need to be collected.
+    For callers that can do without it rather than collect the course.
+    """
+    try:
+        return get_block_structure_manager(course_key).get_collected(collect_if_missing=False)
+    except (BlockStructureNotFound, TransformerDataIncompatible):
+        return None
+
+
 def update_course_in_cache(course_key):
     """
     A higher order function implemented on top of the
@@ -43,6 +56,16 @@ def clear_course_from_cache(course_key):
     get_block_structure_manager(course_key).clear()
 
 
+def clear_course_from_process_cache(course_key):
+    """
+    Clears the block structure for the given course_key from this
+    process's cache of block structures, leaving the shared cache and
+    storage untouched.
+    """
+    bs_manager = get_block_structure_manager(course_key)
+    bs_manager.store.delete_from_process_cache(bs_manager.root_block_usage_key)
+
+
 def get_block_structure_manager(course_key):
     """
     Returns the manager for managing Block Structures for the given course.
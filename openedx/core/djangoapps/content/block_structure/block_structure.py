@@ -375,6 +375,132 @@ class TransformerDataMap(dict):
             return key
 
 
+class LazyTransformerDataMap(TransformerDataMap):
+    """
+    A TransformerDataMap for a single block, whose transformers' data is
+    loaded by a TransformerBlockDataLoader on first access.
+
+    Pickling the map loads all of its data and produces a plain
+    TransformerDataMap.  A deep-copy of the map shares a copy of its
+    loader, so data that is not yet loaded is loaded independently by
+    the original and the copy.
+    """
+    def __init__(self, loader):
+        super(LazyTransformerDataMap, self).__init__()
+        self._loader = loader
+
+    def __getitem__(self, key):
+        self._loader.load(self._translate_key(key))
+        return super(LazyTransformerDataMap, self).__getitem__(key)
+
+    def __setitem__(self, key, value):
+        self._loader.load(self._translate_key(key))
+        super(LazyTransformerDataMap, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._loader.load(self._translate_key(key))
+        super(LazyTransformerDataMap, self).__delitem__(key)
+
+    def __contains__(self, key):
+        key = self._translate_key(key)
+        self._loader.load(key)
+        return super(LazyTransformerDataMap, self).__contains__(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        self._loader.load_all()
+        return super(LazyTransformerDataMap, self).__iter__()
+
+    def __len__(self):
+        self._loader.load_all()
+        return super(LazyTransformerDataMap, self).__len__()
+
+    def keys(self):
+        self._loader.load_all()
+        return super(LazyTransformerDataMap, self).keys()
+
+    def values(self):
+        self._loader.load_all()
+        return super(LazyTransformerDataMap, self).values()
+
+    def items(self):
+        self._loader.load_all()
+        return super(LazyTransformerDataMap, self).items()
+
+    def iterkeys(self):
+        self._loader.load_all()
+        return super(LazyTransformerDataMap, self).iterkeys()
+
+    def itervalues(self):
+        self._loader.load_all()
+        return super(LazyTransformerDataMap, self).itervalues()
+
+    def iteritems(self):
+        self._loader.load_all()
+        return super(LazyTransformerDataMap, self).iteritems()
+
+    def __reduce__(self):
+        self._loader.load_all()
+        return TransformerDataMap, (), None, None, dict.iteritems(self)
+
+    def __deepcopy__(self, memo):
+        copied = LazyTransformerDataMap(None)
+        memo[id(self)] = copied
+        copied._loader = deepcopy(self._loader, memo)  # pylint: disable=protected-access
+        for transformer_name, transformer_data in dict.iteritems(self):
+            dict.__setitem__(copied, transformer_name, deepcopy(transformer_data, memo))
+        return copied
+
+
+class TransformerBlockDataLoader(object):
+    """
+    Loads the block-specific data of transformers into the
+    LazyTransformerDataMaps of a block structure's BlockData, one
+    transformer at a time, on first access.
+    """
+    def __init__(self, block_data_map, section_loaders):
+        # Map of a block's usage key to its collected data.
+        # dict {UsageKey: BlockData}
+        self.block_data_map = block_data_map
+
+        # Map of a transformer's name to a function that returns the
+        # transformer's block-specific data, for transformers whose data
+        # is not loaded yet.
+        # dict {string: function() -> dict {UsageKey: TransformerData}}
+        self.section_loaders = section_loaders
+
+    def load(self, transformer_name):
+        """
+        Loads the block-specific data of the transformer with the given
+        name, if not loaded yet.
+        """
+        section_loader = self.section_loaders.pop(transformer_name, None)
+        if section_loader is None:
+            return
+        for usage_key, transformer_data in section_loader().iteritems():
+            block_data = self.block_data_map.get(usage_key)
+            if block_data is not None:
+                dict.__setitem__(block_data.transformer_data, transformer_name, transformer_data)
+
+    def load_all(self):
+        """
+        Loads the block-specific data of all transformers.
+        """
+        for transformer_name in self.section_loaders.keys():
+            self.load(transformer_name)
+
+    def __deepcopy__(self, memo):
+        copied = TransformerBlockDataLoader(None, dict(self.section_loaders))
+        memo[id(self)] = copied
+        copied.block_data_map = deepcopy(self.block_data_map, memo)
+        return copied
+
+
 class BlockData(FieldData):
     """
     Data structure to encapsulate collected data for a single block.
@@ -392,6 +518,37 @@ class BlockData(FieldData):
         self.transformer_data = TransformerDataMap()
 
 
+def _copy_mutable(value):
+    """
+    Returns a copy of the given value if it is a mutable container,
+    or the value itself otherwise.
+    """
+    if isinstance(value, (dict, list, set)):
+        return deepcopy(value)
+    return value
+
+
+def _copy_fields(fields):
+    """
+    Returns a copy of the given map of fields, with copies of their
+    mutable values.
+    """
+    return {name: _copy_mutable(value) for name, value in fields.iteritems()}
+
+
+def _shallow_copy_transformer_data(transformer_data):
+    """
+    Returns a TransformerDataMap with copies of the TransformerData in
+    the given map, sharing their immutable values.
+    """
+    transformer_data_copy = TransformerDataMap()
+    for transformer_name, data in dict.iteritems(transformer_data):
+        data_copy = TransformerData()
+        data_copy.fields = _copy_fields(data.fields)
+        dict.__setitem__(transformer_data_copy, transformer_name, data_copy)
+    return transformer_data_copy
+
+
 class BlockStructureBlockData(BlockStructure):
     """
     Subclass of BlockStructure that is responsible for managing block
@@ -414,19 +571,76 @@ class BlockStructureBlockData(BlockStructure):
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
 
+        # Loader of the block-specific transformer data that is not loaded
+        # yet, if the data of this structure is loaded lazily.
+        # TransformerBlockDataLoader or None
+        self._transformer_block_data_loader = None
+
     def copy(self):
         """
         Returns a new instance of BlockStructureBlockData with a
         deep-copy of this instance's contents.
         """
         from .factory import BlockStructureFactory
+        memo = {}
         return BlockStructureFactory.create_new(
             self.root_block_usage_key,
             deepcopy(self._block_relations),
             deepcopy(self.transformer_data),
-            deepcopy(self._block_data_map),
+            deepcopy(self._block_data_map, memo),
+            deepcopy(self._transformer_block_data_loader, memo),
+        )
+
+    def shallow_copy(self):
+        """
+        Returns a new instance of BlockStructureBlockData with its own
+        block relations and its own maps of each block's fields and
+        transformer data.  Mutable values in those maps (dicts, lists and
+        sets) are copied, while the immutable ones are shared with this
+        instance.
+
+        This is much cheaper than `copy` for large structures, where most
+        values are immutable.  Changing data in the copy, including values
+        mutated in place, does not affect this instance.  The
+        block-specific transformer data of this instance must already be
+        loaded.
+        """
+        from .factory import BlockStructureFactory
+        block_relations = self._block_relations.__class__()
+        for usage_key, relations in self._block_relations.iteritems():
+            relations_copy = _BlockRelations()
+            relations_copy.parents = list(relations.parents)
+            relations_copy.children = list(relations.children)
+            block_relations[usage_key] = relations_copy
+
+        block_data_map = self._block_data_map.__class__()
+        for usage_key, block_data in self._block_data_map.iteritems():
+            block_data_copy = BlockData(usage_key)
+            block_data_copy.fields = _copy_fields(block_data.fields)
+            block_data_copy.transformer_data = _shallow_copy_transformer_data(block_data.transformer_data)
+            block_data_map[usage_key] = block_data_copy
+
+        return BlockStructureFactory.create_new(
+            self.root_block_usage_key,
+            block_relations,
+            _shallow_copy_transformer_data(self.transformer_data),
+            block_data_map,
         )
 
+    def load_transformer_block_data(self, transformers):
+        """
+        Loads the block-specific data of the given transformers up front,
+        if the data of this structure is loaded lazily.  The data of any
+        other transformer is still loaded on first access.
+
+        Arguments:
+            transformers ([BlockStructureTransformer]) - The transformers
+                whose data is to be loaded.
+        """
+        if self._transformer_block_data_loader:
+            for transformer in transformers:
+                self._transformer_block_data_loader.load(transformer.name())
+
     def iteritems(self):
         """
         Returns iterator of (UsageKey, BlockData) pairs for all
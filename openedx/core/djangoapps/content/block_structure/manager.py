@@ -76,7 +76,7 @@ class BlockStructureManager(object):
         transformers.transform(block_structure)
         return block_structure
 
-    def get_collected(self):
+    def get_collected(self, collect_if_missing=True):
         """
         Returns the collected Block Structure for the root_block_usage_key,
         getting block data from the cache and modulestore, as needed.
@@ -85,6 +85,9 @@ class BlockStructureManager(object):
         the modulestore is accessed if needed (at cache miss), and the
         transformers data is collected if needed.
 
+        If collect_if_missing is False, BlockStructureNotFound or
+        TransformerDataIncompatible is raised instead of collecting.
+
         Returns:
             BlockStructureBlockData - A collected block structure,
                 starting at root_block_usage_key, with collected data
@@ -98,7 +101,7 @@ class BlockStructureManager(object):
             BlockStructureTransformers.verify_versions(block_structure)
 
         except (BlockStructureNotFound, TransformerDataIncompatible):
-            if config.waffle().is_enabled(config.RAISE_ERROR_WHEN_NOT_FOUND):
+            if not collect_if_missing or config.waffle().is_enabled(config.RAISE_ERROR_WHEN_NOT_FOUND):
                 raise
             else:
                 block_structure = self._update_collected()
@@ -0,0 +1,291 @@
+"""
+Compact serialization format for BlockStructureBlockData.
+
+The legacy format is a zlib-compressed pickle of the structure's
+(block_relations, transformer_data, block_data_map) tuple.  Unpickling it
+re-creates every usage key once for each of its references, and every
+block's data for every transformer, all up front.
+
+The compact format is:
+
+    COMPACT_FORMAT_PREFIX + zlib(header length + header + sections)
+
+The header is a pickled dict containing:
+
+    * 'keys': the list of distinct usage keys in the structure.  Each usage
+      key is serialized exactly once; everything else refers to a block by
+      its index into this list.  The first 'num_related_keys' of these
+      are the blocks in the structure's relations.
+    * 'children' and 'parents': the structure's adjacency lists, as pairs
+      of arrays in compressed sparse row form: the ids of the neighbors of
+      block i are indices[offsets[i]:offsets[i + 1]].
+    * 'data_keys': an array of the indices of blocks that have block data.
+    * 'sections': a map of section name to the (offset, length) of its
+      pickle in the sections area.
+
+Each section is pickled separately so that it can be decoded on its own,
+which allows the block-specific data of each transformer to be loaded
+only when it is first accessed:
+
+    * XBLOCK_FIELDS_SECTION: {block index: collected xBlock fields}
+    * TRANSFORMER_DATA_SECTION: {transformer name: structure-wide fields}
+    * transformer_section_name(name): {block index: block fields} for
+      the block-specific data of the named transformer.
+"""
+import cPickle as pickle
+import struct
+import zlib
+from array import array
+from functools import partial
+
+from .block_structure import (
+    BlockData,
+    LazyTransformerDataMap,
+    TransformerBlockDataLoader,
+    TransformerData,
+    TransformerDataMap,
+    _BlockRelations,
+)
+
+
+# Prefix that identifies data in the compact format.  Legacy data is a
+# bare zlib stream, which can never start with a null byte.
+COMPACT_FORMAT_VERSION = 1
+COMPACT_FORMAT_PREFIX = b'\x00BSC' + chr(COMPACT_FORMAT_VERSION)
+
+# Names of the sections of the compact format.
+XBLOCK_FIELDS_SECTION = u'xblock_fields'
+TRANSFORMER_DATA_SECTION = u'transformer_data'
+TRANSFORMER_SECTION_PREFIX = u'transformer:'
+
+# Array typecode used for block indices.
+_INDEX_TYPECODE = 'i'
+_HEADER_LENGTH = struct.Struct('!I')
+
+
+def transformer_section_name(transformer_name):
+    """
+    Returns the name of the section containing the block-specific data
+    of the transformer with the given name.
+    """
+    return TRANSFORMER_SECTION_PREFIX + transformer_name
+
+
+def is_compact(serialized_data):
+    """
+    Returns whether the given serialized data is in the compact format.
+    """
+    return serialized_data.startswith(COMPACT_FORMAT_PREFIX)
+
+
+def serialize(block_structure):
+    """
+    Returns the compact serialization of the given BlockStructureBlockData.
+    """
+    # pylint: disable=protected-access
+    block_relations = block_structure._block_relations
+    block_data_map = block_structure._block_data_map
+
+    usage_keys = list(block_relations)
+    num_related_keys = len(usage_keys)
+    usage_keys.extend(usage_key for usage_key in block_data_map if usage_key not in block_relations)
+    index_of_key = {usage_key: index for index, usage_key in enumerate(usage_keys)}
+
+    sections = {
+        XBLOCK_FIELDS_SECTION: {},
+        TRANSFORMER_DATA_SECTION: {
+            transformer_name: transformer_data.fields
+            for transformer_name, transformer_data in block_structure.transformer_data.iteritems()
+        },
+    }
+    data_keys = array(_INDEX_TYPECODE)
+    for usage_key, block_data in block_data_map.iteritems():
+        index = index_of_key[usage_key]
+        data_keys.append(index)
+        if block_data.fields:
+            sections[XBLOCK_FIELDS_SECTION][index] = block_data.fields
+        for transformer_name, transformer_data in block_data.transformer_data.iteritems():
+            section = sections.setdefault(transformer_section_name(transformer_name), {})
+            section[index] = transformer_data.fields
+
+    section_offsets = {}
+    pickled_sections = []
+    offset = 0
+    for section_name, section in sections.iteritems():
+        pickled_section = pickle.dumps(section, pickle.HIGHEST_PROTOCOL)
+        section_offsets[section_name] = (offset, len(pickled_section))
+        pickled_sections.append(pickled_section)
+        offset += len(pickled_section)
+
+    header = pickle.dumps(
+        {
+            'keys': usage_keys,
+            'num_related_keys': num_related_keys,
+            'children': _encode_adjacency(usage_keys[:num_related_keys], index_of_key, block_relations, 'children'),
+            'parents': _encode_adjacency(usage_keys[:num_related_keys], index_of_key, block_relations, 'parents'),
+            'data_keys': data_keys.tostring(),
+            'sections': section_offsets,
+        },
+        pickle.HIGHEST_PROTOCOL,
+    )
+    return COMPACT_FORMAT_PREFIX + zlib.compress(
+        b''.join([_HEADER_LENGTH.pack(len(header)), header] + pickled_sections)
+    )
+
+
+def _encode_adjacency(usage_keys, index_of_key, block_relations, relation_name):
+    """
+    Returns the (offsets, indices) arrays, as strings, of the given
+    relation of the given blocks.
+    """
+    offsets = array(_INDEX_TYPECODE, [0])
+    indices = array(_INDEX_TYPECODE)
+    for usage_key in usage_keys:
+        indices.extend(index_of_key[neighbor] for neighbor in getattr(block_relations[usage_key], relation_name))
+        offsets.append(len(indices))
+    return offsets.tostring(), indices.tostring()
+
+
+def _decode_array(array_string):
+    """
+    Returns the array of block indices encoded in the given string.
+    """
+    decoded = array(_INDEX_TYPECODE)
+    decoded.fromstring(array_string)
+    return decoded
+
+
+class CompactBlockStructureData(object):
+    """
+    Decoder for a block structure serialized in the compact format.
+
+    Decompressing the data and reading its header is done up front; each
+    section is only unpickled when it is requested.
+    """
+    def __init__(self, serialized_data):
+        if not is_compact(serialized_data):
+            raise ValueError('Block structure data is not in the compact format.')
+
+        data = zlib.decompress(serialized_data[len(COMPACT_FORMAT_PREFIX):])
+        header_length, = _HEADER_LENGTH.unpack_from(data)
+        header_end = _HEADER_LENGTH.size + header_length
+        self._header = pickle.loads(data[_HEADER_LENGTH.size:header_end])
+        self._sections_data = buffer(data, header_end)
+
+        # list [UsageKey]
+        self.usage_keys = self._header['keys']
+
+    @property
+    def section_names(self):
+        """
+        Returns the names of all the sections in the data.
+        """
+        return self._header['sections'].keys()
+
+    @property
+    def transformer_names(self):
+        """
+        Returns the names of the transformers that have block-specific
+        sections in the data.
+        """
+        return [
+            section_name[len(TRANSFORMER_SECTION_PREFIX):]
+            for section_name in self.section_names
+            if section_name.startswith(TRANSFORMER_SECTION_PREFIX)
+        ]
+
+    def load_section(self, section_name):
+        """
+        Unpickles and returns the section with the given name, or an
+        empty dict if there is no such section.
+        """
+        try:
+            offset, length = self._header['sections'][section_name]
+        except KeyError:
+            return {}
+        return pickle.loads(self._sections_data[offset:offset + length])
+
+    def block_relations(self):
+        """
+        Returns the structure's map of usage key to _BlockRelations.
+        """
+        usage_keys = self.usage_keys
+        related_keys = usage_keys[:self._header['num_related_keys']]
+        block_relations = {usage_key: _BlockRelations() for usage_key in related_keys}
+        for relation_name in ('children', 'parents'):
+            offsets, indices = (_decode_array(array_string) for array_string in self._header[relation_name])
+            for index, usage_key in enumerate(related_keys):
+                setattr(
+                    block_relations[usage_key],
+                    relation_name,
+                    [usage_keys[neighbor] for neighbor in indices[offsets[index]:offsets[index + 1]]],
+                )
+        return block_relations
+
+    def transformer_data(self):
+        """
+        Returns the structure's map of transformer name to its
+        structure-wide TransformerData.
+        """
+        transformer_data_map = TransformerDataMap()
+        for transformer_name, fields in self.load_section(TRANSFORMER_DATA_SECTION).iteritems():
+            transformer_data_map[transformer_name] = _transformer_data(fields)
+        return transformer_data_map
+
+    def block_data_map(self, transformer_names=None):
+        """
+        Returns the structure's map of usage key to BlockData, along
+        with the TransformerBlockDataLoader for its transformer data that
+        is not loaded yet, or None if all of it is loaded.
+
+        If transformer_names is given, only the block-specific data of
+        those transformers is loaded up front; the data of any other
+        transformer is loaded on first access.
+        """
+        usage_keys = self.usage_keys
+        block_data_map = {}
+        for index in _decode_array(self._header['data_keys']):
+            usage_key = usage_keys[index]
+            block_data_map[usage_key] = BlockData(usage_key)
+
+        for index, fields in self.load_section(XBLOCK_FIELDS_SECTION).iteritems():
+            block_data_map[usage_keys[index]].fields = fields
+
+        if transformer_names is None:
+            for transformer_name in self.transformer_names:
+                for usage_key, transformer_data in self._load_transformer_block_data(transformer_name).iteritems():
+                    block_data_map[usage_key].transformer_data[transformer_name] = transformer_data
+            return block_data_map, None
+
+        loader = TransformerBlockDataLoader(
+            block_data_map,
+            {
+                transformer_name: partial(self._load_transformer_block_data, transformer_name)
+                for transformer_name in self.transformer_names
+            },
+        )
+        for block_data in block_data_map.itervalues():
+            block_data.transformer_data = LazyTransformerDataMap(loader)
+        for transformer_name in transformer_names:
+            loader.load(transformer_name)
+        return block_data_map, loader
+
+    def _load_transformer_block_data(self, transformer_name):
+        """
+        Returns the block-specific data of the transformer with the
+        given name, as a map of usage key to TransformerData.
+        """
+        usage_keys = self.usage_keys
+        return {
+            usage_keys[index]: _transformer_data(fields)
+            for index, fields in self.load_section(transformer_section_name(transformer_name)).iteritems()
+        }
+
+
+def _transformer_data(fields):
+    """
+    Returns a TransformerData with the given fields.
+    """
+    transformer_data = TransformerData()
+    transformer_data.fields = fields
+    return transformer_data
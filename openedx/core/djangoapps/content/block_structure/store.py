@@ -2,11 +2,16 @@
 Module for the Storage of BlockStructure objects.
 """
 # pylint: disable=protected-access
+from collections import OrderedDict
 from logging import getLogger
+from threading import Lock
+from time import time
+
+from django.conf import settings
 
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from . import config
+from . import config, serializer
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
@@ -36,6 +41,93 @@ class StubModel(object):
         pass
 
 
+class _ProcessCacheEntry(object):
+    """
+    A block structure in the per-process cache, along with the version
+    data of the stored model it was read from.
+    """
+    def __init__(self, block_structure, size, version_key):
+        self.block_structure = block_structure
+        self.size = size
+        self.version_key = version_key
+        # Time at which version_key was last checked against the model.
+        self.verified_at = time()
+
+    def is_verified_recently(self):
+        """
+        Returns whether the version of this entry was checked within the
+        PROCESS_CACHE_VERIFY_INTERVAL block structures setting.
+        """
+        return time() - self.verified_at < _process_cache_verify_interval()
+
+
+class _ProcessCache(object):
+    """
+    Per-process LRU cache of deserialized block structures, in front of
+    the shared cache, keyed by their root block usage keys.  The total
+    size of the cached structures, measured by the length of their
+    serialized data, is capped by the PROCESS_CACHE_MAX_SIZE block
+    structures setting.
+    """
+    def __init__(self):
+        # dict {root block usage key: _ProcessCacheEntry}, in order of use.
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def get(self, root_block_usage_key):
+        """
+        Returns the entry cached for the given key, or None.
+        """
+        with self._lock:
+            entry = self._entries.pop(root_block_usage_key, None)
+            if entry is not None:
+                self._entries[root_block_usage_key] = entry
+            return entry
+
+    def set(self, root_block_usage_key, entry):
+        """
+        Caches the given entry, evicting the least recently used entries
+        as needed to stay within the size cap.
+        """
+        max_size = _process_cache_max_size()
+        if entry.size > max_size:
+            return
+        with self._lock:
+            self._pop(root_block_usage_key)
+            while self._entries and self._size + entry.size > max_size:
+                self._pop(next(iter(self._entries)))
+            self._entries[root_block_usage_key] = entry
+            self._size += entry.size
+
+    def discard(self, root_block_usage_key):
+        """
+        Removes the block structure for the given root_block_usage_key.
+        """
+        with self._lock:
+            self._pop(root_block_usage_key)
+
+    def clear(self):
+        """
+        Removes all cached block structures.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _pop(self, root_block_usage_key):
+        """
+        Removes the entry for the given key, if any.  The caller must
+        hold the lock.
+        """
+        entry = self._entries.pop(root_block_usage_key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+
+_process_cache = _ProcessCache()  # pylint: disable=invalid-name
+
+
 class BlockStructureStore(object):
     """
     Storage for BlockStructure objects.
@@ -65,6 +157,7 @@ class BlockStructureStore(object):
 
         bs_model = self._update_or_create_model(block_structure, serialized_data)
         self._add_to_cache(serialized_data, bs_model)
+        _process_cache.discard(block_structure.root_block_usage_key)
 
     def get(self, root_block_usage_key):
         """
@@ -74,6 +167,15 @@ class BlockStructureStore(object):
         The given root_block_usage_key must equate the
         root_block_usage_key previously passed to the `add` method.
 
+        When the PROCESS_CACHE switch is enabled, deserialized structures
+        are also kept in a per-process cache, so that hot courses skip
+        fetching and decompressing from the shared cache.  A cached
+        structure is served without reading its stored model if its
+        version was checked within the PROCESS_CACHE_VERIFY_INTERVAL
+        setting, and is otherwise served only if its version still matches
+        the model's.  Callers receive a shallow copy, so they remain free
+        to modify the returned structure, but not the values in it.
+
         Arguments:
             root_block_usage_key (UsageKey) - The usage_key for the
                 root of the block structure that is to be retrieved
@@ -87,7 +189,17 @@ class BlockStructureStore(object):
             BlockStructureNotFound if the root_block_usage_key is not
             found.
         """
+        use_process_cache = _is_storage_backing_enabled() and _is_process_cache_enabled()
+        entry = _process_cache.get(root_block_usage_key) if use_process_cache else None
+        if entry is not None and entry.is_verified_recently():
+            return entry.block_structure.shallow_copy()
+
         bs_model = self._get_model(root_block_usage_key)
+        if use_process_cache:
+            version_key = self._encode_process_cache_version(bs_model)
+            if entry is not None and entry.version_key == version_key:
+                entry.verified_at = time()
+                return entry.block_structure.shallow_copy()
 
         try:
             serialized_data = self._get_from_cache(bs_model)
@@ -95,7 +207,18 @@ class BlockStructureStore(object):
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+        if use_process_cache:
+            # Shallow copies share the cached structure's data, so load
+            # all of it before sharing the structure between requests.
+            if block_structure._transformer_block_data_loader:
+                block_structure._transformer_block_data_loader.load_all()
+            _process_cache.set(
+                root_block_usage_key,
+                _ProcessCacheEntry(block_structure, len(serialized_data), version_key),
+            )
+            return block_structure.shallow_copy()
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -108,9 +231,18 @@ class BlockStructureStore(object):
         """
         bs_model = self._get_model(root_block_usage_key)
         self._cache.delete(self._encode_root_cache_key(bs_model))
+        self.delete_from_process_cache(root_block_usage_key)
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
+    @staticmethod
+    def delete_from_process_cache(root_block_usage_key):
+        """
+        Removes all versions of the block structure for the given
+        root_block_usage_key from this process's cache.
+        """
+        _process_cache.discard(root_block_usage_key)
+
     def is_up_to_date(self, root_block_usage_key, modulestore):
         """
         Returns whether the data in storage for the given key is
@@ -190,7 +322,14 @@ class BlockStructureStore(object):
     def _serialize(self, block_structure):
         """
         Serializes the data for the given block_structure.
+
+        The compact format is only written once the COMPACT_SERIALIZATION
+        switch is enabled, so that it can be rolled out after every reader
+        is able to decode it.
         """
+        if _is_compact_serialization_enabled():
+            return serializer.serialize(block_structure)
+
         data_to_cache = (
             block_structure._block_relations,
             block_structure.transformer_data,
@@ -201,13 +340,24 @@ class BlockStructureStore(object):
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
-        """
-        block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+        Data in either the compact or the legacy format is accepted.  For
+        the compact format, the block-specific data of each transformer is
+        only deserialized when it is first accessed.
+        """
+        if serializer.is_compact(serialized_data):
+            compact_data = serializer.CompactBlockStructureData(serialized_data)
+            block_relations = compact_data.block_relations()
+            transformer_data = compact_data.transformer_data()
+            block_data_map, transformer_block_data_loader = compact_data.block_data_map(transformer_names=[])
+        else:
+            block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+            transformer_block_data_loader = None
         return BlockStructureFactory.create_new(
             root_block_usage_key,
             block_relations,
             transformer_data,
             block_data_map,
+            transformer_block_data_loader,
         )
 
     @staticmethod
@@ -225,6 +375,19 @@ class BlockStructureStore(object):
                 root_usage_key=unicode(bs_model.data_usage_key),
             )
 
+    @classmethod
+    def _encode_process_cache_version(cls, bs_model):
+        """
+        Returns the version of the given BlockStructureModel, to check
+        entries of the per-process cache against.
+
+        Only structures with storage backing are cached per-process, since
+        the version data of their model is what ensures that a structure
+        updated by another process is not served stale from this one for
+        longer than the PROCESS_CACHE_VERIFY_INTERVAL.
+        """
+        return tuple(sorted(cls._version_data_of_model(bs_model).iteritems()))
+
     @staticmethod
     def _version_data_of_block(root_block):
         """
@@ -254,3 +417,33 @@ def _is_storage_backing_enabled():
     Returns whether storage backing for Block Structures is enabled.
     """
     return config.waffle().is_enabled(config.STORAGE_BACKING_FOR_CACHE)
+
+
+def _is_process_cache_enabled():
+    """
+    Returns whether the per-process cache for Block Structures is enabled.
+    """
+    return config.waffle().is_enabled(config.PROCESS_CACHE)
+
+
+def _process_cache_max_size():
+    """
+    Returns the maximum total size, in bytes of serialized data, of the
+    block structures kept in the per-process cache.
+    """
+    return settings.BLOCK_STRUCTURES_SETTINGS.get('PROCESS_CACHE_MAX_SIZE', 0)
+
+
+def _process_cache_verify_interval():
+    """
+    Returns the number of seconds for which a block structure in the
+    per-process cache is served without checking its stored version.
+    """
+    return settings.BLOCK_STRUCTURES_SETTINGS.get('PROCESS_CACHE_VERIFY_INTERVAL', 0)
+
+
+def _is_compact_serialization_enabled():
+    """
+    Returns whether block structures are serialized in the compact format.
+    """
+    return config.waffle().is_enabled(config.COMPACT_SERIALIZATION)
@@ -177,6 +177,16 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
                 with self.assertRaises(BlockStructureNotFound):
                     self.bs_manager.get_collected()
 
+    def test_get_collected_without_collecting(self):
+        with mock_registered_transformers(self.registered_transformers):
+            with self.assertRaises(BlockStructureNotFound):
+                self.bs_manager.get_collected(collect_if_missing=False)
+        self.assertEquals(TestTransformer1.collect_call_count, 0)
+        self.collect_and_verify(expect_modulestore_called=True, expect_cache_updated=True)
+        with mock_registered_transformers(self.registered_transformers):
+            block_structure = self.bs_manager.get_collected(collect_if_missing=False)
+        self.assert_block_structure(block_structure, self.children_map)
+
     @ddt.data(True, False)
     def test_update_collected_if_needed(self, with_storage_backing):
         with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
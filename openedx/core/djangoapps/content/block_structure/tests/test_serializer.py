@@ -0,0 +1,102 @@
+"""
+Tests for block_structure/serializer.py
+"""
+import cPickle as pickle
+from unittest import TestCase
+
+import ddt
+
+from ..block_structure import BlockStructureBlockData, TransformerDataMap
+from ..factory import BlockStructureFactory
+from ..serializer import (
+    CompactBlockStructureData,
+    is_compact,
+    serialize,
+    transformer_section_name,
+    XBLOCK_FIELDS_SECTION,
+)
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@ddt.ddt
+class TestCompactSerializer(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the compact serialization of BlockStructureBlockData.
+    """
+    def setUp(self):
+        super(TestCompactSerializer, self).setUp()
+        self.children_map = self.DAG_CHILDREN_MAP
+        self.block_structure = self.create_block_structure(self.children_map)
+        self.block_structure._add_transformer(MockTransformer)  # pylint: disable=protected-access
+        self.block_structure.set_transformer_data(MockTransformer, 'structure_key', 'structure_value')
+        for block_id in range(len(self.children_map)):
+            block_key = self.block_key_factory(block_id)
+            self.block_structure._get_or_create_block(block_key)  # pylint: disable=protected-access
+            self.block_structure.override_xblock_field(block_key, 'display_name', u'Block {}'.format(block_id))
+            if block_id % 2:
+                self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'odd', block_id)
+
+    def _round_trip(self, block_structure, transformer_names=None):
+        """
+        Returns the block structure resulting from serializing and
+        deserializing the given block structure.
+        """
+        serialized_data = serialize(block_structure)
+        self.assertTrue(is_compact(serialized_data))
+        compact_data = CompactBlockStructureData(serialized_data)
+        block_data_map, transformer_block_data_loader = compact_data.block_data_map(transformer_names=transformer_names)
+        return BlockStructureFactory.create_new(
+            block_structure.root_block_usage_key,
+            compact_data.block_relations(),
+            compact_data.transformer_data(),
+            block_data_map,
+            transformer_block_data_loader,
+        )
+
+    @ddt.data(None, [], [MockTransformer.name()])
+    def test_round_trip(self, transformer_names):
+        deserialized = self._round_trip(self.block_structure, transformer_names)
+        self.assert_block_structure(deserialized, self.children_map)
+        self.assertEquals(
+            deserialized.get_transformer_data(MockTransformer, 'structure_key'),
+            'structure_value',
+        )
+        for block_id in range(len(self.children_map)):
+            block_key = self.block_key_factory(block_id)
+            self.assertEquals(deserialized.get_xblock_field(block_key, 'display_name'), u'Block {}'.format(block_id))
+            self.assertEquals(
+                deserialized.get_transformer_block_field(block_key, MockTransformer, 'odd'),
+                block_id if block_id % 2 else None,
+            )
+
+    def test_empty_structure(self):
+        block_structure = BlockStructureBlockData(self.block_key_factory(0))
+        deserialized = self._round_trip(block_structure)
+        self.assertEquals(list(deserialized), [])
+
+    def test_sections(self):
+        compact_data = CompactBlockStructureData(serialize(self.block_structure))
+        self.assertItemsEqual(compact_data.transformer_names, [MockTransformer.name()])
+        self.assertEquals(len(compact_data.load_section(XBLOCK_FIELDS_SECTION)), len(self.children_map))
+        self.assertEquals(compact_data.load_section(transformer_section_name('unknown')), {})
+
+        block_data_map, loader = compact_data.block_data_map(transformer_names=[])
+        self.assertEquals(loader.section_loaders.keys(), [MockTransformer.name()])
+        block_data = block_data_map[self.block_key_factory(1)]
+        self.assertEquals(block_data.transformer_data[MockTransformer].odd, 1)
+        self.assertEquals(loader.section_loaders, {})
+
+    def test_lazy_copy(self):
+        deserialized = self._round_trip(self.block_structure, transformer_names=[])
+        copied = deserialized.copy()
+        copied.set_transformer_block_field(self.block_key_factory(1), MockTransformer, 'odd', 'changed')
+        self.assertEquals(deserialized.get_transformer_block_field(self.block_key_factory(1), MockTransformer, 'odd'), 1)
+
+        # pickling loads all the data into plain maps
+        unpickled = pickle.loads(pickle.dumps(deserialized[self.block_key_factory(3)].transformer_data))
+        self.assertEquals(type(unpickled), TransformerDataMap)
+        self.assertEquals(unpickled[MockTransformer].odd, 3)
+
+    def test_not_compact(self):
+        with self.assertRaises(ValueError):
+            CompactBlockStructureData(b'x\x9c')
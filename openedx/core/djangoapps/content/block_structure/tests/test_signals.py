@@ -60,6 +60,13 @@ class CourseBlocksSignalTest(ModuleStoreTestCase):
 
         self.assertEquals(mock_bs_manager_clear.called, invalidate_cache_enabled)
 
+    @ddt.data(True, False)
+    @patch('openedx.core.djangoapps.content.block_structure.store.BlockStructureStore.delete_from_process_cache')
+    def test_process_cache_invalidation(self, invalidate_cache_enabled, mock_delete_from_process_cache):
+        with waffle().override(INVALIDATE_CACHE_ON_PUBLISH, active=invalidate_cache_enabled):
+            update_block_structure_on_course_publish(sender=None, course_key=self.course.id)
+        mock_delete_from_process_cache.assert_called_with(self.course_usage_key)
+
     def test_course_delete(self):
         bs_manager = get_block_structure_manager(self.course.id)
         self.assertIsNotNone(bs_manager.get_collected())
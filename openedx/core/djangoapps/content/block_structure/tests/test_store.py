@@ -1,14 +1,20 @@
 """
 Tests for block_structure/cache.py
 """
+import itertools
+
 import ddt
+from django.test.utils import override_settings
+from mock import patch
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE, waffle
+from ..config import COMPACT_SERIALIZATION, PROCESS_CACHE, STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
+from ..models import BlockStructureModel
 from ..exceptions import BlockStructureNotFound
-from ..store import BlockStructureStore
+from ..serializer import is_compact
+from ..store import _process_cache, BlockStructureStore
 from .helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin, MockCache, MockTransformer
 
 
@@ -29,6 +35,7 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
 
         self.mock_cache = MockCache()
         self.store = BlockStructureStore(self.mock_cache)
+        self.addCleanup(_process_cache.clear)
 
     def add_transformers(self):
         """
@@ -50,13 +57,29 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             with self.assertRaises(BlockStructureNotFound):
                 self.store.get(self.block_structure.root_block_usage_key)
 
-    @ddt.data(True, False)
-    def test_add_and_get(self, with_storage_backing):
+    @ddt.data(*itertools.product((True, False), (True, False)))
+    @ddt.unpack
+    def test_add_and_get(self, with_storage_backing, with_compact_serialization):
         with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
-            self.store.add(self.block_structure)
-            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+            with waffle().override(COMPACT_SERIALIZATION, active=with_compact_serialization):
+                self.store.add(self.block_structure)
+                stored_value = self.store.get(self.block_structure.root_block_usage_key)
             self.assertIsNotNone(stored_value)
             self.assert_block_structure(stored_value, self.children_map)
+            self.assertEquals(
+                stored_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                '{} val'.format(MockTransformer.name()),
+            )
+
+    @ddt.data(True, False)
+    def test_read_across_formats(self, write_compact):
+        with waffle().override(COMPACT_SERIALIZATION, active=write_compact):
+            self.store.add(self.block_structure)
+        self.assertEquals(is_compact(self.mock_cache.map.values()[0]), write_compact)
+
+        with waffle().override(COMPACT_SERIALIZATION, active=not write_compact):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
 
     @ddt.data(True, False)
     def test_delete(self, with_storage_backing):
@@ -89,3 +112,108 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         self.assertEquals(self.mock_cache.timeout_from_last_call, 0)
         self.store.add(self.block_structure)
         self.assertEquals(self.mock_cache.timeout_from_last_call, timeout)
+
+    @ddt.data(True, False)
+    @override_settings(BLOCK_STRUCTURES_SETTINGS={'PROCESS_CACHE_MAX_SIZE': 10 * 1024 * 1024})
+    def test_process_cache(self, with_storage_backing):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=with_storage_backing):
+            with waffle().override(PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                first_value = self.store.get(root_block_usage_key)
+                self.mock_cache.map.clear()
+
+                if with_storage_backing:
+                    # served from the process cache, as a copy
+                    second_value = self.store.get(root_block_usage_key)
+                    self.assertEquals(self.mock_cache.set_call_count, 1)
+                    self.assert_block_structure(second_value, self.children_map)
+                    first_value.remove_block(self.block_key_factory(1), keep_descendants=False)
+                    self.assert_block_structure(self.store.get(root_block_usage_key), self.children_map)
+                else:
+                    # without storage backing, there is no version data to key on
+                    with self.assertRaises(BlockStructureNotFound):
+                        self.store.get(root_block_usage_key)
+
+    @override_settings(BLOCK_STRUCTURES_SETTINGS={'PROCESS_CACHE_MAX_SIZE': 10 * 1024 * 1024})
+    def test_process_cache_invalidation(self):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                self.store.get(root_block_usage_key)
+                self.store.delete_from_process_cache(root_block_usage_key)
+                self.mock_cache.map.clear()
+                self.store.get(root_block_usage_key)
+                self.assertEquals(self.mock_cache.set_call_count, 2)
+
+    @override_settings(BLOCK_STRUCTURES_SETTINGS={
+        'PROCESS_CACHE_MAX_SIZE': 10 * 1024 * 1024, 'PROCESS_CACHE_VERIFY_INTERVAL': 60,
+    })
+    def test_process_cache_verify_interval(self):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                self.store.get(root_block_usage_key)
+                # recently verified, so served without reading the model
+                with patch.object(BlockStructureModel, 'get', side_effect=AssertionError):
+                    self.assert_block_structure(self.store.get(root_block_usage_key), self.children_map)
+
+    @override_settings(BLOCK_STRUCTURES_SETTINGS={'PROCESS_CACHE_MAX_SIZE': 10 * 1024 * 1024})
+    def test_process_cache_version_change(self):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                self.store.get(root_block_usage_key)
+                # updated by another process
+                BlockStructureModel.objects.filter(data_usage_key=root_block_usage_key).update(data_version='new')
+                self.store.get(root_block_usage_key)
+                self.assertEquals(self.mock_cache.set_call_count, 2)
+
+    @override_settings(BLOCK_STRUCTURES_SETTINGS={'PROCESS_CACHE_MAX_SIZE': 10 * 1024 * 1024})
+    def test_process_cache_copies_are_independent(self):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                first_value = self.store.get(root_block_usage_key)
+                first_value.set_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test', 'changed')
+                first_value.override_xblock_field(self.block_key_factory(0), 'test_override', 'changed')
+
+                second_value = self.store.get(root_block_usage_key)
+                self.assertEquals(
+                    second_value.get_transformer_block_field(self.block_key_factory(0), MockTransformer, 'test'),
+                    '{} val'.format(MockTransformer.name()),
+                )
+                self.assertIsNone(second_value.get_xblock_field(self.block_key_factory(0), 'test_override'))
+
+    def test_process_cache_copies_mutable_values(self):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        block_key = self.block_key_factory(0)
+        self.block_structure.override_xblock_field(block_key, 'group_access', {1: [2]})
+        self.block_structure.set_transformer_block_field(block_key, MockTransformer, 'list', [1])
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                first_value = self.store.get(root_block_usage_key)
+                first_value.get_xblock_field(block_key, 'group_access')[1].append(3)
+                first_value.get_xblock_field(block_key, 'group_access')[4] = [5]
+                first_value.get_transformer_block_field(block_key, MockTransformer, 'list').append(2)
+
+                second_value = self.store.get(root_block_usage_key)
+                self.assertEquals(second_value.get_xblock_field(block_key, 'group_access'), {1: [2]})
+                self.assertEquals(second_value.get_transformer_block_field(block_key, MockTransformer, 'list'), [1])
+
+    @override_settings(BLOCK_STRUCTURES_SETTINGS={'PROCESS_CACHE_MAX_SIZE': 1})
+    def test_process_cache_max_size(self):
+        root_block_usage_key = self.block_structure.root_block_usage_key
+        with waffle().override(STORAGE_BACKING_FOR_CACHE, active=True):
+            with waffle().override(PROCESS_CACHE, active=True):
+                self.store.add(self.block_structure)
+                self.store.get(root_block_usage_key)
+                self.mock_cache.map.clear()
+                self.store.get(root_block_usage_key)
+                # too large for the process cache, so refetched from storage
+                self.assertEquals(self.mock_cache.set_call_count, 2)
@@ -111,7 +111,14 @@ class BlockStructureTransformers(object):
         collection. Tranformers with filters are combined and run first in a
         single course tree traversal, then remaining transformers are run in
         the order that they were added.
+
+        The block-specific data of the transformers in the collection is
+        loaded up front; the data of any other transformer is only loaded
+        if a transformer accesses it.
         """
+        block_structure.load_transformer_block_data(
+            self._transformers['supports_filter'] + self._transformers['no_filter']
+        )
         self._transform_with_filters(block_structure)
         self._transform_without_filters(block_structure)
 
@@ -1,11 +1,23 @@
 """
 Helper functions for caching course assets.
 """
+import errno
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
 
-from xmodule.contentstore.content import STATIC_CONTENT_VERSION
+from xmodule.assetstore.assetmgr import AssetManager
+from xmodule.contentstore.content import STATIC_CONTENT_VERSION, StaticContentStream
+
+log = logging.getLogger(__name__)
 
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
@@ -48,3 +60,251 @@ def del_cached_content(location):
         pass
 
     CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+
+
+class DiskCachedContent(StaticContentStream):
+    """
+    A StaticContentStream whose data is read from a file in the AssetDiskCache.
+    """
+    def __init__(self, path, content, stream):
+        super(DiskCachedContent, self).__init__(
+            content.location, content.name, content.content_type, stream,
+            last_modified_at=content.last_modified_at, thumbnail_location=content.thumbnail_location,
+            import_path=content.import_path, length=content.length, locked=content.locked,
+            content_digest=content.content_digest,
+        )
+        self.path = path
+
+    @property
+    def file(self):
+        """
+        The open file holding the asset's data.
+        """
+        return self._stream
+
+
+class AssetDiskCache(object):
+    """
+    A least recently used cache of course assets in a local directory, keyed on the assets'
+    content digests, for assets too large to keep in CONTENT_CACHE.
+
+    The cache is filled in the background: a request for an asset which isn't cached yet is
+    served from the contentstore as usual, while a thread copies the asset to disk from a
+    stream of its own. Files are written under a temporary name and renamed into place, so
+    they are never seen half written. Only one thread per process fills the cache for a
+    given digest, and across processes a fill in progress is marked by its temporary file.
+
+    Each process tracks the size of the cache on its own, so its total size may go over
+    `max_bytes` by what other processes have added since it last looked at those files.
+    """
+    TMP_SUFFIX = '.tmp'
+    # A temporary file older than this is taken to be left over from a process which died.
+    STALE_FILL_SECONDS = 600
+    DIGEST_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Background fill threads by digest.
+        self._fills = {}
+        # Sizes of the cached files by digest, least recently used first.
+        self._entries = OrderedDict()
+        self._size = 0
+        self._load_entries()
+
+    def _path(self, digest):
+        """
+        Return the path of the file caching the asset with the given digest.
+        """
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _load_entries(self):
+        """
+        Index the files already in the cache directory, ordered by their last access.
+        """
+        entries = []
+        for dirpath, __, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if not self.DIGEST_PATTERN.match(filename):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(dirpath, filename))
+                except OSError:
+                    continue
+                entries.append((stat.st_atime, filename, stat.st_size))
+        for __, digest, size in sorted(entries):
+            self._entries[digest] = size
+            self._size += size
+
+    def get_or_fill(self, content):
+        """
+        Return a DiskCachedContent for the StaticContentStream `content` if its data is
+        cached. Otherwise return `content` itself, after starting to copy the asset into
+        the cache in the background if it can be cached.
+        """
+        digest = content.content_digest
+        if not digest or not self.DIGEST_PATTERN.match(digest):
+            return content
+        if content.length is None or content.length > self.max_bytes:
+            return content
+
+        path = self._path(digest)
+        cached = self._open(digest, path, content)
+        if cached is not None:
+            return cached
+
+        self._start_fill(digest, path, content.location)
+        return content
+
+    def wait_for_fills(self, timeout=None):
+        """
+        Wait for the fills in progress in this process to finish.
+        """
+        with self._lock:
+            fills = self._fills.values()
+        for fill in fills:
+            fill.join(timeout)
+
+    def _start_fill(self, digest, path, location):
+        """
+        Start a thread copying the asset at `location` into the cache, unless one is
+        already doing so in this process.
+        """
+        with self._lock:
+            if digest in self._fills:
+                return
+            fill = threading.Thread(target=self._fill_in_background, args=(digest, path, location))
+            fill.daemon = True
+            self._fills[digest] = fill
+        fill.start()
+
+    def _fill_in_background(self, digest, path, location):
+        """
+        Copy the asset at `location` into the cache file at `path`, reading it from
+        the contentstore with a stream of its own.
+        """
+        try:
+            content = AssetManager.find(location, as_stream=True)
+            try:
+                size = self._fill(digest, path, content)
+            finally:
+                content.close()
+            if size is not None:
+                with self._lock:
+                    if digest not in self._entries:
+                        self._entries[digest] = size
+                        self._size += size
+                self._evict()
+        except Exception:  # pylint: disable=broad-except
+            log.exception(u"Could not cache asset %s on disk", unicode(location))
+        finally:
+            with self._lock:
+                del self._fills[digest]
+
+    def _open(self, digest, path, content):
+        """
+        Open the cached file for `digest` and mark it as most recently used,
+        returning None if it isn't cached.
+        """
+        try:
+            stream = open(path, 'rb')
+        except IOError as err:
+            if err.errno != errno.ENOENT:
+                raise
+            with self._lock:
+                size = self._entries.pop(digest, None)
+                if size is not None:
+                    self._size -= size
+            return None
+
+        with self._lock:
+            size = self._entries.pop(digest, None)
+            if size is None:
+                # Cached by another process.
+                size = os.fstat(stream.fileno()).st_size
+                self._size += size
+            self._entries[digest] = size
+        try:
+            # Keep the access time current for _load_entries, even on noatime mounts.
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._evict()
+        return DiskCachedContent(path, content, stream)
+
+    def _fill(self, digest, path, content):
+        """
+        Copy the data of `content` into the cache file at `path`, and return its size.
+        Return None without reading `content` if another process is already doing so.
+        """
+        tmp_path = path + self.TMP_SUFFIX
+        try:
+            os.makedirs(os.path.dirname(path))
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except OSError as err:
+            if err.errno != errno.EEXIST:
+                raise
+            try:
+                if time.time() - os.path.getmtime(tmp_path) < self.STALE_FILL_SECONDS:
+                    return None
+                os.remove(tmp_path)
+            except OSError:
+                # The other process has just finished or given up.
+                return None
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                for chunk in content.stream_data():
+                    tmp_file.write(chunk)
+                    size += len(chunk)
+            os.rename(tmp_path, path)
+        except Exception:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return size
+
+    def _evict(self):
+        """
+        Remove least recently used files until the cache fits in `max_bytes`.
+        """
+        while True:
+            with self._lock:
+                if self._size <= self.max_bytes or len(self._entries) <= 1:
+                    return
+                digest, size = self._entries.popitem(last=False)
+                self._size -= size
+            try:
+                # Readers which already have the file open can finish reading it.
+                os.remove(self._path(digest))
+            except OSError as err:
+                if err.errno != errno.ENOENT:
+                    raise
+
+
+_ASSET_DISK_CACHE = None
+_ASSET_DISK_CACHE_LOCK = threading.Lock()
+
+
+def get_asset_disk_cache():
+    """
+    Return the AssetDiskCache for CONTENTSERVER_DISK_CACHE_DIR, or None if it isn't set.
+    """
+    global _ASSET_DISK_CACHE  # pylint: disable=global-statement
+    directory = getattr(settings, 'CONTENTSERVER_DISK_CACHE_DIR', None)
+    if not directory:
+        return None
+    with _ASSET_DISK_CACHE_LOCK:
+        if _ASSET_DISK_CACHE is None or _ASSET_DISK_CACHE.directory != directory:
+            _ASSET_DISK_CACHE = AssetDiskCache(directory, settings.CONTENTSERVER_DISK_CACHE_MAX_BYTES)
+        return _ASSET_DISK_CACHE
@@ -0,0 +1,139 @@
+"""
+Tests for the contentserver's disk cache of large assets.
+"""
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from mock import patch
+from opaque_keys.edx.locator import CourseLocator
+
+from xmodule.contentstore.content import StaticContentStream
+
+from ..caching import AssetDiskCache, DiskCachedContent
+
+
+class AssetDiskCacheTest(unittest.TestCase):
+    """
+    Tests for AssetDiskCache.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.course_key = CourseLocator('edX', 'toy', '2012_Fall')
+        # The contents of the assets in the contentstore, by location.
+        self.assets = {}
+        patcher = patch(
+            'openedx.core.djangoapps.contentserver.caching.AssetManager.find',
+            side_effect=lambda location, as_stream: self.make_content(*self.assets[location]),
+        )
+        self.mock_find = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_content(self, name, data):
+        """
+        Return a StaticContentStream over `data`.
+        """
+        location = self.course_key.make_asset_key('asset', name)
+        self.assets[location] = (name, data)
+        return StaticContentStream(
+            location, name, 'application/pdf', io.BytesIO(data),
+            length=len(data), content_digest=hashlib.md5(data).hexdigest(),
+        )
+
+    def fill(self, cache, content):
+        """
+        Request `content` from `cache`, and wait for it to be cached.
+        """
+        result = cache.get_or_fill(content)
+        cache.wait_for_fills()
+        return result
+
+    def test_fill_and_hit(self):
+        cache = AssetDiskCache(self.directory, 1000)
+        data = b'pdf' * 100
+        content = self.make_content('a.pdf', data)
+        # The first request is served from the contentstore while the asset is cached.
+        self.assertIs(self.fill(cache, content), content)
+        self.assertEqual(b''.join(content.stream_data()), data)
+
+        cached = cache.get_or_fill(self.make_content('a.pdf', data))
+        self.assertIsInstance(cached, DiskCachedContent)
+        self.assertEqual(b''.join(cached.stream_data()), data)
+        self.assertEqual(b''.join(cached.stream_data_in_range(3, 5)), b'pdf')
+        cached.close()
+
+        # Later requests are served from disk without reading the contentstore stream.
+        content = self.make_content('a.pdf', data)
+        with patch.object(StaticContentStream, 'stream_data', side_effect=AssertionError):
+            cached = cache.get_or_fill(content)
+        self.assertIsInstance(cached, DiskCachedContent)
+        self.assertEqual(cached.file.read(), data)
+        self.assertEqual(cached.location, content.location)
+        cached.close()
+        self.assertEqual(self.mock_find.call_count, 1)
+
+    def test_fill_in_progress_in_process(self):
+        cache = AssetDiskCache(self.directory, 1000)
+        content = self.make_content('a.pdf', b'x' * 100)
+        with patch('threading.Thread.start'):
+            self.assertIs(cache.get_or_fill(content), content)
+            # A second request doesn't start another fill, nor wait for the first one.
+            self.assertIs(cache.get_or_fill(content), content)
+        self.assertEqual(len(cache._fills), 1)  # pylint: disable=protected-access
+
+    def test_failed_fill(self):
+        cache = AssetDiskCache(self.directory, 1000)
+        content = self.make_content('a.pdf', b'x' * 100)
+        self.mock_find.side_effect = IOError
+        self.assertIs(self.fill(cache, content), content)
+        self.assertEqual(cache._fills, {})  # pylint: disable=protected-access
+        self.assertFalse(os.path.exists(cache._path(content.content_digest)))  # pylint: disable=protected-access
+
+    def test_evicts_least_recently_used(self):
+        cache = AssetDiskCache(self.directory, 250)
+        first, second, third = [self.make_content(name, name * 100) for name in (b'a', b'b', b'c')]
+        for content in (first, second):
+            self.fill(cache, content)
+        # Use the first asset again, so that the second is the least recently used.
+        cache.get_or_fill(self.make_content(b'a', b'a' * 100)).close()
+        self.fill(cache, third)
+
+        self.assertTrue(os.path.exists(cache._path(first.content_digest)))  # pylint: disable=protected-access
+        self.assertFalse(os.path.exists(cache._path(second.content_digest)))  # pylint: disable=protected-access
+        self.assertTrue(os.path.exists(cache._path(third.content_digest)))  # pylint: disable=protected-access
+
+    def test_reloads_existing_files(self):
+        data = b'video' * 50
+        self.fill(AssetDiskCache(self.directory, 1000), self.make_content('a.mp4', data))
+        cache = AssetDiskCache(self.directory, 1000)
+        self.assertEqual(cache._size, len(data))  # pylint: disable=protected-access
+
+    def test_uncacheable_content(self):
+        cache = AssetDiskCache(self.directory, 10)
+        too_large = self.make_content('a.pdf', b'x' * 11)
+        self.assertIs(self.fill(cache, too_large), too_large)
+        no_digest = self.make_content('b.pdf', b'x')
+        no_digest.content_digest = None
+        self.assertIs(self.fill(cache, no_digest), no_digest)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_fill_in_progress_elsewhere(self):
+        cache = AssetDiskCache(self.directory, 1000)
+        content = self.make_content('a.pdf', b'x' * 100)
+        path = cache._path(content.content_digest)  # pylint: disable=protected-access
+        os.makedirs(os.path.dirname(path))
+        open(path + AssetDiskCache.TMP_SUFFIX, 'wb').close()
+
+        self.assertIs(self.fill(cache, content), content)
+        self.assertFalse(os.path.exists(path))
+
+        # A fill which has been going on too long is taken over.
+        with patch.object(AssetDiskCache, 'STALE_FILL_SECONDS', -1):
+            self.fill(cache, content)
+        self.assertIsInstance(cache.get_or_fill(content), DiskCachedContent)
+        self.assertFalse(os.path.exists(path + AssetDiskCache.TMP_SUFFIX))
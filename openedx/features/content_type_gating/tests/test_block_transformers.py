@@ -0,0 +1,41 @@
+"""
+Tests for the content type gating block transformer.
+"""
+from django.conf import settings
+from django.test import SimpleTestCase
+from mock import Mock, patch
+
+from openedx.core.djangoapps.content.block_structure.tests.helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin
+from openedx.features.content_type_gating.block_transformers import ContentTypeGateTransformer
+from openedx.features.content_type_gating.helpers import CONTENT_GATING_PARTITION_ID
+
+
+class TestContentTypeGateTransformer(UsageKeyFactoryMixin, ChildrenMapTestMixin, SimpleTestCase):
+    """
+    Tests for ContentTypeGateTransformer.
+    """
+    def setUp(self):
+        super(TestContentTypeGateTransformer, self).setUp()
+        self.cached_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        self.problem_key = self.block_key_factory(3)
+        for usage_key in self.cached_structure:
+            self.cached_structure._get_or_create_block(usage_key)  # pylint: disable=protected-access
+        for field_name, value in (('graded', True), ('has_score', True), ('weight', 1), ('group_access', {1: [2]})):
+            self.cached_structure.override_xblock_field(self.problem_key, field_name, value)
+
+    @patch(
+        'openedx.features.content_type_gating.block_transformers.ContentTypeGatingConfig.enabled_for_enrollment',
+        return_value=True,
+    )
+    def test_cached_structure_is_not_changed(self, _mock_enabled):
+        full_access = [settings.CONTENT_TYPE_GATE_GROUP_IDS['full_access']]
+        # As for two requests served from the same process-cached block structure.
+        for __ in range(2):
+            block_structure = self.cached_structure.shallow_copy()
+            ContentTypeGateTransformer().transform(Mock(), block_structure)
+            self.assertEqual(
+                block_structure.get_xblock_field(self.problem_key, 'group_access'),
+                {1: [2], CONTENT_GATING_PARTITION_ID: full_access},
+            )
+        self.assertEqual(self.cached_structure.get_xblock_field(self.problem_key, 'group_access'), {1: [2]})
+        self.assertIsNone(self.cached_structure.get_xblock_field(self.block_key_factory(4), 'group_access'))